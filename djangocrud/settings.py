@@ -1,6 +1,7 @@
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,11 +44,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'shop.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'shop.middleware.PresenceMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -89,6 +92,8 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'django.template.context_processors.media',
+                'shop.context_processors.cart_summary',
+                'shop.context_processors.page_cache_csrf',
             ],
         },
     },
@@ -101,9 +106,107 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # IMMEDIATE: las transacciones toman el bloqueo de escritura al
+            # empezar y esperan busy_timeout, en lugar de fallar con
+            # "database is locked" al pasar de lectura a escritura
+            'transaction_mode': os.getenv('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+        },
+        # Conexiones persistentes: los PRAGMAs (shop/sqlite.py) se aplican
+        # al abrir la conexión, no en cada petición
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# PRAGMAs aplicados a cada conexión SQLite (ver shop/sqlite.py).
+# Un valor vacío en .env desactiva ese PRAGMA.
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'busy_timeout': os.getenv('SQLITE_BUSY_TIMEOUT', '5000'),        # ms
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': os.getenv('SQLITE_MMAP_SIZE', '134217728'),         # 128MB
+    'cache_size': os.getenv('SQLITE_CACHE_SIZE', '-20000'),          # negativo = KiB
+    'temp_store': os.getenv('SQLITE_TEMP_STORE', 'MEMORY'),
+}
+
+# Cada proceso ejecuta PRAGMA optimize=0x10002 como mucho una vez por intervalo (0 = nunca)
+SQLITE_OPTIMIZE_INTERVAL = int(os.getenv('SQLITE_OPTIMIZE_INTERVAL', '3600'))
+
+print(f"🔧 SQLITE: journal_mode={SQLITE_PRAGMAS['journal_mode']}, "
+      f"transaction_mode={DATABASES['default']['OPTIONS']['transaction_mode']}")
+
+# ==========================================
+# CACHÉ
+# ==========================================
+# locmem: una caché por proceso (solo desarrollo)
+# file: compartida entre procesos del mismo servidor, sin servicios externos
+# Las invalidaciones (shop/cache.py) solo llegan a los procesos que
+# comparten la caché: fuera de DEBUG no se acepta locmem
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem' if DEBUG else 'file')
+
+if CACHE_BACKEND == 'locmem' and not DEBUG:
+    raise ImproperlyConfigured(
+        'CACHE_BACKEND=locmem no es compartida entre procesos; '
+        'use CACHE_BACKEND=file fuera de DEBUG'
+    )
+
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'ferreteria',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+# TTL de los modelos de lectura del catálogo (ver shop/cache.py)
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', '900'))
+
+# TTL de la caché de página completa para anónimos (ver shop/page_cache.py)
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', '300'))
+
+print(f"🔧 CACHE_BACKEND: {CACHE_BACKEND}")
+
+# Presencia de usuarios (ver shop/presence.py)
+# Un usuario está "en línea" si alguna de sus sesiones tuvo actividad en
+# los últimos PRESENCE_ONLINE_WINDOW segundos; la actividad se escribe
+# como mucho una vez cada PRESENCE_TOUCH_INTERVAL segundos por sesión.
+PRESENCE_ONLINE_WINDOW = int(os.getenv('PRESENCE_ONLINE_WINDOW', '300'))
+PRESENCE_TOUCH_INTERVAL = int(os.getenv('PRESENCE_TOUCH_INTERVAL', '60'))
+
+# Reservas de stock del checkout (ver shop/inventory.py): minutos que se
+# apartan las unidades del carrito desde la última visita al checkout
+STOCK_RESERVATION_MINUTES = int(os.getenv('STOCK_RESERVATION_MINUTES', '15'))
+# Las páginas del checkout solo renuevan la reserva (una transacción de
+# escritura) cuando le quedan menos de estos minutos o cambió el carrito
+STOCK_RESERVATION_REFRESH_MINUTES = int(os.getenv('STOCK_RESERVATION_REFRESH_MINUTES', '5'))
+
+# Instrumentación por petición (ver shop/instrumentation.py)
+# Se registran en el log las peticiones que superan cualquiera de los dos
+# presupuestos; el histograma guarda las últimas REQUEST_METRICS_WINDOW
+# peticiones por URL.
+REQUEST_METRICS_ENABLED = os.getenv('REQUEST_METRICS_ENABLED', 'True') == 'True'
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '500'))
+SLOW_REQUEST_QUERIES = int(os.getenv('SLOW_REQUEST_QUERIES', '30'))
+REQUEST_METRICS_WINDOW = int(os.getenv('REQUEST_METRICS_WINDOW', '500'))
+
+# django-debug-toolbar (solo desarrollo): DEBUG=True y DEBUG_TOOLBAR=True
+DEBUG_TOOLBAR = DEBUG and os.getenv('DEBUG_TOOLBAR', 'False') == 'True'
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.insert(1, 'debug_toolbar.middleware.DebugToolbarMiddleware')
+    INTERNAL_IPS = ['127.0.0.1']
+    print("🔧 DEBUG_TOOLBAR enabled")
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -146,7 +249,10 @@ LOGOUT_REDIRECT_URL = 'shop:home'
 # ==========================================
 # EMAIL CONFIGURATION
 # ==========================================
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# En desarrollo: EMAIL_BACKEND=django.core.mail.backends.console.EmailBackend
+# o django.core.mail.backends.filebased.EmailBackend (usa EMAIL_FILE_PATH)
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = os.getenv('EMAIL_FILE_PATH', str(BASE_DIR / 'logs' / 'emails'))
 EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
 EMAIL_PORT = int(os.getenv('EMAIL_PORT', '587'))
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
@@ -155,6 +261,11 @@ EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'Tu Ferretería <noreply@ferreteria.com>')
 SERVER_EMAIL = DEFAULT_FROM_EMAIL
 
+# Bandeja de salida (shop/outbox.py): reintentos con backoff exponencial
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '5'))
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = int(os.getenv('EMAIL_OUTBOX_RETRY_BASE_SECONDS', '60'))
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = int(os.getenv('EMAIL_OUTBOX_RETRY_MAX_SECONDS', '21600'))
+
 print(f"🔧 EMAIL configured for: {EMAIL_HOST_USER}")
 
 # URL del sitio (para links en emails)
@@ -177,6 +288,26 @@ MESSAGE_TAGS = {
 LOGS_DIR = BASE_DIR / 'logs'
 LOGS_DIR.mkdir(exist_ok=True)
 
+# Logging asíncrono (shop/log_handlers.py): las peticiones solo encolan el
+# registro; un hilo formatea y escribe en los archivos rotativos.
+# LOG_ASYNC=False vuelve a escribir directamente desde cada petición.
+LOG_ASYNC = os.getenv('LOG_ASYNC', 'True') == 'True'
+# Formato de los archivos: 'json' (una línea por registro) o 'text'
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+# Muestreo de loggers ruidosos (niveles < WARNING): "logger=fracción,..."
+LOG_SAMPLE_RATES = {
+    name.strip(): float(rate)
+    for name, rate in (
+        item.split('=', 1)
+        for item in os.getenv('LOG_SAMPLE_RATES', 'django.server=0.1').split(',')
+        if '=' in item
+    )
+}
+
+_file_formatter = 'json' if LOG_FORMAT == 'json' else 'verbose'
+_target_handlers = ['console', 'error_file', 'file']
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -189,6 +320,9 @@ LOGGING = {
             'format': '{levelname} {asctime} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'shop.log_handlers.JsonFormatter',
+        },
     },
     'filters': {
         'require_debug_true': {
@@ -197,11 +331,15 @@ LOGGING = {
         'require_debug_false': {
             '()': 'django.utils.log.RequireDebugFalse',
         },
+        'sampling': {
+            '()': 'shop.log_handlers.SamplingFilter',
+            'rates': LOG_SAMPLE_RATES,
+        },
     },
     'handlers': {
         'console': {
             'level': 'INFO',
-            'filters': ['require_debug_true'],
+            'filters': ['require_debug_true'] + ([] if LOG_ASYNC else ['sampling']),
             'class': 'logging.StreamHandler',
             'formatter': 'simple'
         },
@@ -211,7 +349,8 @@ LOGGING = {
             'filename': LOGS_DIR / 'django.log',
             'maxBytes': 1024 * 1024 * 15,  # 15MB
             'backupCount': 10,
-            'formatter': 'verbose',
+            'formatter': _file_formatter,
+            'filters': [] if LOG_ASYNC else ['sampling'],
         },
         'error_file': {
             'level': 'ERROR',
@@ -219,21 +358,32 @@ LOGGING = {
             'filename': LOGS_DIR / 'django_errors.log',
             'maxBytes': 1024 * 1024 * 15,  # 15MB
             'backupCount': 10,
-            'formatter': 'verbose',
+            'formatter': _file_formatter,
+        },
+        # El nombre debe ordenar después de los destinos (dictConfig los
+        # configura en orden alfabético)
+        'queue': {
+            'class': 'shop.log_handlers.QueueListenerHandler',
+            'handlers': [f'cfg://handlers.{name}' for name in _target_handlers],
+            'queue_size': LOG_QUEUE_SIZE,
+            'filters': ['sampling'],
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file', 'error_file'],
+            'handlers': ['queue'] if LOG_ASYNC else _target_handlers,
             'level': 'INFO',
             'propagate': False,
         },
         'shop': {
-            'handlers': ['console', 'file', 'error_file'],
+            'handlers': ['queue'] if LOG_ASYNC else _target_handlers,
             'level': 'INFO',
             'propagate': False,
         },
     },
 }
 
-print(f"📝 LOGGING configured. Log files in: {LOGS_DIR}")
\ No newline at end of file
+if not LOG_ASYNC:
+    del LOGGING['handlers']['queue']
+
+print(f"📝 LOGGING configured. Log files in: {LOGS_DIR} (async: {LOG_ASYNC}, format: {LOG_FORMAT})")
\ No newline at end of file
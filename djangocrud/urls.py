@@ -28,6 +28,9 @@ urlpatterns = [
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
+if settings.DEBUG_TOOLBAR:
+    urlpatterns += [path('__debug__/', include('debug_toolbar.urls'))]
+
 # ==========================================
 # HANDLERS DE ERROR PERSONALIZADOS
 # ==========================================
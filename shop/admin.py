@@ -3,8 +3,10 @@ from django.contrib import admin
 from .models import (
     Category, Product, Order, OrderItem, 
     Cart, CartItem, UserProfile, Review, 
-    ReviewHelpful, Wishlist, WishlistItem
+    ReviewHelpful, Wishlist, WishlistItem, EmailOutbox, StockReservation
 )
+from .cache import invalidate_catalog, invalidate_products
+from .ratings import rebuild_product_ratings
 
 # ==========================================
 # ADMIN PARA PRODUCT CON ESPECIFICACIONES
@@ -64,16 +66,19 @@ class ProductAdmin(admin.ModelAdmin):
     
     def activar_productos(self, request, queryset):
         updated = queryset.update(is_active=True)
+        invalidate_catalog()  # update() no dispara señales
         self.message_user(request, f'{updated} producto(s) activado(s).')
     activar_productos.short_description = "✅ Activar productos seleccionados"
     
     def desactivar_productos(self, request, queryset):
         updated = queryset.update(is_active=False)
+        invalidate_catalog()  # update() no dispara señales
         self.message_user(request, f'{updated} producto(s) desactivado(s).')
     desactivar_productos.short_description = "❌ Desactivar productos seleccionados"
     
     def marcar_destacados(self, request, queryset):
         updated = queryset.update(featured=True)
+        invalidate_catalog()  # update() no dispara señales
         self.message_user(request, f'{updated} producto(s) marcado(s) como destacados.')
     marcar_destacados.short_description = "⭐ Marcar como destacados"
     
@@ -82,6 +87,11 @@ class ProductAdmin(admin.ModelAdmin):
     # ==========================================
     list_select_related = ['category']  # Evitar N+1 queries
     
+    def get_queryset(self, request):
+        # Sin los agregados de calificaciones: al guardar no se pisan los
+        # que shop/ratings.py actualizó después de abrir el formulario
+        return super().get_queryset(request).defer(*Product.RATING_FIELDS)
+    
     readonly_fields = ['created_at', 'updated_at']
     
     # Mostrar fechas en el detalle
@@ -166,12 +176,18 @@ class ReviewAdmin(admin.ModelAdmin):
     actions = ['aprobar_reviews', 'rechazar_reviews']
     
     def aprobar_reviews(self, request, queryset):
+        product_ids = set(queryset.values_list('product_id', flat=True))
         updated = queryset.update(is_approved=True)
+        rebuild_product_ratings(product_ids)
+        invalidate_products(product_ids)  # update() no dispara señales
         self.message_user(request, f'{updated} review(s) aprobado(s).')
     aprobar_reviews.short_description = "✅ Aprobar reviews"
     
     def rechazar_reviews(self, request, queryset):
+        product_ids = set(queryset.values_list('product_id', flat=True))
         updated = queryset.update(is_approved=False)
+        rebuild_product_ratings(product_ids)
+        invalidate_products(product_ids)  # update() no dispara señales
         self.message_user(request, f'{updated} review(s) rechazado(s).')
     rechazar_reviews.short_description = "❌ Rechazar reviews"
 
@@ -202,4 +218,32 @@ class WishlistItemAdmin(admin.ModelAdmin):
 
 
 # Ocultar ReviewHelpful del admin (tabla técnica)
-# admin.site.register(ReviewHelpful)
\ No newline at end of file
+# admin.site.register(ReviewHelpful)
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject', 'to']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+    
+    actions = ['reintentar_emails']
+    
+    def reintentar_emails(self, request, queryset):
+        from django.utils import timezone
+        updated = queryset.exclude(status=EmailOutbox.STATUS_SENT).update(
+            status=EmailOutbox.STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} email(s) reencolado(s).')
+    reintentar_emails.short_description = "🔁 Reintentar envío"
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['product', 'user', 'quantity', 'expires_at', 'created_at']
+    search_fields = ['user__username', 'product__name']
+    list_select_related = ['product', 'user']
+    readonly_fields = ['created_at']
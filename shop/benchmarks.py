@@ -0,0 +1,305 @@
+"""
+Benchmark de los flujos principales de la tienda (`manage.py bench`).
+
+Cada escenario repite una petición con el cliente de pruebas de Django,
+que recorre el stack completo (middleware, vistas, templates, caché),
+sobre la base de datos configurada; para volúmenes realistas se puede
+poblar antes con `manage.py seed_scale`.
+
+- Los escenarios son reproducibles: los productos, categorías y términos
+  de búsqueda salen de un `random.Random` con semilla fija.
+- Cada escenario corre dentro de una transacción que se revierte al
+  final, así los carritos y órdenes del benchmark no quedan en la base
+  y dos corridas parten del mismo estado.
+- La caché se vacía al empezar cada escenario; las primeras `warmup`
+  iteraciones no se miden.
+
+Las peticiones son secuenciales (un solo cliente): el throughput es
+peticiones por segundo de un worker, útil para comparar commits, no
+como capacidad del servidor. Las peticiones van por HTTPS (`secure=True`)
+para no chocar con `SECURE_SSL_REDIRECT`.
+"""
+
+import platform
+import random
+import subprocess
+import time
+from datetime import date, timedelta
+from typing import Callable, NamedTuple, Optional
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from .instrumentation import RequestMetrics
+from .models import CartItem, Category, Order, Product
+
+BENCH_PREFIX = 'bench-'
+
+# Productos muestreados por escenario (se rotan entre iteraciones)
+SAMPLE_PRODUCTS = 500
+CHECKOUT_ITEMS = 3
+ORDER_STATUSES = ['', 'pending', 'confirmed', 'in_transit', 'delivered', 'cancelled']
+
+
+class Scenario(NamedTuple):
+    """Un flujo a medir."""
+    name: str
+    request: Callable                   # f(ctx, client, i) -> response (medido)
+    user: Optional[str] = None          # None (anónimo), 'customer' o 'staff'
+    setup: Optional[Callable] = None    # f(ctx, client, i) antes de cada petición
+    status: int = 200
+
+
+class BenchContext:
+    """Datos de la base que usan los escenarios, elegidos con la semilla."""
+
+    def __init__(self, rng):
+        self.rng = rng
+
+        product_ids = list(
+            Product.objects.filter(is_active=True, stock__gt=0)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        if not product_ids:
+            raise ValueError('No hay productos activos con stock para el benchmark.')
+        self.product_ids = rng.sample(product_ids, min(SAMPLE_PRODUCTS, len(product_ids)))
+
+        self.category_slugs = list(
+            Category.objects.order_by('pk').values_list('slug', flat=True)
+        ) or ['']
+
+        # Términos de búsqueda: primera palabra de nombres reales
+        names = Product.objects.filter(pk__in=self.product_ids[:100]).values_list('name', flat=True)
+        self.search_terms = sorted({name.split()[0].lower() for name in names if name.split()})
+
+        self.customer = User.objects.create_user(
+            username=f'{BENCH_PREFIX}customer', email='bench-customer@example.com'
+        )
+        self.staff = User.objects.create_user(
+            username=f'{BENCH_PREFIX}staff', email='bench-staff@example.com', is_staff=True
+        )
+
+    def product(self, i):
+        return self.product_ids[i % len(self.product_ids)]
+
+    def category(self, i):
+        return self.category_slugs[i % len(self.category_slugs)]
+
+    def search_term(self, i):
+        return self.search_terms[i % len(self.search_terms)]
+
+
+# ==========================================
+# ESCENARIOS
+# ==========================================
+def _browse(ctx, client, i):
+    data = {'page': i % 5 + 1}
+    if i % 2:
+        data['category'] = ctx.category(i)
+    return client.get(reverse('shop:product_list'), data, secure=True)
+
+
+def _search(ctx, client, i):
+    return client.get(reverse('shop:product_list'), {'q': ctx.search_term(i)}, secure=True)
+
+
+def _product_detail(ctx, client, i):
+    return client.get(reverse('shop:product_detail', args=[ctx.product(i)]), secure=True)
+
+
+def _quick_view(ctx, client, i):
+    return client.get(
+        reverse('shop:product_quick_view', args=[ctx.product(i)]),
+        headers={'x-requested-with': 'XMLHttpRequest'},
+        secure=True,
+    )
+
+
+def _add_to_cart(ctx, client, i):
+    return client.post(
+        reverse('shop:add_to_cart', args=[ctx.product(i)]),
+        {'quantity': 1},
+        headers={'x-requested-with': 'XMLHttpRequest'},
+        secure=True,
+    )
+
+
+def _fill_cart(ctx, client, i):
+    """Carrito con CHECKOUT_ITEMS productos y los pasos 1 y 2 en la sesión."""
+    cart = ctx.customer.cart
+    cart.items.all().delete()
+    CartItem.objects.bulk_create([
+        CartItem(cart=cart, product_id=ctx.product(i * CHECKOUT_ITEMS + offset), quantity=1)
+        for offset in range(CHECKOUT_ITEMS)
+    ])
+
+    session = client.session
+    session['checkout_data'] = {
+        'step1': {
+            'delivery_address': 'Calle 1 #23',
+            'delivery_city': 'Centro',
+            'delivery_province': 'La Habana',
+            'contact_phone': '+5355555555',
+        },
+        'step2': {
+            'delivery_date': (date.today() + timedelta(days=2)).isoformat(),
+            'delivery_time': 'morning',
+            'payment_method': 'cash',
+        },
+    }
+    session.save()
+
+
+def _checkout(ctx, client, i):
+    return client.post(reverse('shop:checkout') + '?step=3', {'notes': ''}, secure=True)
+
+
+def _admin_dashboard(ctx, client, i):
+    return client.get(reverse('shop:admin_dashboard'), secure=True)
+
+
+def _admin_orders(ctx, client, i):
+    data = {}
+    status = ORDER_STATUSES[i % len(ORDER_STATUSES)]
+    if status:
+        data['status'] = status
+    return client.get(reverse('shop:admin_orders'), data, secure=True)
+
+
+SCENARIOS = [
+    Scenario('browse', _browse),
+    Scenario('search', _search),
+    Scenario('product_detail', _product_detail),
+    Scenario('quick_view', _quick_view),
+    Scenario('add_to_cart', _add_to_cart, user='customer'),
+    Scenario('checkout', _checkout, user='customer', setup=_fill_cart, status=302),
+    Scenario('admin_dashboard', _admin_dashboard, user='staff'),
+    Scenario('admin_orders', _admin_orders, user='staff'),
+]
+
+
+# ==========================================
+# EJECUCIÓN
+# ==========================================
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct))
+    return sorted_values[index]
+
+
+def _summarize(samples, errors):
+    latencies = sorted(sample[0] for sample in samples)
+    count = len(samples) or 1
+    total = sum(latencies)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'p50_ms': round(_percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(_percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 2),
+        'mean_ms': round(total / count * 1000, 2),
+        'throughput_rps': round(len(samples) / total, 1) if total else 0.0,
+        'avg_queries': round(sum(sample[1] for sample in samples) / count, 1),
+        'max_queries': max((sample[1] for sample in samples), default=0),
+        'avg_sql_ms': round(sum(sample[2] for sample in samples) / count * 1000, 2),
+    }
+
+
+def run_scenario(scenario, iterations, warmup=5, seed=42, cold_cache=False):
+    """
+    Ejecuta un escenario y devuelve su resumen (ver `_summarize`).
+
+    Todo corre en una transacción que se revierte al terminar.
+    """
+    rng = random.Random(f'{seed}:{scenario.name}')
+    samples = []
+    errors = 0
+
+    cache.clear()
+    with transaction.atomic():
+        ctx = BenchContext(rng)
+        client = Client(raise_request_exception=False)
+        if scenario.user:
+            client.force_login(getattr(ctx, scenario.user))
+
+        for i in range(warmup + iterations):
+            if scenario.setup:
+                scenario.setup(ctx, client, i)
+            if cold_cache:
+                cache.clear()
+
+            metrics = RequestMetrics()
+            with connection.execute_wrapper(metrics):
+                started = time.perf_counter()
+                response = scenario.request(ctx, client, i)
+                elapsed = time.perf_counter() - started
+
+            if i < warmup:
+                continue
+            if response.status_code != scenario.status:
+                errors += 1
+            samples.append((elapsed, len(metrics.queries), metrics.sql_time))
+
+        transaction.set_rollback(True)
+    cache.clear()
+
+    return _summarize(samples, errors)
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run_benchmark(names=None, iterations=50, warmup=5, seed=42, cold_cache=False, log=print):
+    """
+    Ejecuta los escenarios pedidos (todos por defecto).
+
+    Returns:
+        dict: {'meta': {...}, 'scenarios': {nombre: resumen}}, listo para
+        guardarse como JSON y compararse con otra corrida.
+    """
+    scenarios = [s for s in SCENARIOS if names is None or s.name in names]
+
+    meta = {
+        'commit': _git_commit(),
+        'started_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'products': Product.objects.count(),
+        'orders': Order.objects.count(),
+        'iterations': iterations,
+        'warmup': warmup,
+        'seed': seed,
+        'cold_cache': cold_cache,
+    }
+
+    # Igual que el test runner: host 'testserver' permitido y emails en memoria
+    setup_test_environment()
+    try:
+        results = {}
+        for scenario in scenarios:
+            log(f'  {scenario.name}...')
+            results[scenario.name] = run_scenario(
+                scenario, iterations, warmup=warmup, seed=seed, cold_cache=cold_cache
+            )
+    finally:
+        teardown_test_environment()
+
+    return {'meta': meta, 'scenarios': results}
@@ -0,0 +1,251 @@
+"""
+Caché versionada del catálogo.
+
+Los modelos de lectura del catálogo (categorías, destacados, productos
+relacionados, vista rápida...) se guardan bajo claves versionadas:
+
+    catalog:<generación>:<nombre>:<partes>
+    catalog:<generación>:<nombre>:p<versión del producto>:<partes>
+
+Hay tres contadores, para no tirar toda la caché por un cambio puntual:
+
+- Generación global (`invalidate_catalog`): cambios de estructura que
+  afectan a los listados, como categorías, productos creados o borrados,
+  ediciones desde el admin y productos que se agotan.
+- Versión por producto (`invalidate_products`): reviews y cambios que
+  solo afectan al detalle de ese producto (vista rápida, relacionados,
+  página de detalle).
+- Generación de precios (`invalidate_prices`): la usan los resúmenes de
+  carrito (shop/cart_summary.py), que no dependen de nada más.
+
+Al incrementar un contador las claves anteriores quedan huérfanas y
+expiran solas por TTL; no hace falta conocer ni borrar cada clave.
+
+El stock no forma parte de los modelos cacheados: cambia en cada compra.
+Los productos devueltos por `get_featured_products` y
+`get_related_products` llevan el stock leído en la petición (una
+consulta por pk), y la vista rápida hace lo mismo con su JSON. Solo
+cuando un producto se agota (`decrement_stock`) se invalida la generación
+global, porque cambian los listados.
+
+Para evitar estampidas (muchas peticiones reconstruyendo el mismo valor
+a la vez tras una invalidación) `get_or_build` usa un lock single-flight
+con `cache.add`, que es atómico en los backends locmem y de archivos.
+
+Las invalidaciones solo sirven si todos los procesos comparten la caché:
+fuera de DEBUG settings exige un backend compartido (CACHE_BACKEND=file).
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+GENERATION_KEY = 'catalog:generation'
+PRICES_KEY = 'catalog:prices'
+PRODUCT_VERSION_KEY = 'catalog:product:{}:version'
+
+# Tiempo máximo que un proceso mantiene el lock de reconstrucción
+LOCK_TIMEOUT = 10
+
+# Tiempo máximo que se espera a que otro proceso termine de reconstruir
+LOCK_WAIT = 2.0
+LOCK_POLL_INTERVAL = 0.05
+
+_MISSING = object()
+
+
+def _timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60 * 15)
+
+
+def _get_counter(key):
+    """
+    Valor actual de un contador de versión.
+
+    Se inicializa con la hora en milisegundos: si la clave se pierde
+    (reinicio, desalojo por MAX_ENTRIES) el nuevo valor nunca coincide
+    con uno anterior y no se sirven datos viejos.
+    """
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, int(time.time() * 1000), None)
+        value = cache.get(key)
+    return value
+
+
+def _bump_counter(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # La clave no existe: se crea un valor nuevo
+        _get_counter(key)
+
+
+def get_generation():
+    """Generación global del catálogo."""
+    return _get_counter(GENERATION_KEY)
+
+
+def get_product_version(product_id):
+    """Versión de los datos de un producto."""
+    return _get_counter(PRODUCT_VERSION_KEY.format(product_id))
+
+
+def get_price_generation():
+    """Generación de los precios (resúmenes de carrito)."""
+    return _get_counter(PRICES_KEY)
+
+
+def invalidate_catalog():
+    """
+    Invalida todos los modelos de lectura del catálogo.
+
+    Dentro de una transacción, el incremento se difiere al commit para
+    que ninguna petición concurrente vuelva a cachear los datos viejos
+    bajo la generación nueva.
+    """
+    transaction.on_commit(lambda: _bump_counter(GENERATION_KEY))
+
+
+def invalidate_products(product_ids):
+    """Invalida los modelos de lectura de esos productos (al confirmar)."""
+    keys = [PRODUCT_VERSION_KEY.format(product_id) for product_id in set(product_ids)]
+
+    def bump():
+        for key in keys:
+            _bump_counter(key)
+
+    transaction.on_commit(bump)
+
+
+def invalidate_prices():
+    """Invalida los resúmenes de carrito de todos los usuarios (al confirmar)."""
+    transaction.on_commit(lambda: _bump_counter(PRICES_KEY))
+
+
+def catalog_key(name, *parts, product_id=None):
+    """
+    Clave versionada para un modelo de lectura del catálogo.
+
+    Con `product_id` la clave incluye además la versión del producto.
+    """
+    suffix = ':'.join(str(part) for part in parts)
+    if product_id is not None:
+        suffix = f'p{get_product_version(product_id)}:{suffix}'
+    return f'catalog:{get_generation()}:{name}:{suffix}'
+
+
+def get_or_build(name, builder, *parts, timeout=None, product_id=None):
+    """
+    Devuelve el valor cacheado o lo construye con `builder()`.
+
+    Solo un proceso/hilo reconstruye cada clave a la vez; el resto espera
+    hasta LOCK_WAIT segundos a que el valor aparezca y, si no aparece,
+    lo construye sin cachearlo.
+
+    Args:
+        name: Nombre del modelo de lectura ('categories', 'quick_view'...)
+        builder: Callable sin argumentos que consulta la base de datos
+        *parts: Partes adicionales de la clave (ids, filtros...)
+        timeout: TTL en segundos (por defecto CATALOG_CACHE_TIMEOUT)
+        product_id: Producto cuya versión forma parte de la clave
+
+    Returns:
+        El valor cacheado o recién construido
+    """
+    key = catalog_key(name, *parts, product_id=product_id)
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            value = builder()
+            cache.set(key, value, _timeout() if timeout is None else timeout)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    # Otro proceso está reconstruyendo: esperar su resultado
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+    return builder()
+
+
+# ==========================================
+# MODELOS DE LECTURA DEL CATÁLOGO
+# ==========================================
+
+def current_stock(product_ids):
+    """{product_id: stock} leído de la base de datos (una consulta)."""
+    from .models import Product
+    return dict(Product.objects.filter(pk__in=product_ids).order_by().values_list('pk', 'stock'))
+
+
+def _with_current_stock(products):
+    """Los productos cacheados con el stock actual (ver docstring)."""
+    stock = current_stock([p.pk for p in products]) if products else {}
+    for product in products:
+        product.stock = stock.get(product.pk, 0)
+    return products
+
+
+def get_categories():
+    """Todas las categorías (orden por nombre)."""
+    from .models import Category
+    return get_or_build('categories', lambda: list(Category.objects.all()))
+
+
+def get_featured_products(limit=8):
+    """Productos destacados activos con su categoría cargada."""
+    from .models import Product
+
+    def build():
+        return list(
+            Product.objects.filter(
+                is_active=True,
+                featured=True
+            ).select_related('category')[:limit]
+        )
+
+    return _with_current_stock(get_or_build('featured_products', build, limit))
+
+
+def get_related_products(product, limit=4):
+    """
+    Productos comprados junto a `product` (shop/recommendations.py),
+    completados con los más parecidos por contenido (shop/similarity.py)
+    y, si aún faltan, con productos activos de la misma categoría.
+    """
+    from .models import Product
+    from .recommendations import frequently_bought_together
+    from .similarity import similar_products
+
+    def build():
+        related = frequently_bought_together(product, limit)
+        if len(related) < limit:
+            related += similar_products(
+                product,
+                limit - len(related),
+                exclude=[p.pk for p in related]
+            )
+        if len(related) < limit:
+            related += Product.objects.filter(
+                category_id=product.category_id,
+                is_active=True
+            ).exclude(
+                pk__in=[product.pk] + [p.pk for p in related]
+            ).select_related('category')[:limit - len(related)]
+        return related
+
+    return _with_current_stock(
+        get_or_build('related_products', build, limit, product_id=product.pk)
+    )
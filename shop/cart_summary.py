@@ -0,0 +1,90 @@
+"""
+Resumen cacheado del carrito (cantidad de unidades, total y productos).
+
+`base.html` muestra el contador del carrito en todas las páginas. En lugar
+de cargar todos los `CartItem` en cada petición, el resumen se guarda en
+caché por usuario y se calcula con una sola consulta agrupada cuando
+falta:
+
+    cart:<generación de precios>:<user_id>
+
+La clave incluye la generación de precios (shop/cache.py), así que un
+cambio de precio invalida los totales de todos los carritos sin tener
+que buscarlos; las compras y los reviews de otros usuarios no los
+tocan. Las vistas que modifican el carrito llaman a
+`refresh_cart_summary` (o `invalidate_cart_summary` dentro de una
+transacción).
+"""
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .cache import get_price_generation
+from .models import CartItem
+
+# El resumen también se invalida explícitamente; el TTL es solo un respaldo
+CART_SUMMARY_TIMEOUT = 60 * 30
+
+EMPTY_SUMMARY = {'count': 0, 'total': Decimal('0'), 'product_ids': frozenset()}
+
+
+def _key(user_id):
+    return f'cart:{get_price_generation()}:{user_id}'
+
+
+def compute_cart_summary(user_id):
+    """
+    Calcula el resumen del carrito con una consulta agrupada por producto.
+
+    Returns:
+        dict: {'count': unidades, 'total': Decimal, 'product_ids': frozenset}
+    """
+    rows = CartItem.objects.filter(
+        cart__user_id=user_id
+    ).values('product_id').annotate(
+        units=Sum('quantity'),
+        amount=Sum(F('quantity') * F('product__price'))
+    ).order_by()
+
+    count = 0
+    total = Decimal('0')
+    product_ids = set()
+    for row in rows:
+        count += row['units']
+        total += row['amount']
+        product_ids.add(row['product_id'])
+
+    return {'count': count, 'total': total, 'product_ids': frozenset(product_ids)}
+
+
+def get_cart_summary(user):
+    """Resumen del carrito del usuario (desde caché si está disponible)."""
+    if not user.is_authenticated:
+        return EMPTY_SUMMARY
+
+    key = _key(user.pk)
+    summary = cache.get(key)
+    if summary is None:
+        summary = compute_cart_summary(user.pk)
+        cache.set(key, summary, CART_SUMMARY_TIMEOUT)
+    return summary
+
+
+def refresh_cart_summary(user_id):
+    """Recalcula y cachea el resumen tras modificar el carrito."""
+    summary = compute_cart_summary(user_id)
+    cache.set(_key(user_id), summary, CART_SUMMARY_TIMEOUT)
+    return summary
+
+
+def invalidate_cart_summary(user_id):
+    """
+    Descarta el resumen cacheado del usuario.
+
+    Dentro de una transacción se difiere al commit para que una petición
+    concurrente no vuelva a cachear el carrito viejo.
+    """
+    transaction.on_commit(lambda: cache.delete(_key(user_id)))
@@ -0,0 +1,30 @@
+"""
+Context processors de la tienda.
+"""
+
+from django.utils.functional import SimpleLazyObject
+
+from .cart_summary import get_cart_summary
+from .page_cache import CSRF_PLACEHOLDER
+
+
+def cart_summary(request):
+    """
+    Expone `cart_summary` (count, total, product_ids) a los templates.
+
+    Es perezoso: solo consulta la caché si el template lo usa.
+    """
+    return {
+        'cart_summary': SimpleLazyObject(lambda: get_cart_summary(request.user)),
+    }
+
+
+def page_cache_csrf(request):
+    """
+    Reemplaza el token CSRF por un marcador al renderizar para la caché
+    de página (ver shop/page_cache.py); el marcador se sustituye por el
+    token de cada visitante al servir la página.
+    """
+    if getattr(request, '_page_cache_render', False):
+        return {'csrf_token': CSRF_PLACEHOLDER}
+    return {}
@@ -1,18 +1,71 @@
-from django.core.mail import send_mail, EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
 from django.urls import reverse
 
+from .outbox import queue_email
+
+
+# Todos los emails se renderizan aquí y se encolan en EmailOutbox; el envío
+# real lo hace `manage.py process_email_outbox` fuera de la petición.
+# Las funciones devuelven True si el email quedó encolado.
+
+
+def _queue_template_email(subject, template_name, context, to):
+    """Renderizar un template de email y encolarlo (HTML + texto plano)"""
+    html_content = render_to_string(template_name, context)
+    text_content = strip_tags(html_content)
+
+    queue_email(
+        subject=subject,
+        body=text_content,
+        html_body=html_content,
+        to=to,
+    )
+    return True
+
+
+def render_wishlist_digest(user, lines):
+    """
+    Email con todos los avisos de la wishlist de un usuario.
+
+    Args:
+        user: Destinatario
+        lines: Dicts con 'product', 'price_drop', 'back_in_stock',
+            'original_price' y 'savings'
+
+    Returns:
+        dict: Argumentos para `outbox.queue_emails`
+    """
+    context = {
+        'user': user,
+        'lines': lines,
+        'site_name': settings.SITE_NAME,
+        'site_url': settings.SITE_URL.rstrip('/'),
+    }
+    html_content = render_to_string('shop/emails/wishlist_digest.html', context)
+
+    if len(lines) == 1:
+        subject = f'{lines[0]["product"].name}: novedades en tu lista de deseos'
+    else:
+        subject = f'{len(lines)} productos de tu lista de deseos tienen novedades'
+
+    return {
+        'subject': subject,
+        'body': strip_tags(html_content),
+        'html_body': html_content,
+        'to': [user.email],
+    }
+
 
 def send_verification_email(user, request):
     """Enviar email de verificación al usuario"""
     profile = user.profile
     token = profile.generate_verification_token()
-    
+
     # Construir URL de verificación usando SITE_URL de settings
     verification_url = settings.SITE_URL.rstrip('/') + reverse('shop:verify_email', kwargs={'token': token})
-    
+
     # Contexto para el template
     context = {
         'user': user,
@@ -20,34 +73,29 @@ def send_verification_email(user, request):
         'site_name': settings.SITE_NAME,
         'site_url': settings.SITE_URL,
     }
-    
-    # Renderizar email HTML
-    html_content = render_to_string('shop/emails/verification_email.html', context)
-    text_content = strip_tags(html_content)
-    
-    # Crear email
-    subject = f'Verifica tu cuenta en {settings.SITE_NAME}'
-    
-    email = EmailMultiAlternatives(
-        subject=subject,
-        body=text_content,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[user.email]
-    )
-    email.attach_alternative(html_content, "text/html")
-    
+
     try:
-        email.send()
-        return True
+        return _queue_template_email(
+            f'Verifica tu cuenta en {settings.SITE_NAME}',
+            'shop/emails/verification_email.html',
+            context,
+            [user.email],
+        )
     except Exception as e:
-        print(f"Error al enviar email de verificación: {e}")
+        print(f"Error al encolar email de verificación: {e}")
         return False
 
 
 def send_order_confirmation_email(order):
-    """Enviar email de confirmación de orden"""
+    """
+    Enviar email de confirmación de orden.
+
+    Llamar con `transaction.on_commit` desde la transacción que crea la
+    orden: el email solo se renderiza y encola si la orden se confirma,
+    y sin alargar esa transacción.
+    """
     user = order.user
-    
+
     context = {
         'user': user,
         'order': order,
@@ -55,59 +103,32 @@ def send_order_confirmation_email(order):
         'site_name': settings.SITE_NAME,
         'site_url': settings.SITE_URL,
     }
-    
-    # Renderizar email HTML
-    html_content = render_to_string('shop/emails/order_confirmation.html', context)
-    text_content = strip_tags(html_content)
-    
-    subject = f'Confirmación de Orden {order.order_number}'
-    
-    email = EmailMultiAlternatives(
-        subject=subject,
-        body=text_content,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[user.email]
+
+    return _queue_template_email(
+        f'Confirmación de Orden {order.order_number}',
+        'shop/emails/order_confirmation.html',
+        context,
+        [user.email],
     )
-    email.attach_alternative(html_content, "text/html")
-    
-    try:
-        email.send()
-        return True
-    except Exception as e:
-        print(f"Error al enviar email de confirmación: {e}")
-        return False
 
 
 def send_order_status_update_email(order):
     """Enviar email cuando cambia el estado de la orden"""
     user = order.user
-    
+
     context = {
         'user': user,
         'order': order,
         'site_name': settings.SITE_NAME,
         'site_url': settings.SITE_URL,
     }
-    
-    html_content = render_to_string('shop/emails/order_status_update.html', context)
-    text_content = strip_tags(html_content)
-    
-    subject = f'Actualización de tu Orden {order.order_number}'
-    
-    email = EmailMultiAlternatives(
-        subject=subject,
-        body=text_content,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[user.email]
+
+    return _queue_template_email(
+        f'Actualización de tu Orden {order.order_number}',
+        'shop/emails/order_status_update.html',
+        context,
+        [user.email],
     )
-    email.attach_alternative(html_content, "text/html")
-    
-    try:
-        email.send()
-        return True
-    except Exception as e:
-        print(f"Error al enviar email de actualización: {e}")
-        return False
 
 
 def send_welcome_email(user):
@@ -117,31 +138,22 @@ def send_welcome_email(user):
         'site_name': settings.SITE_NAME,
         'site_url': settings.SITE_URL,
     }
-    
-    html_content = render_to_string('shop/emails/welcome_email.html', context)
-    text_content = strip_tags(html_content)
-    
-    subject = f'¡Bienvenido a {settings.SITE_NAME}!'
-    
-    email = EmailMultiAlternatives(
-        subject=subject,
-        body=text_content,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[user.email]
-    )
-    email.attach_alternative(html_content, "text/html")
-    
+
     try:
-        email.send()
-        return True
+        return _queue_template_email(
+            f'¡Bienvenido a {settings.SITE_NAME}!',
+            'shop/emails/welcome_email.html',
+            context,
+            [user.email],
+        )
     except Exception as e:
-        print(f"Error al enviar email de bienvenida: {e}")
+        print(f"Error al encolar email de bienvenida: {e}")
         return False
 
 def send_password_change_email(user, request):
     """Enviar email de notificación de cambio de contraseña"""
     from django.utils import timezone
-    
+
     context = {
         'user': user,
         'timestamp': timezone.now(),
@@ -149,23 +161,14 @@ def send_password_change_email(user, request):
         'site_name': settings.SITE_NAME,
         'site_url': settings.SITE_URL,
     }
-    
-    html_content = render_to_string('shop/emails/password_change_notification.html', context)
-    text_content = strip_tags(html_content)
-    
-    subject = f'Contraseña Cambiada - {settings.SITE_NAME}'
-    
-    email = EmailMultiAlternatives(
-        subject=subject,
-        body=text_content,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[user.email]
-    )
-    email.attach_alternative(html_content, "text/html")
-    
+
     try:
-        email.send()
-        return True
+        return _queue_template_email(
+            f'Contraseña Cambiada - {settings.SITE_NAME}',
+            'shop/emails/password_change_notification.html',
+            context,
+            [user.email],
+        )
     except Exception as e:
-        print(f"Error al enviar email de cambio de contraseña: {e}")
-        return False
\ No newline at end of file
+        print(f"Error al encolar email de cambio de contraseña: {e}")
+        return False
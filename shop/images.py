@@ -0,0 +1,171 @@
+"""
+Derivados de las imágenes de producto (miniaturas JPEG y WebP).
+
+Para cada imagen se generan versiones de ancho fijo en
+`media/products/derived/`, en JPEG y WebP, y sus rutas se guardan en
+`Product.image_variants`:
+
+    {
+        'source': 'products/taladro.png',    # imagen original
+        'width': 1600, 'height': 1200,       # dimensiones originales
+        'jpeg': {'160': 'products/derived/12-ab12cd34-160.jpg', ...},
+        'webp': {'160': 'products/derived/12-ab12cd34-160.webp', ...},
+    }
+
+Los templates usan las etiquetas de `shop/templatetags/product_images.py`
+para emitir `srcset`/`sizes`, así el navegador descarga la variante más
+chica que le sirve en lugar de la imagen original (hasta 5MB).
+
+Decodificar y redimensionar una foto tarda demasiado para hacerlo al
+guardar el producto (en la petición del admin y dentro de su
+transacción): las variantes las genera `manage.py
+generate_product_images` (cron), que solo procesa los productos cuya
+imagen cambió. Mientras tanto los templates usan la imagen original.
+"""
+
+import hashlib
+import logging
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .cache import invalidate_catalog
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+# Anchos generados (px). Las imágenes más chicas no se agrandan.
+IMAGE_WIDTHS = (160, 320, 640, 960)
+
+DERIVED_DIR = 'products/derived'
+
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+
+def _derived_name(product, source_name, width, ext):
+    digest = hashlib.md5(source_name.encode()).hexdigest()[:8]
+    return f'{DERIVED_DIR}/{product.pk}-{digest}-{width}.{ext}'
+
+
+def _save(name, image, fmt, **options):
+    buffer = BytesIO()
+    image.save(buffer, fmt, **options)
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def variant_names(variants):
+    """Rutas de todos los archivos listados en `variants`."""
+    return {
+        name
+        for fmt in ('jpeg', 'webp')
+        for name in (variants or {}).get(fmt, {}).values()
+    }
+
+
+def delete_derivatives(names):
+    """Elimina del disco los archivos derivados indicados."""
+    for name in names:
+        if default_storage.exists(name):
+            default_storage.delete(name)
+
+
+def build_derivatives(product):
+    """
+    Genera las variantes de la imagen actual del producto.
+
+    Returns:
+        dict: Valor para `Product.image_variants` ({} si no hay imagen)
+
+    Raises:
+        OSError: Si la imagen no se puede leer
+    """
+    if not product.image:
+        return {}
+
+    source_name = product.image.name
+    with default_storage.open(source_name, 'rb') as source:
+        original = Image.open(source)
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    has_alpha = original.mode in ('RGBA', 'LA') or (
+        original.mode == 'P' and 'transparency' in original.info
+    )
+    # WebP conserva la transparencia; JPEG va sobre fondo blanco
+    webp_base = original.convert('RGBA' if has_alpha else 'RGB')
+    if has_alpha:
+        jpeg_base = Image.new('RGB', webp_base.size, (255, 255, 255))
+        jpeg_base.paste(webp_base, mask=webp_base.getchannel('A'))
+    else:
+        jpeg_base = webp_base
+
+    variants = {
+        'source': source_name,
+        'width': original.width,
+        'height': original.height,
+        'jpeg': {},
+        'webp': {},
+    }
+
+    widths = [w for w in IMAGE_WIDTHS if w < original.width]
+    if original.width <= IMAGE_WIDTHS[-1]:
+        # Imagen chica: el tamaño original es la variante más grande
+        widths.append(original.width)
+
+    for width in widths:
+        height = max(1, round(original.height * width / original.width))
+        size = (width, height)
+
+        jpeg = jpeg_base if jpeg_base.width == width else jpeg_base.resize(size, Image.LANCZOS)
+        variants['jpeg'][str(width)] = _save(
+            _derived_name(product, source_name, width, 'jpg'),
+            jpeg, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True
+        )
+
+        webp = webp_base if webp_base.width == width else webp_base.resize(size, Image.LANCZOS)
+        variants['webp'][str(width)] = _save(
+            _derived_name(product, source_name, width, 'webp'),
+            webp, 'WEBP', quality=WEBP_QUALITY, method=4
+        )
+
+    return variants
+
+
+def update_product_images(product, force=False):
+    """
+    Regenera las variantes si la imagen cambió y las guarda en el producto.
+
+    Usa `update()` (no dispara post_save) e invalida la caché del catálogo,
+    que guarda productos con sus variantes.
+
+    Returns:
+        bool: True si se actualizaron las variantes
+    """
+    current = product.image_variants or {}
+    source_name = product.image.name if product.image else None
+
+    if not force and current.get('source') == source_name:
+        return False
+    if not source_name and not current:
+        return False
+
+    try:
+        variants = build_derivatives(product)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not build image variants for product {product.pk}: {e}")
+        # Se registra la fuente para no reintentar en cada guardado;
+        # sin variantes los templates usan la imagen original
+        variants = {'source': source_name}
+
+    # Borrar las variantes de la imagen anterior
+    delete_derivatives(variant_names(current) - variant_names(variants))
+
+    Product.objects.filter(pk=product.pk).update(image_variants=variants)
+    product.image_variants = variants
+    invalidate_catalog()
+    return True
@@ -0,0 +1,225 @@
+"""
+Instrumentación por petición: consultas SQL, tiempos y latencia.
+
+`RequestMetricsMiddleware` (shop/middleware.py) abre un `RequestMetrics`
+por petición y registra, sin depender de DEBUG:
+
+- cantidad de consultas y tiempo total de SQL (`execute_wrapper`);
+- huellas de consultas repetidas: la misma SQL con distintos parámetros
+  varias veces en una petición suele ser un N+1;
+- tiempo de renderizado de templates;
+- latencia total.
+
+Los valores se envían en el header `Server-Timing` (visible en las
+herramientas del navegador; solo con DEBUG o a usuarios staff), se
+acumulan en un histograma en memoria por nombre de URL (`get_stats()`,
+ver `admin_request_metrics`) y las peticiones que superan el
+presupuesto (`SLOW_REQUEST_MS` / `SLOW_REQUEST_QUERIES`) se registran
+en el log con su SQL.
+
+El histograma es por proceso: con varios workers cada uno tiene el suyo.
+"""
+
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.template.backends.django import Template as DjangoTemplate
+
+_current = ContextVar('request_metrics', default=None)
+
+# Límites (ms) de los buckets del histograma de latencia
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_IN_LIST_RE = re.compile(r'IN \((?:%s,\s*)+%s\)')
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_SPACES_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """
+    Normaliza una SQL para agrupar consultas equivalentes.
+
+    Las listas `IN (%s, %s, ...)` de cualquier largo y los literales
+    quedan iguales, así `WHERE id = 1` y `WHERE id = 2` cuentan como la
+    misma consulta.
+    """
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _LITERAL_RE.sub('?', sql)
+    return _SPACES_RE.sub(' ', sql).strip()
+
+
+class RequestMetrics:
+    """Métricas de una petición en curso."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []           # (sql, duración en segundos)
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self._template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Wrapper de `connection.execute_wrapper`."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.sql_time += duration
+            self.queries.append((sql, duration))
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def duplicates(self):
+        """Huellas ejecutadas más de una vez: {huella: veces}."""
+        counts = Counter(fingerprint(sql) for sql, _ in self.queries)
+        return {sql: count for sql, count in counts.items() if count > 1}
+
+    def server_timing(self, total):
+        """Valor del header `Server-Timing` (duraciones en ms)."""
+        return ', '.join([
+            f'db;dur={self.sql_time * 1000:.1f};desc="{len(self.queries)} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+def current_metrics():
+    """Métricas de la petición en curso (o None fuera de una petición)."""
+    return _current.get()
+
+
+def activate(metrics):
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+# ==========================================
+# TIEMPO DE TEMPLATES
+# ==========================================
+_template_patch_lock = threading.Lock()
+_template_patched = False
+
+
+def install_template_timer():
+    """
+    Mide `Template.render` del backend de Django.
+
+    Se envuelve una sola vez por proceso; solo mide si hay una petición
+    instrumentada. Los renders anidados (render_to_string dentro de un
+    template) no se cuentan dos veces.
+    """
+    global _template_patched
+
+    with _template_patch_lock:
+        if _template_patched:
+            return
+        original_render = DjangoTemplate.render
+
+        def timed_render(self, context=None, request=None):
+            metrics = _current.get()
+            if metrics is None:
+                return original_render(self, context, request)
+
+            metrics._template_depth += 1
+            started = time.perf_counter()
+            try:
+                return original_render(self, context, request)
+            finally:
+                metrics._template_depth -= 1
+                if metrics._template_depth == 0:
+                    metrics.template_time += time.perf_counter() - started
+
+        DjangoTemplate.render = timed_render
+        _template_patched = True
+
+
+# ==========================================
+# HISTOGRAMA EN MEMORIA POR URL
+# ==========================================
+class _RouteStats:
+    def __init__(self, window):
+        self.count = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.recent = deque(maxlen=window)   # (latencia ms, consultas, sql ms)
+        self.max_queries = 0
+
+    def add(self, latency_ms, queries, sql_ms):
+        self.count += 1
+        self.buckets[bisect_left(LATENCY_BUCKETS, latency_ms)] += 1
+        self.recent.append((latency_ms, queries, sql_ms))
+        self.max_queries = max(self.max_queries, queries)
+
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def _window():
+    return getattr(settings, 'REQUEST_METRICS_WINDOW', 500)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct))
+    return sorted_values[index]
+
+
+def record(route, latency, metrics):
+    """Agrega una petición terminada al histograma de su URL."""
+    with _stats_lock:
+        stats = _stats.get(route)
+        if stats is None:
+            stats = _stats[route] = _RouteStats(_window())
+        stats.add(latency * 1000, len(metrics.queries), metrics.sql_time * 1000)
+
+
+def get_stats():
+    """
+    Resumen del histograma por nombre de URL.
+
+    Returns:
+        dict: {url_name: {'count', 'p50_ms', 'p95_ms', 'p99_ms',
+        'avg_queries', 'max_queries', 'avg_sql_ms', 'buckets'}}. Los
+        percentiles y promedios son sobre las últimas
+        REQUEST_METRICS_WINDOW peticiones; `buckets` es acumulado.
+    """
+    with _stats_lock:
+        snapshot = {
+            route: (stats.count, list(stats.buckets), list(stats.recent), stats.max_queries)
+            for route, stats in _stats.items()
+        }
+
+    result = {}
+    for route, (count, buckets, recent, max_queries) in snapshot.items():
+        latencies = sorted(sample[0] for sample in recent)
+        samples = len(recent) or 1
+        labels = [f'<={limit}ms' for limit in LATENCY_BUCKETS] + [f'>{LATENCY_BUCKETS[-1]}ms']
+        result[route] = {
+            'count': count,
+            'p50_ms': round(_percentile(latencies, 0.50), 1),
+            'p95_ms': round(_percentile(latencies, 0.95), 1),
+            'p99_ms': round(_percentile(latencies, 0.99), 1),
+            'avg_queries': round(sum(sample[1] for sample in recent) / samples, 1),
+            'max_queries': max_queries,
+            'avg_sql_ms': round(sum(sample[2] for sample in recent) / samples, 1),
+            'buckets': dict(zip(labels, buckets)),
+        }
+    return result
+
+
+def reset_stats():
+    """Vacía el histograma (tests / después de un deploy)."""
+    with _stats_lock:
+        _stats.clear()
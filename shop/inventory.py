@@ -0,0 +1,302 @@
+"""
+Operaciones de inventario.
+
+`decrement_stock` descuenta el stock de varios productos con UPDATE
+condicionales (`WHERE stock >= cantidad`). La verificación y el descuento
+ocurren en la misma sentencia, así que no hace falta bloquear filas con
+`select_for_update` (que SQLite ignora) ni leer el stock antes: si dos
+checkouts compiten por la última unidad, el UPDATE del segundo no afecta
+ninguna fila y se detecta por el conteo de filas afectadas.
+
+Debe llamarse dentro de `transaction.atomic()`: si alguna línea falla se
+lanza `InsufficientStock` y la transacción revierte los descuentos ya
+aplicados.
+
+Reservas (`StockReservation`): al entrar al checkout `reserve_stock`
+aparta las unidades del carrito por STOCK_RESERVATION_MINUTES, así el
+cliente sabe desde el paso 1 si puede comprar y no pierde el producto
+mientras completa los datos. Al confirmar, `convert_reservations` solo
+descuenta el stock: la verificación contra las reservas de otros ya se
+hizo al reservar, y se repite solo para las líneas sin reserva vigente.
+El stock disponible es `stock` menos las reservas vigentes de los demás
+(`available_stock`); las vencidas no cuentan aunque sigan en la tabla.
+
+`ensure_reservation` es lo que usa cada página del checkout: solo abre la
+transacción de escritura de `reserve_stock` si no hay reserva, si el
+carrito cambió o si a la reserva le quedan menos de
+STOCK_RESERVATION_REFRESH_MINUTES; si no, basta una lectura.
+
+El carrito y el detalle del producto muestran y validan contra
+`available_stock`. Las vistas que achican el carrito liberan al momento
+lo que sobra de la reserva (`trim_reservation`, `release_reservations`)
+en lugar de bloquear a otros compradores hasta el vencimiento; si el
+carrito crece, la reserva se amplía al volver al checkout.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .cache import invalidate_catalog
+from .models import Product, StockReservation
+
+
+def _group(lines):
+    """{product_id: cantidad total} a partir de (product_id, cantidad)."""
+    quantities = {}
+    for product_id, quantity in lines:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+class InsufficientStock(ValueError):
+    """
+    Una o más líneas no tienen stock suficiente.
+
+    Attributes:
+        shortages: Lista de (producto, cantidad pedida) que fallaron;
+            `producto.stock` es el stock disponible al momento del fallo
+    """
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        detail = ', '.join(
+            f"{product.name} (disponible: {product.stock})"
+            for product, _ in shortages
+        )
+        super().__init__(f"Stock insuficiente para: {detail}")
+
+
+def decrement_stock(lines):
+    """
+    Descuenta stock para todas las líneas o para ninguna.
+
+    Args:
+        lines: Iterable de (product_id, cantidad)
+
+    Raises:
+        InsufficientStock: Si alguna línea perdió la carrera por el stock
+    """
+    if not transaction.get_connection().in_atomic_block:
+        raise RuntimeError('decrement_stock debe ejecutarse dentro de transaction.atomic()')
+
+    # Agrupar por producto y ordenar por id: orden de bloqueo estable
+    # entre transacciones concurrentes en motores con bloqueo por fila
+    quantities = _group(lines)
+
+    failed = []
+    for product_id in sorted(quantities):
+        quantity = quantities[product_id]
+        updated = Product.objects.filter(
+            pk=product_id,
+            stock__gte=quantity
+        ).update(stock=F('stock') - quantity)
+        if not updated:
+            failed.append(product_id)
+
+    if failed:
+        products = Product.objects.in_bulk(failed)
+        raise InsufficientStock([
+            (products[product_id], quantities[product_id])
+            for product_id in failed
+            if product_id in products
+        ])
+
+    # El stock no está en la caché del catálogo (ver shop/cache.py): solo
+    # un producto agotado cambia los listados
+    if Product.objects.filter(pk__in=quantities, stock=0).exists():
+        invalidate_catalog()
+
+
+# ==========================================
+# RESERVAS DE STOCK
+# ==========================================
+def _held_by_others(product_ids, user, now):
+    """{product_id: unidades en reservas vigentes de otros usuarios}"""
+    return dict(
+        StockReservation.objects.filter(product_id__in=product_ids, expires_at__gt=now)
+        .exclude(user=user)
+        .values('product_id')
+        .annotate(units=Sum('quantity'))
+        .values_list('product_id', 'units')
+    )
+
+
+def available_stock(product_ids, user=None, stock=None):
+    """
+    Stock que `user` puede comprar: stock menos las reservas vigentes de
+    los demás usuarios.
+
+    Args:
+        product_ids: Ids de los productos
+        user: Comprador (None: cuentan todas las reservas)
+        stock: {product_id: stock} ya leído por la vista (evita releerlo)
+
+    Returns:
+        dict: {product_id: unidades disponibles}
+    """
+    product_ids = list(product_ids)
+    if stock is None:
+        stock = dict(Product.objects.filter(pk__in=product_ids).values_list('pk', 'stock'))
+    held = _held_by_others(product_ids, user, timezone.now())
+    return {
+        product_id: max(0, units - held.get(product_id, 0))
+        for product_id, units in stock.items()
+    }
+
+
+def _check_available(quantities, user, now):
+    """
+    Bloquea los productos y verifica que alcance el stock disponible.
+
+    `select_for_update` serializa a los que reservan el mismo producto en
+    motores con bloqueo por fila; en SQLite las transacciones IMMEDIATE ya
+    toman el bloqueo de escritura al empezar.
+
+    Raises:
+        InsufficientStock: Si alguna línea no alcanza
+    """
+    products = list(
+        Product.objects.select_for_update()
+        .filter(pk__in=quantities)
+        .only('name', 'stock')
+        .order_by('pk')
+    )
+    held = _held_by_others(quantities, user, now)
+
+    shortages = []
+    for product in products:
+        available = product.stock - held.get(product.pk, 0)
+        if available < quantities[product.pk]:
+            # Mostrar lo que realmente puede comprar
+            product.stock = max(0, available)
+            shortages.append((product, quantities[product.pk]))
+    if shortages:
+        raise InsufficientStock(shortages)
+
+
+def reserve_stock(user, lines, minutes=None):
+    """
+    Aparta stock para todas las líneas o para ninguna.
+
+    Reemplaza las reservas anteriores del usuario (el carrito pudo
+    cambiar) y renueva el vencimiento.
+
+    Args:
+        user: Usuario que hace el checkout
+        lines: Iterable de (product_id, cantidad)
+        minutes: Duración de la reserva (default: STOCK_RESERVATION_MINUTES)
+
+    Returns:
+        datetime: Vencimiento de las reservas
+
+    Raises:
+        InsufficientStock: Si alguna línea no alcanza; no se reserva nada
+    """
+    quantities = _group(lines)
+    now = timezone.now()
+    expires_at = now + timedelta(minutes=minutes or settings.STOCK_RESERVATION_MINUTES)
+
+    with transaction.atomic():
+        _check_available(quantities, user, now)
+        StockReservation.objects.filter(user=user).delete()
+        StockReservation.objects.bulk_create([
+            StockReservation(user=user, product_id=product_id, quantity=quantity, expires_at=expires_at)
+            for product_id, quantity in quantities.items()
+        ])
+    return expires_at
+
+
+def ensure_reservation(user, lines):
+    """
+    Reserva el carrito si hace falta (ver docstring del módulo).
+
+    Args:
+        user: Usuario que hace el checkout
+        lines: Iterable de (product_id, cantidad)
+
+    Returns:
+        datetime: Vencimiento de las reservas
+
+    Raises:
+        InsufficientStock: Si hubo que reservar y alguna línea no alcanza
+    """
+    quantities = _group(lines)
+    refresh_before = timezone.now() + timedelta(minutes=settings.STOCK_RESERVATION_REFRESH_MINUTES)
+
+    reservations = list(
+        StockReservation.objects.filter(user=user).values_list('product_id', 'quantity', 'expires_at')
+    )
+    if reservations:
+        reserved = {product_id: quantity for product_id, quantity, _ in reservations}
+        expires_at = min(expires_at for _, _, expires_at in reservations)
+        if reserved == quantities and expires_at > refresh_before:
+            return expires_at
+
+    return reserve_stock(user, quantities.items())
+
+
+def convert_reservations(user, lines):
+    """
+    Convierte las reservas del usuario en descuento de stock (confirmación
+    del checkout) y las borra.
+
+    Las líneas cubiertas por una reserva vigente no vuelven a consultar
+    las reservas de otros; las demás (reserva vencida o carrito cambiado)
+    se verifican como en `reserve_stock`. Debe llamarse dentro de
+    `transaction.atomic()`.
+
+    Raises:
+        InsufficientStock: Si alguna línea no alcanza
+    """
+    quantities = _group(lines)
+    now = timezone.now()
+
+    reserved = dict(
+        StockReservation.objects.filter(user=user, expires_at__gt=now)
+        .values_list('product_id', 'quantity')
+    )
+    uncovered = {
+        product_id: quantity
+        for product_id, quantity in quantities.items()
+        if reserved.get(product_id, 0) < quantity
+    }
+    if uncovered:
+        _check_available(uncovered, user, now)
+
+    decrement_stock(quantities.items())
+    if reserved:
+        release_reservations(user)
+
+
+def release_reservations(user):
+    """Libera las reservas del usuario."""
+    StockReservation.objects.filter(user=user).delete()
+
+
+def trim_reservation(user, product_id, quantity):
+    """
+    Ajusta la reserva de un producto a la nueva cantidad del carrito.
+
+    Solo achica (o borra, con cantidad 0): ampliarla requiere verificar
+    el stock, y eso lo hace `ensure_reservation` en el checkout.
+    """
+    reservations = StockReservation.objects.filter(user=user, product_id=product_id)
+    if quantity <= 0:
+        reservations.delete()
+    else:
+        reservations.filter(quantity__gt=quantity).update(quantity=quantity)
+
+
+def expire_reservations():
+    """
+    Borra en lote las reservas vencidas.
+
+    Returns:
+        int: Reservas borradas
+    """
+    deleted, _ = StockReservation.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
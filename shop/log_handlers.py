@@ -0,0 +1,218 @@
+"""
+Logging asíncrono, en JSON y con muestreo.
+
+Con `RotatingFileHandler` conectado directo a los loggers cada llamada
+formatea, escribe y (al rotar) renombra archivos dentro del worker que
+atiende la petición. `QueueListenerHandler` solo pone el registro en una
+cola en memoria; un hilo `QueueListener` lo formatea y lo escribe con los
+handlers de siempre (archivo, errores, consola).
+
+- `JsonFormatter`: una línea JSON por registro, con los campos `extra`.
+- `SamplingFilter`: deja pasar 1 de cada N registros de los loggers
+  ruidosos (por debajo de WARNING; los warnings y errores pasan siempre).
+- La cola está acotada: si el hilo de escritura no da abasto, se
+  descartan registros en lugar de frenar las peticiones (`dropped`).
+- Al salir del proceso (`atexit`) se vacía la cola antes de cerrar.
+
+Se configura desde `LOGGING` en settings; los handlers de destino se
+referencian con `cfg://handlers.<nombre>` y deben tener un nombre que
+ordene antes que el de la cola (dictConfig los crea en orden alfabético).
+"""
+
+import atexit
+import copy
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Atributos propios de LogRecord: el resto son campos `extra`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+_listeners_lock = threading.Lock()
+_handlers = []
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatea cada registro como un objeto JSON en una sola línea."""
+
+    def format(self, record):
+        payload = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exc'] = record.exc_text
+        if record.stack_info:
+            payload['stack'] = self.formatStack(record.stack_info)
+
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in payload:
+                payload[key] = value
+
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Muestreo por logger.
+
+    Args:
+        rates: {nombre de logger: fracción a conservar}. Aplica también a
+            los loggers hijos ('django' cubre 'django.server').
+        max_level: nivel a partir del cual no se muestrea.
+
+    Los registros que pasan llevan `sample_rate` para poder reescalar las
+    cuentas al analizar los logs.
+    """
+
+    def __init__(self, rates=None, max_level=logging.WARNING):
+        super().__init__()
+        self.every = {
+            name: max(1, round(1 / rate))
+            for name, rate in (rates or {}).items()
+            if rate > 0
+        }
+        self.dropped_loggers = {name for name, rate in (rates or {}).items() if rate <= 0}
+        self.max_level = max_level
+        self._counters = {}
+        self._resolved = {}
+
+    def _rule(self, name):
+        """Regla más específica para el logger: N, 0 (descartar) o None."""
+        try:
+            return self._resolved[name]
+        except KeyError:
+            pass
+
+        rule = None
+        candidate = name
+        while candidate:
+            if candidate in self.dropped_loggers:
+                rule = 0
+                break
+            if candidate in self.every:
+                rule = self.every[candidate]
+                break
+            candidate = candidate.rpartition('.')[0]
+
+        self._resolved[name] = rule
+        return rule
+
+    def filter(self, record):
+        if record.levelno >= self.max_level:
+            return True
+
+        every = self._rule(record.name)
+        if every is None or every == 1:
+            return True
+        if every == 0:
+            return False
+
+        counter = self._counters.get(record.name)
+        if counter is None:
+            counter = self._counters.setdefault(record.name, itertools.count())
+        if next(counter) % every:
+            return False
+        record.sample_rate = 1 / every
+        return True
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Encola los registros; un hilo los entrega a `handlers`.
+
+    Args:
+        handlers: handlers de destino (`cfg://handlers.<nombre>`).
+        queue_size: registros en espera antes de empezar a descartar.
+        respect_handler_level: cada destino aplica su propio nivel.
+    """
+
+    def __init__(self, handlers, queue_size=10000, respect_handler_level=True):
+        # dictConfig pasa una ConvertingList: indexarla resuelve cfg://
+        targets = [handlers[i] for i in range(len(handlers))]
+        for target in targets:
+            if not isinstance(target, logging.Handler):
+                raise ValueError(
+                    f'Handler de destino no configurado: {target!r}. '
+                    'Su nombre debe ordenar antes que el de la cola.'
+                )
+
+        super().__init__(queue.Queue(queue_size))
+        self.targets = targets
+        self.queue_size = queue_size
+        self.respect_handler_level = respect_handler_level
+        self.dropped = 0
+        self.listener = None
+        self._pid = None
+        self._start()
+
+        with _listeners_lock:
+            _handlers.append(self)
+
+    def _start(self):
+        self._pid = os.getpid()
+        self.listener = QueueListener(
+            self.queue, *self.targets, respect_handler_level=self.respect_handler_level
+        )
+        self.listener.start()
+
+    def prepare(self, record):
+        """
+        Copia el registro con el mensaje ya armado.
+
+        Se resuelve `msg % args` aquí porque los args pueden cambiar
+        después de la llamada; el formato final (JSON o texto) lo hace el
+        hilo de escritura. Las trazas se convierten a texto para no
+        retener los frames de la excepción en la cola.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            # Proceso hijo (fork después de configurar logging): el hilo
+            # del padre no existe aquí
+            self.queue = queue.Queue(self.queue_size)
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Vacía la cola y detiene el hilo de escritura."""
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+        self.listener = None
+
+    def close(self):
+        self.stop()
+        super().close()
+
+
+@atexit.register
+def stop_listeners():
+    """Vacía las colas pendientes al terminar el proceso."""
+    with _listeners_lock:
+        handlers = list(_handlers)
+        _handlers.clear()
+    for handler in handlers:
+        handler.stop()
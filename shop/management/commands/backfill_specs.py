@@ -0,0 +1,39 @@
+"""
+Recalcula las especificaciones numéricas de todos los productos (ver
+shop/specs.py). Hace falta después de cargas con `bulk_create` o
+`update()`, que no pasan por `Product.save`.
+
+Uso:
+    python manage.py backfill_specs
+    python manage.py backfill_specs --batch-size 5000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.cache import invalidate_catalog
+from shop.specs import backfill_spec_columns
+
+
+class Command(BaseCommand):
+    help = 'Recalcula potencia (W), voltaje (V) y dimensiones (mm) desde los campos de texto'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Productos leídos por lote (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        stats = backfill_spec_columns(batch_size=options['batch_size'], log=self.stdout.write)
+        if stats['updated']:
+            invalidate_catalog()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Especificaciones recalculadas en {time.monotonic() - started:.1f}s: "
+            f"{stats['products']:,} productos, {stats['updated']:,} actualizados."
+        ))
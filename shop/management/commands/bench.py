@@ -0,0 +1,112 @@
+"""
+Benchmark de los flujos principales (ver shop/benchmarks.py).
+
+Uso:
+    python manage.py bench
+    python manage.py bench --scenario browse --scenario checkout --iterations 200
+    python manage.py bench --compare bench_results/bench-20260101-120000-abc1234.json
+
+Los resultados se guardan como JSON en bench_results/ (o en --output)
+para comparar corridas entre commits.
+"""
+
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from shop.benchmarks import SCENARIOS, run_benchmark
+
+# Métricas que se comparan con --compare (mayor es peor salvo throughput)
+COMPARED = ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'avg_queries')
+
+
+class Command(BaseCommand):
+    help = 'Mide latencia (p50/p95/p99), throughput y consultas por petición de los flujos principales'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=[scenario.name for scenario in SCENARIOS],
+            help='Escenario a ejecutar (repetible; default: todos)'
+        )
+        parser.add_argument('--iterations', type=int, default=50, help='Peticiones medidas por escenario (default: 50)')
+        parser.add_argument('--warmup', type=int, default=5, help='Peticiones sin medir al inicio (default: 5)')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla de los escenarios (default: 42)')
+        parser.add_argument(
+            '--cold-cache',
+            action='store_true',
+            help='Vaciar la caché antes de cada petición (peor caso)'
+        )
+        parser.add_argument('--output', help='Archivo JSON de resultados (default: bench_results/bench-<fecha>-<commit>.json)')
+        parser.add_argument('--compare', help='JSON de una corrida anterior para mostrar la diferencia')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations debe ser al menos 1.')
+
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = json.loads(Path(options['compare']).read_text())['scenarios']
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"No se pudo leer {options['compare']}: {e}")
+
+        self.stdout.write('Ejecutando escenarios...')
+        try:
+            result = run_benchmark(
+                names=options['scenario'],
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                seed=options['seed'],
+                cold_cache=options['cold_cache'],
+                log=self.stdout.write,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.print_table(result['scenarios'], baseline)
+
+        output = Path(options['output'] or self.default_output(result['meta']))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, indent=2) + '\n')
+        self.stdout.write(self.style.SUCCESS(f'Resultados guardados en {output}'))
+
+    def default_output(self, meta):
+        stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+        suffix = f"-{meta['commit']}" if meta['commit'] else ''
+        return Path(settings.BASE_DIR) / 'bench_results' / f'bench-{stamp}{suffix}.json'
+
+    def print_table(self, scenarios, baseline=None):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n{'escenario':<16} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+            f"{'req/s':>8} {'queries':>8} {'errores':>8}"
+        ))
+        for name, stats in scenarios.items():
+            line = (
+                f"{name:<16} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} "
+                f"{stats['throughput_rps']:>8.1f} {stats['avg_queries']:>8.1f} {stats['errors']:>8}"
+            )
+            if stats['errors']:
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+
+            previous = (baseline or {}).get(name)
+            if previous:
+                self.stdout.write('  vs. anterior: ' + ', '.join(
+                    self.format_delta(metric, previous.get(metric), stats[metric])
+                    for metric in COMPARED
+                ))
+
+    def format_delta(self, metric, before, after):
+        if not before:
+            return f'{metric} n/d'
+        change = (after - before) / before * 100
+        worse = change < 0 if metric == 'throughput_rps' else change > 0
+        text = f'{metric} {change:+.0f}%'
+        if abs(change) < 5:
+            return text
+        return self.style.ERROR(text) if worse else self.style.SUCCESS(text)
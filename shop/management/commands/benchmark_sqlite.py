@@ -0,0 +1,185 @@
+"""
+Benchmark de SQLite con escritores en paralelo: configuración por defecto
+contra el perfil de producción (ver shop/sqlite.py).
+
+Cada escritor simula un checkout: descuenta stock con un UPDATE
+condicionado e inserta una orden, en una transacción. Los lectores
+consultan el stock mientras tanto. Se usa una base temporal, nunca la
+del proyecto.
+
+Uso:
+    python manage.py benchmark_sqlite
+    python manage.py benchmark_sqlite --writers 16 --readers 4 --duration 10
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from shop.sqlite import apply_pragmas
+
+PRODUCTS = 200
+
+
+def _setup_database(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE product (id INTEGER PRIMARY KEY, stock INTEGER NOT NULL);
+        CREATE TABLE orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX orders_product ON orders (product_id);
+        """
+    )
+    conn.executemany(
+        'INSERT INTO product (id, stock) VALUES (?, ?)',
+        [(i, 10 ** 9) for i in range(1, PRODUCTS + 1)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def _connect(path, profile):
+    # isolation_level=None: las transacciones se abren a mano, como Django
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    if profile['pragmas']:
+        apply_pragmas(conn, profile['pragmas'])
+    return conn
+
+
+def _writer(path, profile, stop, stats, seed):
+    conn = _connect(path, profile)
+    product_id = seed % PRODUCTS + 1
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            conn.execute(profile['begin'])
+            # Lectura y luego escritura: con BEGIN DEFERRED el paso de
+            # lectura a escritura falla en el acto si otro escritor ganó
+            conn.execute('SELECT stock FROM product WHERE id = ?', (product_id,)).fetchone()
+            conn.execute(
+                'UPDATE product SET stock = stock - 1 WHERE id = ? AND stock >= 1',
+                (product_id,)
+            )
+            conn.execute(
+                'INSERT INTO orders (product_id, quantity, created_at) VALUES (?, 1, ?)',
+                (product_id, time.time())
+            )
+            conn.execute('COMMIT')
+        except sqlite3.OperationalError:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            stats['errors'] += 1
+        else:
+            stats['latencies'].append(time.perf_counter() - started)
+        product_id = product_id % PRODUCTS + 1
+    conn.close()
+
+
+def _reader(path, profile, stop, stats):
+    conn = _connect(path, profile)
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            conn.execute('SELECT SUM(stock) FROM product').fetchone()
+            conn.execute('SELECT COUNT(*) FROM orders').fetchone()
+        except sqlite3.OperationalError:
+            stats['errors'] += 1
+        else:
+            stats['latencies'].append(time.perf_counter() - started)
+    conn.close()
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+class Command(BaseCommand):
+    help = 'Compara el rendimiento de SQLite con escritores en paralelo, con y sin los PRAGMAs de producción'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help='Escritores en paralelo (default: 8)')
+        parser.add_argument('--readers', type=int, default=2, help='Lectores en paralelo (default: 2)')
+        parser.add_argument('--duration', type=float, default=5.0, help='Segundos por perfil (default: 5)')
+
+    def run_profile(self, profile, options):
+        workdir = tempfile.mkdtemp(prefix='sqlite-bench-')
+        path = os.path.join(workdir, 'bench.sqlite3')
+        try:
+            _setup_database(path)
+            stop = threading.Event()
+            writer_stats = [{'errors': 0, 'latencies': []} for _ in range(options['writers'])]
+            reader_stats = [{'errors': 0, 'latencies': []} for _ in range(options['readers'])]
+
+            threads = [
+                threading.Thread(target=_writer, args=(path, profile, stop, stats, i))
+                for i, stats in enumerate(writer_stats)
+            ] + [
+                threading.Thread(target=_reader, args=(path, profile, stop, stats))
+                for stats in reader_stats
+            ]
+            for thread in threads:
+                thread.start()
+            time.sleep(options['duration'])
+            stop.set()
+            for thread in threads:
+                thread.join()
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        writes = [lat for stats in writer_stats for lat in stats['latencies']]
+        reads = [lat for stats in reader_stats for lat in stats['latencies']]
+        return {
+            'commits': len(writes),
+            'write_errors': sum(stats['errors'] for stats in writer_stats),
+            'write_p95': _percentile(writes, 0.95),
+            'reads': len(reads),
+            'read_errors': sum(stats['errors'] for stats in reader_stats),
+            'read_p95': _percentile(reads, 0.95),
+        }
+
+    def handle(self, *args, **options):
+        profiles = [
+            ('por defecto', {
+                # Valores de sqlite3/Django sin ajustes: journal DELETE,
+                # synchronous FULL, transacciones diferidas
+                'pragmas': {},
+                'begin': 'BEGIN',
+            }),
+            ('producción', {
+                'pragmas': settings.SQLITE_PRAGMAS,
+                'begin': 'BEGIN IMMEDIATE',
+            }),
+        ]
+
+        duration = options['duration']
+        self.stdout.write(
+            f"Escritores: {options['writers']}, lectores: {options['readers']}, "
+            f"{duration:.0f}s por perfil\n"
+        )
+        for name, profile in profiles:
+            result = self.run_profile(profile, options)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'Perfil {name}'))
+            self.stdout.write(
+                f"  Checkouts: {result['commits'] / duration:,.0f}/s "
+                f"(p95 {result['write_p95'] * 1000:.1f} ms), "
+                f"'database is locked': {result['write_errors']}"
+            )
+            self.stdout.write(
+                f"  Lecturas:  {result['reads'] / duration:,.0f}/s "
+                f"(p95 {result['read_p95'] * 1000:.1f} ms), "
+                f"errores: {result['read_errors']}"
+            )
@@ -0,0 +1,43 @@
+"""
+Borra las reservas de stock vencidas (ver shop/inventory.py).
+
+Las reservas vencidas ya no cuentan para el stock disponible; este
+comando solo mantiene la tabla chica.
+
+Uso:
+    python manage.py expire_reservations            # una pasada (cron)
+    python manage.py expire_reservations --loop     # proceso permanente
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.inventory import expire_reservations
+
+
+class Command(BaseCommand):
+    help = 'Borra en lote las reservas de stock vencidas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='No terminar: repetir cada --interval segundos'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60.0,
+            help='Segundos entre pasadas (con --loop, default: 60)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = expire_reservations()
+            if deleted:
+                self.stdout.write(f'Reservas vencidas borradas: {deleted}')
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,57 @@
+"""
+Genera las miniaturas JPEG/WebP de las imágenes de producto nuevas o
+cambiadas (ver shop/images.py). Pensado para cron, cada pocos minutos:
+los productos con variantes al día se saltean.
+
+Uso:
+    python manage.py generate_product_images
+    python manage.py generate_product_images --force
+    python manage.py generate_product_images --product 12 --product 15
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from shop.images import update_product_images
+from shop.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Genera las variantes de imagen (miniaturas JPEG y WebP) de los productos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--product',
+            type=int,
+            action='append',
+            dest='product_ids',
+            help='ID de producto a procesar (repetible). Por defecto, todos.'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerar aunque las variantes estén al día'
+        )
+
+    def handle(self, *args, **options):
+        # Productos con imagen, o sin imagen pero con variantes viejas que borrar
+        products = Product.objects.exclude(
+            (Q(image='') | Q(image__isnull=True)) & Q(image_variants={})
+        )
+        if options['product_ids']:
+            products = products.filter(pk__in=options['product_ids'])
+
+        updated = 0
+        failed = 0
+        for product in products.only('id', 'image', 'image_variants').iterator():
+            if update_product_images(product, force=options['force']):
+                updated += 1
+                if product.image and not product.image_variants.get('jpeg'):
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(
+                        f'  No se pudo procesar la imagen del producto {product.pk}: {product.image.name}'
+                    ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Variantes generadas para {updated - failed} productos ({failed} con errores).'
+        ))
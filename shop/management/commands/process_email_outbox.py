@@ -0,0 +1,57 @@
+"""
+Worker de la bandeja de salida de emails.
+
+Uso:
+    python manage.py process_email_outbox            # un lote y termina (cron)
+    python manage.py process_email_outbox --loop     # proceso permanente
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    help = 'Envía los emails pendientes de EmailOutbox reutilizando una conexión SMTP por lote'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Máximo de emails por lote (default: 50)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='No terminar: seguir procesando lotes'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Segundos de espera cuando no hay emails pendientes (con --loop)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        while True:
+            stats = deliver_pending(batch_size=batch_size)
+            processed = sum(stats.values())
+
+            if processed:
+                self.stdout.write(
+                    f"Enviados: {stats['sent']} | "
+                    f"Reintentos: {stats['retried']} | "
+                    f"Fallidos: {stats['dead']}"
+                )
+
+            if not options['loop']:
+                break
+
+            # Lote lleno: probablemente quedan más, seguir sin esperar
+            if processed < batch_size:
+                time.sleep(options['interval'])
@@ -0,0 +1,47 @@
+"""
+Recalcula la tabla de productos comprados juntos desde OrderItem (ver
+shop/recommendations.py). Las órdenes nuevas se suman solas en el
+checkout; conviene correrlo a diario para recortar y corregir la tabla.
+
+Uso:
+    python manage.py rebuild_cooccurrence
+    python manage.py rebuild_cooccurrence --top-k 30 --min-count 2
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.recommendations import TOP_K, rebuild_cooccurrence
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los vecinos "comprados juntos" de cada producto'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=TOP_K,
+            help=f'Vecinos guardados por producto (default: {TOP_K})'
+        )
+        parser.add_argument(
+            '--min-count',
+            type=int,
+            default=1,
+            help='Órdenes en común mínimas para guardar un par (default: 1)'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        stats = rebuild_cooccurrence(
+            top_k=options['top_k'],
+            min_count=options['min_count'],
+            log=self.stdout.write,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Comprados juntos reconstruido en {time.monotonic() - started:.1f}s: "
+            f"{stats['orders']:,} órdenes, {stats['pairs']:,} pares distintos, "
+            f"{stats['rows']:,} filas guardadas."
+        ))
@@ -0,0 +1,42 @@
+"""
+Recalcula los agregados de calificaciones de los productos.
+
+Uso:
+    python manage.py rebuild_ratings
+    python manage.py rebuild_ratings --product 12 --product 15
+"""
+
+from django.core.management.base import BaseCommand
+
+from shop.cache import invalidate_catalog
+from shop.ratings import rebuild_product_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recalcula rating_avg, rating_count y el histograma de estrellas de los productos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--product',
+            type=int,
+            action='append',
+            dest='product_ids',
+            help='ID de producto a recalcular (repetible). Por defecto, todos.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Tamaño de lote para las actualizaciones (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        rated = rebuild_product_ratings(
+            options['product_ids'],
+            batch_size=options['batch_size']
+        )
+        invalidate_catalog()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Calificaciones recalculadas ({rated} productos con reviews aprobados).'
+        ))
@@ -0,0 +1,25 @@
+"""
+Recalcula los resúmenes diarios de ventas desde Order/OrderItem.
+
+Uso:
+    python manage.py rebuild_sales_rollups
+"""
+
+from django.core.management.base import BaseCommand
+
+from shop.rollups import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye las tablas de ventas diarias por estado, categoría, producto y método de pago'
+
+    def handle(self, *args, **options):
+        counts = rebuild_sales_rollups()
+
+        self.stdout.write(self.style.SUCCESS(
+            'Resúmenes de ventas reconstruidos: '
+            f"{counts['daily']} días/estado, "
+            f"{counts['categories']} filas por categoría, "
+            f"{counts['products']} filas por producto, "
+            f"{counts['payments']} filas por método de pago."
+        ))
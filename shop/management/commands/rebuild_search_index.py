@@ -0,0 +1,29 @@
+"""
+Reconstruye el índice de búsqueda FTS5 de productos.
+
+Uso:
+    python manage.py rebuild_search_index
+"""
+
+from django.core.management.base import BaseCommand
+
+from shop.models import Product
+from shop.search import install_search_index, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda FTS5 de productos'
+
+    def handle(self, *args, **options):
+        # Repara tabla y triggers si faltan (reconstruye en ese caso)
+        if install_search_index():
+            self.stdout.write(self.style.WARNING('Índice FTS5 o triggers faltantes: recreados.'))
+        elif not rebuild_search_index():
+            self.stdout.write(self.style.ERROR(
+                'FTS5 no disponible en esta base de datos; la búsqueda usa icontains.'
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Índice de búsqueda reconstruido ({Product.objects.count()} productos).'
+        ))
@@ -0,0 +1,37 @@
+"""
+Recalcula la tabla de productos similares por contenido (ver
+shop/similarity.py). Los productos nuevos o editados no cambian la
+tabla hasta la siguiente corrida; conviene programarlo a diario.
+
+Uso:
+    python manage.py rebuild_similarity
+    python manage.py rebuild_similarity --top-n 20
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.similarity import TOP_N, rebuild_similarity
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los productos similares por texto y especificaciones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-n',
+            type=int,
+            default=TOP_N,
+            help=f'Vecinos guardados por producto (default: {TOP_N})'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        stats = rebuild_similarity(top_n=options['top_n'], log=self.stdout.write)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Productos similares reconstruidos en {time.monotonic() - started:.1f}s: "
+            f"{stats['products']:,} productos, {stats['terms']:,} términos, "
+            f"{stats['rows']:,} filas guardadas."
+        ))
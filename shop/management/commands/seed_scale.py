@@ -0,0 +1,80 @@
+"""
+Genera datos sintéticos a escala de producción (ver shop/seeding.py).
+
+Uso:
+    python manage.py seed_scale --products 100000 --users 50000 --orders 500000
+    python manage.py seed_scale --seed 7 --days 180
+    python manage.py seed_scale --epoch 2026-06-01       # fechas hasta ese día
+    python manage.py seed_scale --clear                 # borrar lo generado antes
+
+Los usuarios generados tienen la contraseña `seed-password`.
+"""
+
+import time
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.models import Product
+from shop.seeding import SEED_EPOCH, SEED_PASSWORD, SEED_PREFIX, clear_seed_data, seed_scale
+
+
+def _epoch(value):
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+class Command(BaseCommand):
+    help = 'Genera productos, usuarios, órdenes, reviews, favoritos y carritos sintéticos con bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10000, help='Productos (default: 10000)')
+        parser.add_argument('--users', type=int, default=5000, help='Usuarios (default: 5000)')
+        parser.add_argument('--orders', type=int, default=50000, help='Órdenes (default: 50000)')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla del generador (default: 42)')
+        parser.add_argument('--days', type=int, default=365, help='Días de historial de órdenes (default: 365)')
+        parser.add_argument(
+            '--epoch',
+            type=_epoch,
+            default=SEED_EPOCH,
+            help=f'Fecha base de los datos, AAAA-MM-DD (default: {SEED_EPOCH.date()})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Filas por bulk_create (default: 5000)'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Borrar los datos generados previamente antes de sembrar'
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.stdout.write('Borrando datos generados previamente...')
+            clear_seed_data()
+        elif Product.objects.filter(sku__startswith=SEED_PREFIX).exists():
+            raise CommandError(
+                'Ya hay datos generados en la base. Usa --clear para regenerarlos.'
+            )
+
+        if min(options['products'], options['users']) < 1 and options['orders']:
+            raise CommandError('Se necesitan productos y usuarios para generar órdenes.')
+
+        started = time.monotonic()
+        counts = seed_scale(
+            products=options['products'],
+            users=options['users'],
+            orders=options['orders'],
+            seed=options['seed'],
+            days=options['days'],
+            epoch=options['epoch'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        )
+        elapsed = time.monotonic() - started
+
+        summary = ', '.join(f'{name}: {count:,}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Datos generados en {elapsed:.0f}s. {summary}'))
+        self.stdout.write(f'Contraseña de los usuarios generados: {SEED_PASSWORD}')
@@ -0,0 +1,58 @@
+"""
+Avisos de la wishlist: bajadas de precio y reposiciones (ver
+shop/wishlist_notifications.py). Los emails quedan en EmailOutbox y los
+envía `process_email_outbox`.
+
+Uso:
+    python manage.py send_wishlist_notifications            # un lote (cron)
+    python manage.py send_wishlist_notifications --loop     # proceso permanente
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.wishlist_notifications import send_wishlist_notifications
+
+
+class Command(BaseCommand):
+    help = 'Envía a cada usuario un resumen con las bajadas de precio y reposiciones de su lista de deseos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Máximo de cambios de productos por lote (default: 1000)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='No terminar: seguir procesando lotes'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=300.0,
+            help='Segundos de espera cuando no hay cambios pendientes (con --loop)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        while True:
+            stats = send_wishlist_notifications(batch_size=batch_size)
+
+            if stats['events']:
+                self.stdout.write(
+                    f"Cambios: {stats['events']} | "
+                    f"Productos: {stats['products']} | "
+                    f"Emails: {stats['emails']}"
+                )
+
+            if not options['loop']:
+                break
+
+            # Lote lleno: probablemente quedan más, seguir sin esperar
+            if stats['events'] < batch_size:
+                time.sleep(options['interval'])
@@ -0,0 +1,40 @@
+"""
+Mantenimiento periódico de la base SQLite (para cron).
+
+Uso:
+    python manage.py sqlite_maintenance              # ANALYZE + optimize + checkpoint
+    python manage.py sqlite_maintenance --vacuum     # además, VACUUM (bloquea la base)
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = 'Actualiza las estadísticas de SQLite (ANALYZE / PRAGMA optimize) y hace checkpoint del WAL'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--vacuum',
+            action='store_true',
+            help='Ejecutar también VACUUM (requiere acceso exclusivo)'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Este comando solo aplica a bases SQLite.')
+
+        steps = ['ANALYZE', 'PRAGMA optimize', 'PRAGMA wal_checkpoint(TRUNCATE)']
+        if options['vacuum']:
+            steps.append('VACUUM')
+
+        with connection.cursor() as cursor:
+            for statement in steps:
+                started = time.perf_counter()
+                cursor.execute(statement)
+                elapsed = (time.perf_counter() - started) * 1000
+                self.stdout.write(f'  {statement}: {elapsed:.1f} ms')
+
+        self.stdout.write(self.style.SUCCESS('Mantenimiento de SQLite completado.'))
@@ -0,0 +1,99 @@
+"""
+Middleware de la tienda.
+"""
+
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import instrumentation
+from .presence import touch
+
+logger = logging.getLogger(__name__)
+
+
+class PresenceMiddleware:
+    """
+    Registra la actividad de los usuarios autenticados (ver shop/presence.py).
+
+    Va después de SessionMiddleware y AuthenticationMiddleware. Solo lee la
+    sesión (no fuerza la carga de `request.user`) y escribe en la base de
+    datos como mucho una vez por PRESENCE_TOUCH_INTERVAL por sesión.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # Después de la vista: un logout ya vació la sesión
+        touch(request)
+        return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Mide consultas, SQL, templates y latencia de cada petición
+    (ver shop/instrumentation.py).
+
+    Va primero en MIDDLEWARE para incluir las consultas de sesión y
+    autenticación. Alimenta el histograma por URL y registra en el log
+    las peticiones que superan SLOW_REQUEST_MS o SLOW_REQUEST_QUERIES,
+    con su SQL. El header `Server-Timing` (cuántas consultas y cuánto SQL
+    hace cada vista) solo se envía con DEBUG o a usuarios staff.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrumentation.install_template_timer()
+
+    def __call__(self, request):
+        metrics = instrumentation.RequestMetrics()
+        token = instrumentation.activate(metrics)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            instrumentation.deactivate(token)
+
+        total = metrics.elapsed
+        route = request.resolver_match.view_name if request.resolver_match else '<unresolved>'
+
+        if self.show_timing(request):
+            response['Server-Timing'] = metrics.server_timing(total)
+        instrumentation.record(route, total, metrics)
+
+        if (
+            total * 1000 > settings.SLOW_REQUEST_MS
+            or len(metrics.queries) > settings.SLOW_REQUEST_QUERIES
+        ):
+            self.log_slow_request(request, route, total, metrics)
+
+        return response
+
+    @staticmethod
+    def show_timing(request):
+        if settings.DEBUG:
+            return True
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_staff
+
+    def log_slow_request(self, request, route, total, metrics):
+        slowest = sorted(metrics.queries, key=lambda query: query[1], reverse=True)[:5]
+        duplicates = sorted(metrics.duplicates().items(), key=lambda item: item[1], reverse=True)[:5]
+
+        lines = [
+            f"Slow request {request.method} {request.path} ({route}): "
+            f"{total * 1000:.0f} ms, {len(metrics.queries)} queries, "
+            f"SQL {metrics.sql_time * 1000:.0f} ms, templates {metrics.template_time * 1000:.0f} ms"
+        ]
+        lines += [f"  [{duration * 1000:.1f} ms] {sql}" for sql, duration in slowest]
+        lines += [f"  [x{count}] {sql}" for sql, count in duplicates]
+        logger.warning('\n'.join(lines))
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def create_fts(apps, schema_editor):
+    # Solo SQLite: en otros motores la búsqueda usa icontains
+    from shop.search import install_search_index
+    install_search_index(schema_editor.connection)
+
+
+def drop_fts(apps, schema_editor):
+    from shop.search import uninstall_search_index
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0009_product_color_product_dimensiones_product_garantia_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
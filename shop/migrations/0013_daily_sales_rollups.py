@@ -0,0 +1,118 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    Order = apps.get_model('shop', 'Order')
+    OrderItem = apps.get_model('shop', 'OrderItem')
+
+    orders = Order.objects.annotate(date=TruncDate('created_at')).order_by()
+    items = OrderItem.objects.annotate(date=TruncDate('order__created_at')).order_by()
+
+    order_totals = {'orders': Count('id'), 'amount': Sum('total')}
+    item_totals = {'units': Sum('quantity'), 'amount': Sum(F('quantity') * F('price'))}
+
+    for model_name, queryset, keys, totals in (
+        ('DailySalesRollup', orders, {'date': 'date', 'status': 'status'},
+         {'orders_count': 'orders', 'revenue': 'amount'}),
+        ('DailyPaymentSalesRollup', orders,
+         {'date': 'date', 'status': 'status', 'payment_method': 'payment_method'},
+         {'orders_count': 'orders', 'revenue': 'amount'}),
+        ('DailyProductSalesRollup', items,
+         {'date': 'date', 'status': 'order__status', 'product_id': 'product_id'},
+         {'quantity': 'units', 'revenue': 'amount'}),
+        ('DailyCategorySalesRollup', items,
+         {'date': 'date', 'status': 'order__status', 'category_id': 'product__category_id'},
+         {'quantity': 'units', 'revenue': 'amount'}),
+    ):
+        model = apps.get_model('shop', model_name)
+        aggregates = order_totals if queryset is orders else item_totals
+        rows = queryset.values(*keys.values()).annotate(**aggregates)
+        model.objects.bulk_create([
+            model(
+                **{field: row[source] for field, source in keys.items()},
+                **{field: row[alias] for field, alias in totals.items()}
+            )
+            for row in rows
+        ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0012_email_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPaymentSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('confirmed', 'Confirmado'), ('preparing', 'Preparando'), ('in_transit', 'En camino'), ('delivered', 'Entregado'), ('cancelled', 'Cancelado')], max_length=20, verbose_name='Estado')),
+                ('payment_method', models.CharField(choices=[('cash', 'Efectivo'), ('transfer', 'Transferencia')], max_length=20, verbose_name='Método de pago')),
+                ('orders_count', models.IntegerField(default=0, verbose_name='Órdenes')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ingresos')),
+            ],
+            options={
+                'verbose_name': 'Ventas diarias por método de pago',
+                'verbose_name_plural': 'Ventas diarias por método de pago',
+                'unique_together': {('date', 'status', 'payment_method')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('confirmed', 'Confirmado'), ('preparing', 'Preparando'), ('in_transit', 'En camino'), ('delivered', 'Entregado'), ('cancelled', 'Cancelado')], max_length=20, verbose_name='Estado')),
+                ('orders_count', models.IntegerField(default=0, verbose_name='Órdenes')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ingresos')),
+            ],
+            options={
+                'verbose_name': 'Ventas diarias',
+                'verbose_name_plural': 'Ventas diarias',
+                'indexes': [models.Index(fields=['status', 'date'], name='shop_dailys_status_cd09ad_idx')],
+                'unique_together': {('date', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCategorySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('confirmed', 'Confirmado'), ('preparing', 'Preparando'), ('in_transit', 'En camino'), ('delivered', 'Entregado'), ('cancelled', 'Cancelado')], max_length=20, verbose_name='Estado')),
+                ('quantity', models.IntegerField(default=0, verbose_name='Unidades')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ingresos')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='shop.category', verbose_name='Categoría')),
+            ],
+            options={
+                'verbose_name': 'Ventas diarias por categoría',
+                'verbose_name_plural': 'Ventas diarias por categoría',
+                'indexes': [models.Index(fields=['category', 'date'], name='shop_dailyc_categor_029df8_idx')],
+                'unique_together': {('date', 'status', 'category')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('confirmed', 'Confirmado'), ('preparing', 'Preparando'), ('in_transit', 'En camino'), ('delivered', 'Entregado'), ('cancelled', 'Cancelado')], max_length=20, verbose_name='Estado')),
+                ('quantity', models.IntegerField(default=0, verbose_name='Unidades')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ingresos')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='shop.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Ventas diarias por producto',
+                'verbose_name_plural': 'Ventas diarias por producto',
+                'indexes': [models.Index(fields=['product', 'date'], name='shop_dailyp_product_95fb4b_idx')],
+                'unique_together': {('date', 'status', 'product')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0017_checkout_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('price_drop', 'Bajada de precio'), ('back_in_stock', 'De nuevo disponible')], max_length=20, verbose_name='Tipo')),
+                ('old_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('new_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Procesado')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='change_events', to='shop.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Cambio de producto',
+                'verbose_name_plural': 'Cambios de productos',
+                'indexes': [models.Index(fields=['processed_at', 'id'], name='shop_produc_process_3b11e9_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0018_product_change_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCooccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Órdenes en común')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cooccurrences', to='shop.product', verbose_name='Producto')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bought_with', to='shop.product', verbose_name='Comprado junto con')),
+            ],
+            options={
+                'verbose_name': 'Producto comprado junto',
+                'verbose_name_plural': 'Productos comprados juntos',
+                'indexes': [models.Index(fields=['product', '-count'], name='shop_produc_product_21440c_idx')],
+                'unique_together': {('product', 'related')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0019_product_cooccurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Similitud')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='shop.product', verbose_name='Producto')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to', to='shop.product', verbose_name='Producto similar')),
+            ],
+            options={
+                'verbose_name': 'Producto similar',
+                'verbose_name_plural': 'Productos similares',
+                'indexes': [models.Index(fields=['product', '-score'], name='shop_produc_product_581e71_idx')],
+                'unique_together': {('product', 'similar')},
+            },
+        ),
+    ]
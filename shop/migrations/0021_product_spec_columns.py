@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0020_product_similarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='alto_mm',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Alto (mm)'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='ancho_mm',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Ancho (mm)'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='largo_mm',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Largo (mm)'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='potencia_w',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Potencia (W)'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='voltaje_v',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Voltaje (V)'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'potencia_w'], name='shop_produc_is_acti_fbdec2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'voltaje_v'], name='shop_produc_is_acti_97bfa1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'peso'], name='shop_produc_is_acti_dee948_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'largo_mm'], name='shop_produc_is_acti_e3dd71_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'ancho_mm'], name='shop_produc_is_acti_99a31d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'alto_mm'], name='shop_produc_is_acti_dfdbe1_idx'),
+        ),
+    ]
@@ -2,8 +2,11 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, RegexValidator
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from decimal import Decimal
 
+from .specs import SPEC_COLUMNS, SPEC_SOURCES, apply_spec_columns
+
 def validate_phone_or_empty(value):
     """Validador que permite teléfono vacío o válido (formato cubano: 8 dígitos)"""
     if value:
@@ -56,6 +59,8 @@ class Product(models.Model):
         db_index=True  # ÍNDICE: Para filtros de stock
     )
     image = models.ImageField(upload_to='products/', blank=True, null=True, verbose_name="Imagen")
+    # Miniaturas JPEG/WebP generadas desde `image` (ver shop/images.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True, verbose_name="Activo", db_index=True)  # ÍNDICE: Filtro común
     featured = models.BooleanField(default=False, verbose_name="Destacado", db_index=True)  # ÍNDICE: Para featured
     sku = models.CharField(max_length=50, unique=True, verbose_name="SKU", db_index=True)  # ÍNDICE: Búsquedas por SKU
@@ -135,6 +140,48 @@ class Product(models.Model):
         help_text="Para qué se recomienda usar este producto"
     )
 
+    # ==========================================
+    # ESPECIFICACIONES NUMÉRICAS (derivadas)
+    # ==========================================
+    # Calculadas al guardar desde potencia, voltaje y dimensiones (ver
+    # shop/specs.py), para filtrar por rango en SQL. Se recalculan con
+    # `manage.py backfill_specs`.
+    potencia_w = models.FloatField(null=True, blank=True, editable=False, verbose_name="Potencia (W)")
+    voltaje_v = models.FloatField(null=True, blank=True, editable=False, verbose_name="Voltaje (V)")
+    largo_mm = models.FloatField(null=True, blank=True, editable=False, verbose_name="Largo (mm)")
+    ancho_mm = models.FloatField(null=True, blank=True, editable=False, verbose_name="Ancho (mm)")
+    alto_mm = models.FloatField(null=True, blank=True, editable=False, verbose_name="Alto (mm)")
+
+    # ==========================================
+    # AGREGADOS DE CALIFICACIONES (desnormalizados)
+    # ==========================================
+    # Mantenidos por shop/ratings.py al crear, editar, moderar o borrar
+    # reviews aprobados. Se reconstruyen con `manage.py rebuild_ratings`.
+    rating_avg = models.DecimalField(
+        max_digits=3,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        verbose_name="Calificación promedio",
+        db_index=True  # ÍNDICE: Para ordenar por calificación
+    )
+    rating_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Cantidad de reviews")
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_1 = models.PositiveIntegerField(default=0, editable=False)
+    rating_2 = models.PositiveIntegerField(default=0, editable=False)
+    rating_3 = models.PositiveIntegerField(default=0, editable=False)
+    rating_4 = models.PositiveIntegerField(default=0, editable=False)
+    rating_5 = models.PositiveIntegerField(default=0, editable=False)
+
+    # Solo shop/ratings.py escribe estas columnas (UPDATE con F). Las
+    # vistas que editan y guardan un producto lo cargan con
+    # `defer(*RATING_FIELDS)`: un save() escribe solo los campos cargados
+    # y no pisa los agregados con los valores viejos en memoria
+    RATING_FIELDS = (
+        'rating_count', 'rating_sum', 'rating_avg',
+        'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5',
+    )
+
     class Meta:
         verbose_name = "Producto"
         verbose_name_plural = "Productos"
@@ -151,15 +198,47 @@ class Product(models.Model):
             models.Index(fields=['name', 'is_active']),
             # Query común: búsquedas por marca
             models.Index(fields=['marca', 'is_active']),
+            # Filtros por rango del listado (potencia_min, peso_max, ...)
+            models.Index(fields=['is_active', 'potencia_w']),
+            models.Index(fields=['is_active', 'voltaje_v']),
+            models.Index(fields=['is_active', 'peso']),
+            models.Index(fields=['is_active', 'largo_mm']),
+            models.Index(fields=['is_active', 'ancho_mm']),
+            models.Index(fields=['is_active', 'alto_mm']),
         ]
     
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        """Recalcula las especificaciones numéricas antes de guardar."""
+        apply_spec_columns(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and SPEC_SOURCES.intersection(update_fields):
+            kwargs['update_fields'] = set(update_fields) | set(SPEC_COLUMNS)
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Precio y stock cargados, para detectar bajadas de precio y
+        # reposiciones al guardar (avisos de la wishlist)
+        instance._loaded_price = instance.__dict__.get('price')
+        instance._loaded_stock = instance.__dict__.get('stock')
+        return instance
+    
     @property
     def in_stock(self):
         return self.stock > 0
 
+    @property
+    def rating_histogram(self):
+        """Cantidad de reviews aprobados por estrella, de 5 a 1"""
+        return [
+            (stars, getattr(self, f'rating_{stars}'))
+            for stars in range(5, 0, -1)
+        ]
+
 
     # ==========================================
     # NUEVOS MÉTODOS PARA COMPARADOR
@@ -363,6 +442,13 @@ class Order(models.Model):
     
     def __str__(self):
         return f"Orden {self.order_number} - {self.user.username}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Estado cargado, para mover la orden entre resúmenes de ventas
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
 
 
 class OrderItem(models.Model):
@@ -549,6 +635,20 @@ class Review(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.product.name} ({self.rating}⭐)"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Estado cargado, para calcular el delta de los agregados al guardar
+        instance._rating_state = instance.rating_state
+        return instance
+    
+    @property
+    def rating_state(self):
+        """(rating, aprobado) o None si el campo no se cargó"""
+        if 'rating' not in self.__dict__ or 'is_approved' not in self.__dict__:
+            return None
+        return (self.rating, self.is_approved)
+    
     def save(self, *args, **kwargs):
         """
         Verificar si el usuario compró el producto antes de guardar.
@@ -655,6 +755,14 @@ class WishlistItem(models.Model):
         decimal_places=2,
         verbose_name='Precio al agregar'
     )
+    # Último precio avisado por email (ver shop/wishlist_notifications.py)
+    notified_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name='Último precio avisado'
+    )
     
     class Meta:
         verbose_name = 'Item de Wishlist'
@@ -683,4 +791,391 @@ class WishlistItem(models.Model):
     @property
     def price_difference(self):
         """Diferencia de precio"""
-        return self.original_price - self.product.price
\ No newline at end of file
+        return self.original_price - self.product.price
+
+
+class ProductChangeEvent(models.Model):
+    """
+    Cambio de un producto que interesa a quienes lo tienen en favoritos.
+
+    Se registra al guardar el producto (signal en shop/signals.py) cuando
+    baja el precio o el stock pasa de 0 a positivo. El notificador
+    (shop/wishlist_notifications.py) procesa los pendientes, avisa a los
+    suscriptores y marca `processed_at`.
+    """
+    KIND_PRICE_DROP = 'price_drop'
+    KIND_BACK_IN_STOCK = 'back_in_stock'
+
+    KIND_CHOICES = [
+        (KIND_PRICE_DROP, 'Bajada de precio'),
+        (KIND_BACK_IN_STOCK, 'De nuevo disponible'),
+    ]
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='change_events',
+        verbose_name='Producto'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name='Tipo')
+    old_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    new_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True, verbose_name='Procesado')
+
+    class Meta:
+        verbose_name = 'Cambio de producto'
+        verbose_name_plural = 'Cambios de productos'
+        indexes = [
+            # Query del notificador: pendientes en orden de llegada
+            models.Index(fields=['processed_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.product_id}"
+
+
+# ==========================================
+# BANDEJA DE SALIDA DE EMAILS (OUTBOX)
+# ==========================================
+
+class EmailOutbox(models.Model):
+    """
+    Email pendiente de envío.
+
+    Las vistas no hablan con el servidor SMTP: guardan el mensaje ya
+    renderizado en esta tabla (dentro de la misma transacción que la
+    orden o el cambio que lo origina) y el worker
+    `manage.py process_email_outbox` los envía en lotes.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_DEAD = 'dead'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_SENDING, 'Enviando'),
+        (STATUS_SENT, 'Enviado'),
+        (STATUS_DEAD, 'Fallido'),
+    ]
+
+    subject = models.CharField(max_length=255, verbose_name='Asunto')
+    body = models.TextField(verbose_name='Texto plano')
+    html_body = models.TextField(blank=True, verbose_name='HTML')
+    from_email = models.CharField(max_length=254, verbose_name='Remitente')
+    to = models.JSONField(default=list, verbose_name='Destinatarios')
+    reply_to = models.JSONField(default=list, blank=True, verbose_name='Responder a')
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name='Estado',
+        db_index=True
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Intentos')
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Próximo intento'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Último error')
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Enviado')
+
+    class Meta:
+        verbose_name = 'Email en cola'
+        verbose_name_plural = 'Emails en cola'
+        ordering = ['created_at']
+        indexes = [
+            # Query del worker: mensajes pendientes cuyo intento ya venció
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.get_status_display()})"
+
+
+# ==========================================
+# RESÚMENES DIARIOS DE VENTAS (ROLLUPS)
+# ==========================================
+# Mantenidos por shop/rollups.py al crear una orden o cambiar su estado.
+# El dashboard lee estas tablas en lugar de agregar Order/OrderItem.
+# Se reconstruyen con `manage.py rebuild_sales_rollups`.
+
+class DailySalesRollup(models.Model):
+    """Órdenes e ingresos por día y estado"""
+    date = models.DateField(verbose_name='Fecha')
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES, verbose_name='Estado')
+    orders_count = models.IntegerField(default=0, verbose_name='Órdenes')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Ingresos')
+
+    class Meta:
+        verbose_name = 'Ventas diarias'
+        verbose_name_plural = 'Ventas diarias'
+        unique_together = ['date', 'status']
+        indexes = [
+            models.Index(fields=['status', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.status}: {self.orders_count} órdenes"
+
+
+class DailyCategorySalesRollup(models.Model):
+    """Unidades e ingresos por día, estado de la orden y categoría"""
+    date = models.DateField(verbose_name='Fecha')
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES, verbose_name='Estado')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+', verbose_name='Categoría')
+    quantity = models.IntegerField(default=0, verbose_name='Unidades')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Ingresos')
+
+    class Meta:
+        verbose_name = 'Ventas diarias por categoría'
+        verbose_name_plural = 'Ventas diarias por categoría'
+        unique_together = ['date', 'status', 'category']
+        indexes = [
+            models.Index(fields=['category', 'date']),
+        ]
+
+
+class DailyProductSalesRollup(models.Model):
+    """Unidades e ingresos por día, estado de la orden y producto"""
+    date = models.DateField(verbose_name='Fecha')
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES, verbose_name='Estado')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+', verbose_name='Producto')
+    quantity = models.IntegerField(default=0, verbose_name='Unidades')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Ingresos')
+
+    class Meta:
+        verbose_name = 'Ventas diarias por producto'
+        verbose_name_plural = 'Ventas diarias por producto'
+        unique_together = ['date', 'status', 'product']
+        indexes = [
+            models.Index(fields=['product', 'date']),
+        ]
+
+
+class DailyPaymentSalesRollup(models.Model):
+    """Órdenes e ingresos por día, estado y método de pago"""
+    date = models.DateField(verbose_name='Fecha')
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES, verbose_name='Estado')
+    payment_method = models.CharField(max_length=20, choices=Order.PAYMENT_CHOICES, verbose_name='Método de pago')
+    orders_count = models.IntegerField(default=0, verbose_name='Órdenes')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Ingresos')
+
+    class Meta:
+        verbose_name = 'Ventas diarias por método de pago'
+        verbose_name_plural = 'Ventas diarias por método de pago'
+        unique_together = ['date', 'status', 'payment_method']
+
+
+# ==========================================
+# SESIONES Y PRESENCIA DE USUARIOS
+# ==========================================
+
+class UserSession(models.Model):
+    """
+    Índice de sesiones por usuario.
+
+    La tabla django_session guarda el id de usuario dentro de los datos
+    codificados de la sesión, así que no se puede consultar por usuario.
+    Esta tabla se mantiene desde shop/presence.py (login, logout y un
+    "visto por última vez" con throttling) y permite saber si un usuario
+    está en línea o cerrar todas sus sesiones sin decodificar sesiones.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='tracked_sessions',
+        verbose_name='Usuario'
+    )
+    session_key = models.CharField(max_length=40, unique=True, verbose_name='Clave de sesión')
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(default=timezone.now, verbose_name='Visto por última vez')
+
+    class Meta:
+        verbose_name = 'Sesión de usuario'
+        verbose_name_plural = 'Sesiones de usuario'
+        indexes = [
+            # Query de presencia: sesiones recientes de un usuario
+            models.Index(fields=['user', 'last_seen']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.last_seen:%d/%m/%Y %H:%M}"
+
+
+# ==========================================
+# RESERVAS DE STOCK DURANTE EL CHECKOUT
+# ==========================================
+
+class StockReservation(models.Model):
+    """
+    Unidades apartadas para un usuario mientras completa el checkout.
+
+    Se crean al entrar al checkout y se convierten en descuento de stock
+    al confirmar la orden (shop/inventory.py). El stock disponible para
+    los demás es `Product.stock` menos las reservas vigentes; las
+    vencidas no cuentan y `manage.py expire_reservations` las borra en
+    lote.
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='reservations',
+        verbose_name='Producto'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='stock_reservations',
+        verbose_name='Usuario'
+    )
+    quantity = models.PositiveIntegerField(verbose_name='Cantidad')
+    expires_at = models.DateTimeField(verbose_name='Vence', db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Reserva de stock'
+        verbose_name_plural = 'Reservas de stock'
+        unique_together = ['user', 'product']
+        indexes = [
+            # Stock disponible: suma de reservas vigentes por producto
+            models.Index(fields=['product', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity}x {self.product_id} para {self.user_id} hasta {self.expires_at:%H:%M}"
+
+
+# ==========================================
+# CLAVES DE IDEMPOTENCIA DEL CHECKOUT
+# ==========================================
+
+class CheckoutIdempotencyKey(models.Model):
+    """
+    Clave de un envío del paso 3 del checkout y la orden que produjo.
+
+    La clave se genera al mostrar el paso 3 y viaja en el formulario. Se
+    guarda en la misma transacción que la orden: un reenvío (doble clic,
+    reintento del navegador móvil) encuentra la clave y redirige a la
+    orden existente sin volver a tocar stock ni carrito, y dos envíos
+    simultáneos chocan en el índice único antes de descontar stock.
+    """
+    key = models.CharField(max_length=64, unique=True, verbose_name='Clave')
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Usuario'
+    )
+    order = models.OneToOneField(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='idempotency_key',
+        verbose_name='Orden'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Clave de idempotencia'
+        verbose_name_plural = 'Claves de idempotencia'
+
+    def __str__(self):
+        return f"{self.key} -> {self.order_id}"
+
+
+# ==========================================
+# RECOMENDACIONES: COMPRADOS JUNTOS
+# ==========================================
+
+class ProductCooccurrence(models.Model):
+    """
+    Cuántas órdenes incluyen a `product` y a `related` a la vez.
+
+    Tabla dispersa con los vecinos más frecuentes de cada producto,
+    mantenida por shop/recommendations.py. Se guarda en ambos sentidos
+    (a→b y b→a) para leer los vecinos de un producto con un solo rango
+    del índice (product, -count).
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='cooccurrences',
+        verbose_name='Producto'
+    )
+    related = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='bought_with',
+        verbose_name='Comprado junto con'
+    )
+    count = models.PositiveIntegerField(default=0, verbose_name='Órdenes en común')
+
+    class Meta:
+        verbose_name = 'Producto comprado junto'
+        verbose_name_plural = 'Productos comprados juntos'
+        unique_together = ['product', 'related']
+        indexes = [
+            models.Index(fields=['product', '-count']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} + {self.related_id}: {self.count}"
+
+
+class ProductSimilarity(models.Model):
+    """
+    Productos parecidos por contenido (texto y especificaciones).
+
+    La calcula `manage.py rebuild_similarity` (shop/similarity.py): para
+    cada producto guarda sus vecinos más cercanos por similitud coseno,
+    leídos con un solo rango del índice (product, -score).
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='similarities',
+        verbose_name='Producto'
+    )
+    similar = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Producto similar'
+    )
+    score = models.FloatField(verbose_name='Similitud')
+
+    class Meta:
+        verbose_name = 'Producto similar'
+        verbose_name_plural = 'Productos similares'
+        unique_together = ['product', 'similar']
+        indexes = [
+            models.Index(fields=['product', '-score']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} ~ {self.similar_id}: {self.score:.3f}"
+
+
+class ProductSearchIndex(models.Model):
+    """
+    Fila de la tabla FTS5 `shop_product_fts` (ver shop/search.py).
+
+    La tabla la crean y mantienen search.py y sus triggers; el modelo solo
+    existe para unirla a `shop_product` en las consultas de búsqueda, de
+    modo que MATCH y bm25() se evalúen una sola vez en la misma consulta.
+    """
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index'
+    )
+
+    class Meta:
+        managed = False
+        db_table = 'shop_product_fts'
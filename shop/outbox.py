@@ -0,0 +1,208 @@
+"""
+Bandeja de salida transaccional de emails.
+
+- `queue_email` guarda un mensaje en `EmailOutbox`. Si se llama dentro
+  de `transaction.atomic()`, el email existe solo si la transacción
+  confirma (no se avisa de una orden que luego se revirtió).
+  `queue_emails` encola varios con un solo INSERT.
+- `deliver_pending` envía un lote de mensajes vencidos reutilizando una
+  sola conexión SMTP. Los fallos se reintentan con backoff exponencial y
+  tras `EMAIL_OUTBOX_MAX_ATTEMPTS` intentos el mensaje queda como
+  `dead` para revisión manual.
+
+Cada mensaje se reclama con un UPDATE condicional antes de enviarse, así
+que varios workers pueden correr a la vez sin duplicar envíos. El
+intento se cuenta al reclamar: si un worker muere a mitad de lote, sus
+mensajes en `sending` vuelven a estar disponibles al vencer el lease con
+el intento ya sumado, y un mensaje que tumba al worker en cada intento
+termina como `dead` en lugar de reintentarse para siempre.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# Tiempo que un mensaje reclamado queda reservado para su worker
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+def _max_attempts():
+    return getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+
+
+def _retry_delay(attempts):
+    """Backoff exponencial: base * 2^(intentos - 1), con tope."""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE_SECONDS', 60)
+    cap = getattr(settings, 'EMAIL_OUTBOX_RETRY_MAX_SECONDS', 6 * 60 * 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+
+def queue_email(subject, body, to, html_body='', from_email=None, reply_to=None):
+    """
+    Encola un email para envío asíncrono.
+
+    Args:
+        subject: Asunto
+        body: Texto plano
+        to: Lista de destinatarios
+        html_body: Alternativa HTML (opcional)
+        from_email: Remitente (por defecto DEFAULT_FROM_EMAIL)
+        reply_to: Lista de direcciones para responder (opcional)
+
+    Returns:
+        EmailOutbox: Mensaje encolado
+    """
+    return EmailOutbox.objects.create(
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+        reply_to=list(reply_to or []),
+    )
+
+
+def queue_emails(messages):
+    """
+    Encola varios emails con un solo INSERT.
+
+    Args:
+        messages: Iterable de dicts con los argumentos de `queue_email`
+
+    Returns:
+        list: Mensajes encolados
+    """
+    return EmailOutbox.objects.bulk_create([
+        EmailOutbox(
+            subject=message['subject'],
+            body=message['body'],
+            html_body=message.get('html_body', ''),
+            from_email=message.get('from_email') or settings.DEFAULT_FROM_EMAIL,
+            to=list(message['to']),
+            reply_to=list(message.get('reply_to') or []),
+        )
+        for message in messages
+    ])
+
+
+def _build_message(outbox, connection):
+    message = EmailMultiAlternatives(
+        subject=outbox.subject,
+        body=outbox.body,
+        from_email=outbox.from_email,
+        to=outbox.to,
+        reply_to=outbox.reply_to or None,
+        connection=connection,
+    )
+    if outbox.html_body:
+        message.attach_alternative(outbox.html_body, 'text/html')
+    return message
+
+
+def _claim(outbox, now):
+    """
+    Reserva el mensaje para este worker y cuenta el intento; False si
+    otro lo tomó antes.
+    """
+    claimed = EmailOutbox.objects.filter(
+        pk=outbox.pk,
+        status=outbox.status,
+        next_attempt_at=outbox.next_attempt_at,
+    ).update(
+        status=EmailOutbox.STATUS_SENDING,
+        attempts=F('attempts') + 1,
+        next_attempt_at=now + CLAIM_LEASE,
+    ) == 1
+    if claimed:
+        outbox.attempts += 1
+    return claimed
+
+
+def _record_failure(outbox, error, max_attempts, stats):
+    """Reprograma el mensaje (el intento ya se contó al reclamarlo)."""
+    attempts = outbox.attempts
+    if attempts >= max_attempts:
+        status = EmailOutbox.STATUS_DEAD
+        next_attempt_at = timezone.now()
+        stats['dead'] += 1
+        logger.error(f"Email {outbox.pk} marked dead after {attempts} attempts: {error}")
+    else:
+        status = EmailOutbox.STATUS_PENDING
+        next_attempt_at = timezone.now() + _retry_delay(attempts)
+        stats['retried'] += 1
+        logger.warning(f"Email {outbox.pk} failed (attempt {attempts}), retrying: {error}")
+
+    EmailOutbox.objects.filter(pk=outbox.pk).update(
+        status=status,
+        next_attempt_at=next_attempt_at,
+        last_error=str(error)[:2000],
+    )
+
+
+def deliver_pending(batch_size=50, connection=None):
+    """
+    Envía un lote de emails vencidos.
+
+    Args:
+        batch_size: Máximo de mensajes a procesar
+        connection: Conexión de email (por defecto la de EMAIL_BACKEND)
+
+    Returns:
+        dict: Conteo de mensajes 'sent', 'retried' y 'dead'
+    """
+    stats = {'sent': 0, 'retried': 0, 'dead': 0}
+    now = timezone.now()
+
+    due = list(
+        EmailOutbox.objects.filter(
+            Q(status=EmailOutbox.STATUS_PENDING) | Q(status=EmailOutbox.STATUS_SENDING),
+            next_attempt_at__lte=now,
+        ).order_by('next_attempt_at')[:batch_size]
+    )
+    claimed = [outbox for outbox in due if _claim(outbox, now)]
+    max_attempts = _max_attempts()
+
+    # Reclamados de nuevo tras agotar los intentos sin que ningún worker
+    # registrara el resultado (el worker murió durante el envío)
+    abandoned = [outbox for outbox in claimed if outbox.attempts > max_attempts]
+    for outbox in abandoned:
+        _record_failure(outbox, 'Lease vencido en todos los intentos', max_attempts, stats)
+    claimed = [outbox for outbox in claimed if outbox.attempts <= max_attempts]
+    if not claimed:
+        return stats
+
+    connection = connection or get_connection()
+
+    # Una sola conexión (un handshake SMTP) para todo el lote
+    try:
+        connection.open()
+    except Exception as e:
+        for outbox in claimed:
+            _record_failure(outbox, e, max_attempts, stats)
+        return stats
+
+    try:
+        for outbox in claimed:
+            try:
+                _build_message(outbox, connection).send()
+            except Exception as e:
+                _record_failure(outbox, e, max_attempts, stats)
+            else:
+                EmailOutbox.objects.filter(pk=outbox.pk).update(
+                    status=EmailOutbox.STATUS_SENT,
+                    sent_at=timezone.now(),
+                    last_error='',
+                )
+                stats['sent'] += 1
+    finally:
+        connection.close()
+
+    return stats
@@ -0,0 +1,174 @@
+"""
+Caché de página completa para visitantes anónimos.
+
+Las páginas del catálogo (home, listado, detalle, FAQ...) son iguales
+para todos los visitantes sin sesión. `cache_anonymous_page` guarda la
+respuesta renderizada bajo una clave que incluye:
+
+- la generación del catálogo (shop/cache.py): los cambios de estructura
+  (categorías, productos nuevos o agotados, ediciones del admin)
+  invalidan todas las páginas a la vez;
+- opcionalmente una versión propia de la vista (`version`), p. ej. la
+  del producto en la página de detalle: un review nuevo solo invalida
+  esa página;
+- la ruta y los parámetros permitidos de la query string, ordenados y
+  sin vacíos (`?page=2&sort=name_asc` == `?sort=name_asc&page=2`).
+
+No se usa la caché si:
+
+- la petición no es GET/HEAD;
+- el usuario está autenticado o tiene mensajes pendientes. Los
+  anónimos con sesión (p. ej. con productos en el comparador) sí usan
+  la caché: su estado lo aplica `static/js/me-state.js` desde
+  `/me/state/`;
+- la query string trae parámetros no permitidos (p. ej. una búsqueda).
+
+Las compras no invalidan páginas salvo que agoten un producto: las
+etiquetas de stock bajo ("Solo 3") pueden quedar atrasadas hasta
+PAGE_CACHE_TIMEOUT; el checkout valida el stock real.
+
+El token CSRF es distinto para cada visitante: la página se renderiza
+con un marcador en su lugar (ver `context_processors.page_cache_csrf`) y
+el marcador se reemplaza al servirla. Las respuestas llevan `ETag` y
+`Last-Modified`, así que el navegador revalida con un 304 sin cuerpo.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, urlencode
+
+from .cache import get_generation
+
+CSRF_PLACEHOLDER = 'PAGECACHECSRFTOKENPLACEHOLDER'
+
+# Parámetros de seguimiento que no cambian el contenido de la página
+IGNORED_PARAMS = ('utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'fbclid', 'gclid')
+
+
+def _timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 300)
+
+
+def _is_personalized(request):
+    """True si la página puede llevar contenido propio del visitante."""
+    if 'messages' in request.COOKIES:
+        return True
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return False
+    # Con cookie de sesión se consulta la sesión (una query)
+    return request.user.is_authenticated or '_messages' in request.session
+
+
+def _cache_key(request, query_params, version=''):
+    """Clave normalizada, o None si la petición no se puede cachear."""
+    params = []
+    for name in request.GET:
+        if name in IGNORED_PARAMS:
+            continue
+        if name not in query_params:
+            return None
+        value = request.GET.get(name)
+        if value:
+            params.append((name, value))
+
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    raw = f"{request.path}?{urlencode(sorted(params))}|{'ajax' if is_ajax else 'html'}"
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'page:{get_generation()}:{version}:{digest}'
+
+
+def _build_response(request, entry, status):
+    # El token del visitante reemplaza al marcador (y activa la cookie CSRF)
+    content = entry['content']
+    if CSRF_PLACEHOLDER.encode() in content:
+        content = content.replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode())
+
+    response = HttpResponse(content, content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    response['X-Page-Cache'] = status
+    # El cuerpo lleva el token CSRF de cada visitante: solo el navegador
+    # puede guardarlo, siempre revalidando con ETag/Last-Modified
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Cookie', 'X-Requested-With'))
+
+    return get_conditional_response(
+        request,
+        etag=entry['etag'],
+        last_modified=entry['last_modified'],
+        response=response,
+    )
+
+
+def cache_anonymous_page(query_params=(), timeout=None, version=None):
+    """
+    Decorador de vistas: caché de página completa para anónimos.
+
+    Args:
+        query_params: Parámetros GET que forman parte de la clave; con
+            cualquier otro parámetro la vista se ejecuta sin caché
+        timeout: TTL en segundos (por defecto PAGE_CACHE_TIMEOUT)
+        version: Callable `(request, *args, **kwargs)` cuyo resultado
+            forma parte de la clave
+    """
+    query_params = frozenset(query_params)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            if _is_personalized(request):
+                return view_func(request, *args, **kwargs)
+
+            key = _cache_key(
+                request,
+                query_params,
+                version(request, *args, **kwargs) if version else '',
+            )
+            if key is None:
+                return view_func(request, *args, **kwargs)
+
+            entry = cache.get(key)
+            if entry is not None:
+                return _build_response(request, entry, 'HIT')
+
+            # Renderizar con el marcador en lugar del token CSRF
+            request._page_cache_render = True
+            try:
+                response = view_func(request, *args, **kwargs)
+            finally:
+                request._page_cache_render = False
+
+            if (
+                response.status_code != 200
+                or response.streaming
+                or response.cookies
+                or response.has_header('Cache-Control')
+            ):
+                # No cacheable: devolver tal cual con el token real
+                if not response.streaming and CSRF_PLACEHOLDER.encode() in response.content:
+                    response.content = response.content.replace(
+                        CSRF_PLACEHOLDER.encode(), get_token(request).encode()
+                    )
+                return response
+
+            entry = {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'etag': f'"{hashlib.md5(response.content).hexdigest()}"',
+                'last_modified': int(time.time()),
+            }
+            cache.set(key, entry, _timeout() if timeout is None else timeout)
+            return _build_response(request, entry, 'MISS')
+
+        return wrapper
+
+    return decorator
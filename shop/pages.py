@@ -4,12 +4,15 @@ Vistas para páginas estáticas: Sobre Nosotros, Contacto, FAQ
 
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.core.mail import send_mail
 from django.conf import settings
 from django.views.decorators.http import require_http_methods
 from django_ratelimit.decorators import ratelimit
 
+from .outbox import queue_email
+from .page_cache import cache_anonymous_page
 
+
+@cache_anonymous_page()
 def about_us(request):
     """Página Sobre Nosotros"""
     context = {
@@ -18,6 +21,7 @@ def about_us(request):
     return render(request, 'shop/pages/about_us.html', context)
 
 
+@cache_anonymous_page()
 def faq(request):
     """Página de Preguntas Frecuentes"""
     # FAQs organizadas por categorías
@@ -170,12 +174,12 @@ Mensaje:
 Este mensaje fue enviado desde el formulario de contacto.
                 """
                 
-                send_mail(
+                # Se encola; lo envía el worker process_email_outbox
+                queue_email(
                     subject=f'[Contacto Web] {subject}',
-                    message=full_message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[settings.EMAIL_HOST_USER],
-                    fail_silently=False,
+                    body=full_message,
+                    to=[settings.EMAIL_HOST_USER],
+                    reply_to=[email],
                 )
                 
                 messages.success(
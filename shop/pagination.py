@@ -0,0 +1,148 @@
+"""
+Paginación por cursor (keyset / seek) para listados grandes.
+
+En lugar de `OFFSET n`, cada página filtra a partir de la clave de orden
+del último elemento visto: `WHERE (campo, id) > (valor, último_id)`.
+El costo de la página 500 es el mismo que el de la página 1 y no hace
+falta `COUNT(*)` para saber si hay más resultados (se pide un elemento
+extra).
+
+El cursor es opaco para el cliente: va firmado con `django.core.signing`
+e incluye el campo de orden, así que un cursor de otro ordenamiento o
+manipulado se rechaza con `InvalidCursor`.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+CURSOR_SALT = 'shop.pagination.cursor'
+
+
+class InvalidCursor(Exception):
+    """El cursor no es válido para este listado."""
+
+
+class KeysetPage:
+    """Página de resultados obtenida con `paginate_keyset`."""
+
+    def __init__(self, object_list, has_next, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self._has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+
+def _serialize(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _deserialize(model, field, value):
+    try:
+        return model._meta.get_field(field).to_python(value)
+    except FieldDoesNotExist:
+        # Anotaciones (p. ej. `relevance` de la búsqueda) son numéricas
+        return float(value)
+
+
+def encode_cursor(order_field, obj):
+    """
+    Genera el cursor que apunta justo después de `obj`.
+
+    Args:
+        order_field: Campo de orden tal como se pasa a order_by ('-price')
+        obj: Último objeto de la página actual
+
+    Returns:
+        str: Cursor firmado, seguro para usar en la URL
+    """
+    field = order_field.lstrip('-')
+    payload = [order_field, _serialize(getattr(obj, field)), obj.pk]
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor, order_field, model):
+    """
+    Decodifica un cursor generado por `encode_cursor`.
+
+    Returns:
+        tuple: (valor del campo de orden, pk)
+
+    Raises:
+        InvalidCursor: Si la firma no es válida o el cursor es de otro orden
+    """
+    try:
+        cursor_field, value, pk = signing.loads(cursor, salt=CURSOR_SALT)
+    except (signing.BadSignature, ValueError, TypeError):
+        raise InvalidCursor('Cursor inválido')
+
+    if cursor_field != order_field:
+        raise InvalidCursor('El cursor no corresponde al ordenamiento actual')
+
+    field = order_field.lstrip('-')
+    try:
+        return _deserialize(model, field, value), int(pk)
+    except (ValidationError, ValueError, TypeError):
+        raise InvalidCursor('Cursor inválido')
+
+
+def order_with_tiebreaker(queryset, order_field):
+    """
+    Ordena por `order_field` y desempata por id en la misma dirección.
+
+    El desempate hace el orden total, requisito de la paginación por
+    cursor y de que OFFSET no repita ni salte elementos entre páginas.
+    """
+    descending = order_field.startswith('-')
+    return queryset.order_by(order_field, '-id' if descending else 'id')
+
+
+def paginate_keyset(queryset, order_field, cursor=None, per_page=12):
+    """
+    Devuelve una página de `queryset` a partir de `cursor`.
+
+    Args:
+        queryset: QuerySet ya filtrado (el orden se sobrescribe)
+        order_field: Campo de orden ('price', '-created_at', 'relevance'...)
+        cursor: Cursor de la página anterior o None para la primera
+        per_page: Cantidad de elementos por página
+
+    Returns:
+        KeysetPage
+
+    Raises:
+        InvalidCursor: Si el cursor no es válido
+    """
+    queryset = order_with_tiebreaker(queryset, order_field)
+
+    if cursor:
+        value, pk = decode_cursor(cursor, order_field, queryset.model)
+        field = order_field.lstrip('-')
+        op = 'lt' if order_field.startswith('-') else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'{field}__{op}': value}) |
+            Q(**{field: value, f'id__{op}': pk})
+        )
+
+    # Un elemento extra indica si hay página siguiente sin COUNT(*)
+    items = list(queryset[:per_page + 1])
+    has_next = len(items) > per_page
+    items = items[:per_page]
+
+    next_cursor = encode_cursor(order_field, items[-1]) if has_next else None
+    return KeysetPage(items, has_next, next_cursor)
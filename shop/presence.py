@@ -0,0 +1,140 @@
+"""
+Presencia de usuarios e índice de sesiones (`UserSession`).
+
+- `record_login` / `record_logout` se conectan a las señales de login y
+  logout de Django (ver shop/signals.py).
+- `touch` lo llama `PresenceMiddleware` en cada petición autenticada,
+  pero solo escribe en la base de datos una vez cada
+  PRESENCE_TOUCH_INTERVAL segundos por sesión (el throttling usa
+  `cache.add`, que es atómico).
+- `online_user_ids` responde para una lista de usuarios con una sola
+  consulta sobre el índice (user, last_seen), sin leer django_session.
+- `logout_all_devices` borra todas las sesiones de un usuario usando el
+  mismo índice.
+"""
+
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import UserSession
+
+
+def _online_window():
+    return timedelta(seconds=getattr(settings, 'PRESENCE_ONLINE_WINDOW', 300))
+
+
+def _touch_interval():
+    return getattr(settings, 'PRESENCE_TOUCH_INTERVAL', 60)
+
+
+def _touch_key(session_key):
+    return f'presence:touch:{session_key}'
+
+
+def record_login(user, session):
+    """Registra la sesión recién autenticada y limpia las vencidas del usuario."""
+    if session.session_key is None:
+        session.save()
+
+    now = timezone.now()
+    UserSession.objects.update_or_create(
+        session_key=session.session_key,
+        defaults={'user': user, 'last_seen': now},
+    )
+
+    # Sesiones que ya no pueden estar vivas (expiraron sin logout)
+    UserSession.objects.filter(
+        user=user,
+        last_seen__lt=now - timedelta(seconds=settings.SESSION_COOKIE_AGE)
+    ).delete()
+
+    cache.set(_touch_key(session.session_key), 1, _touch_interval())
+
+
+def record_logout(session):
+    """Elimina la sesión del índice."""
+    if session.session_key:
+        UserSession.objects.filter(session_key=session.session_key).delete()
+        cache.delete(_touch_key(session.session_key))
+
+
+def touch(request):
+    """
+    Actualiza `last_seen` de la sesión actual (con throttling).
+
+    Returns:
+        bool: True si se escribió en la base de datos
+    """
+    session = request.session
+    session_key = session.session_key
+    if not session_key:
+        return False
+
+    user_id = session.get(SESSION_KEY)
+    if user_id is None:
+        return False
+
+    if not cache.add(_touch_key(session_key), 1, _touch_interval()):
+        return False
+
+    now = timezone.now()
+    updated = UserSession.objects.filter(session_key=session_key).update(last_seen=now)
+    if not updated:
+        # Sesión iniciada antes de existir el índice o tras rotar la clave
+        UserSession.objects.get_or_create(
+            session_key=session_key,
+            defaults={'user_id': user_id, 'last_seen': now},
+        )
+    return True
+
+
+def online_user_ids(user_ids):
+    """
+    Devuelve el conjunto de ids (de `user_ids`) que están en línea.
+
+    Una consulta, resuelta con el índice (user, last_seen).
+    """
+    since = timezone.now() - _online_window()
+    return set(
+        UserSession.objects.filter(
+            user_id__in=list(user_ids),
+            last_seen__gte=since,
+        ).values_list('user_id', flat=True).distinct()
+    )
+
+
+def last_seen(user_id):
+    """Última actividad registrada del usuario, o None."""
+    return UserSession.objects.filter(
+        user_id=user_id
+    ).order_by('-last_seen').values_list('last_seen', flat=True).first()
+
+
+def logout_all_devices(user, keep_session_key=None):
+    """
+    Cierra todas las sesiones del usuario.
+
+    Args:
+        user: Usuario
+        keep_session_key: Sesión a conservar (p. ej. la actual)
+
+    Returns:
+        int: Cantidad de sesiones cerradas
+    """
+    sessions = UserSession.objects.filter(user=user)
+    if keep_session_key:
+        sessions = sessions.exclude(session_key=keep_session_key)
+
+    session_keys = list(sessions.values_list('session_key', flat=True))
+    store = import_module(settings.SESSION_ENGINE).SessionStore()
+    for session_key in session_keys:
+        store.delete(session_key)
+        cache.delete(_touch_key(session_key))
+
+    UserSession.objects.filter(session_key__in=session_keys).delete()
+    return len(session_keys)
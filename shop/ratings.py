@@ -0,0 +1,132 @@
+"""
+Mantenimiento de los agregados de calificaciones de `Product`.
+
+`rating_count`, `rating_sum`, `rating_avg` y el histograma `rating_1`..
+`rating_5` solo cuentan reviews aprobados. Cada cambio en un review se
+traduce en un delta que se aplica con un único UPDATE con expresiones F,
+así que dos reviews simultáneos del mismo producto no se pisan y no hace
+falta volver a agregar todos sus reviews.
+
+`rebuild_product_ratings` recalcula los agregados desde cero; lo usa el
+comando `manage.py rebuild_ratings` y sirve de respaldo cuando el estado
+previo de un review no se conoce (p. ej. tras `queryset.update()`).
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Round
+
+from .models import Product, Review
+
+STARS = range(1, 6)
+RATING_FIELDS = Product.RATING_FIELDS
+
+
+def rating_delta(old_state, new_state):
+    """
+    Calcula cuánto cambia cada contador al pasar de un estado a otro.
+
+    Args:
+        old_state: (rating, is_approved) antes del cambio, o None
+        new_state: (rating, is_approved) después del cambio, o None
+
+    Returns:
+        dict: {campo: delta} solo con los campos que cambian
+    """
+    delta = {}
+
+    def add(state, sign):
+        if state is None:
+            return
+        rating, approved = state
+        if not approved:
+            return
+        delta['rating_count'] = delta.get('rating_count', 0) + sign
+        delta['rating_sum'] = delta.get('rating_sum', 0) + sign * rating
+        key = f'rating_{rating}'
+        delta[key] = delta.get(key, 0) + sign
+
+    add(old_state, -1)
+    add(new_state, +1)
+    return {field: value for field, value in delta.items() if value}
+
+
+def apply_rating_change(product_id, old_state, new_state):
+    """
+    Aplica a un producto el cambio de estado de uno de sus reviews.
+
+    Returns:
+        bool: True si hubo que actualizar el producto
+    """
+    delta = rating_delta(old_state, new_state)
+    if not delta:
+        return False
+
+    count_delta = delta.get('rating_count', 0)
+    sum_delta = delta.get('rating_sum', 0)
+
+    updates = {field: F(field) + value for field, value in delta.items()}
+
+    # El promedio se calcula con los valores previos más el delta, en el
+    # mismo UPDATE (SQL evalúa todas las expresiones con la fila vieja)
+    updates['rating_avg'] = Case(
+        When(
+            rating_count__gt=-count_delta,
+            then=Round(
+                Cast(F('rating_sum') + sum_delta, FloatField()) /
+                Cast(F('rating_count') + count_delta, FloatField()),
+                2
+            )
+        ),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+    Product.objects.filter(pk=product_id).update(**updates)
+    return True
+
+
+def rebuild_product_ratings(product_ids=None, batch_size=500):
+    """
+    Recalcula desde cero los agregados de calificaciones.
+
+    Args:
+        product_ids: Iterable de ids a recalcular (None = todos)
+        batch_size: Tamaño de lote para bulk_update
+
+    Returns:
+        int: Cantidad de productos con al menos un review aprobado
+    """
+    reviews = Review.objects.filter(is_approved=True)
+    products = Product.objects.all()
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        reviews = reviews.filter(product_id__in=product_ids)
+        products = products.filter(pk__in=product_ids)
+
+    stats = reviews.values('product_id').annotate(
+        count=Count('id'),
+        total=Sum('rating'),
+        **{
+            f'stars_{stars}': Count('id', filter=Q(rating=stars))
+            for stars in STARS
+        }
+    ).order_by()
+
+    to_update = []
+    for row in stats.iterator():
+        product = Product(pk=row['product_id'])
+        product.rating_count = row['count']
+        product.rating_sum = row['total']
+        product.rating_avg = (Decimal(row['total']) / row['count']).quantize(Decimal('0.01'))
+        for stars in STARS:
+            setattr(product, f'rating_{stars}', row[f'stars_{stars}'])
+        to_update.append(product)
+
+    with transaction.atomic():
+        products.update(**{field: 0 for field in RATING_FIELDS})
+        Product.objects.bulk_update(to_update, RATING_FIELDS, batch_size=batch_size)
+
+    return len(to_update)
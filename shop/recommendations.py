@@ -0,0 +1,182 @@
+"""
+Recomendaciones "comprados juntos" a partir de las órdenes.
+
+`ProductCooccurrence` guarda, para cada producto, los productos que
+aparecen con él en las mismas órdenes y en cuántas órdenes coinciden.
+
+- `rebuild_cooccurrence` (`manage.py rebuild_cooccurrence`) recorre
+  OrderItem una vez ordenado por orden, cuenta los pares con un
+  `Counter` y guarda los TOP_K vecinos de cada producto. Es el cálculo
+  exacto; conviene programarlo (cron diario).
+- `record_order_cooccurrence` suma una orden nueva con tres consultas,
+  sin importar la cantidad de productos: se llama desde el checkout
+  después de confirmar la transacción. Entre reconstrucciones la tabla
+  puede tener más de TOP_K vecinos por producto y los pares nuevos
+  empiezan en 1 aunque antes se hubieran descartado por poco
+  frecuentes; la siguiente reconstrucción lo corrige.
+- `frequently_bought_together` y `recommended_for_cart` leen la tabla
+  con una sola consulta sobre el índice (product, -count).
+
+No se cuentan las órdenes canceladas, y las órdenes con más de
+MAX_BASKET productos distintos se ignoran: aportan muchos pares y poca
+señal.
+"""
+
+import heapq
+from collections import Counter, defaultdict
+from itertools import combinations
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import OrderItem, Product, ProductCooccurrence
+
+# Vecinos guardados por producto
+TOP_K = 20
+MAX_BASKET = 50
+
+# Un par (a, b) se guarda como un solo entero en el Counter: ocupa mucho
+# menos memoria que una tupla
+_PAIR_SHIFT = 32
+
+
+def _pair_key(a, b):
+    return (a << _PAIR_SHIFT) | b
+
+
+def _count_pairs(log=print):
+    """
+    Cuenta en cuántas órdenes aparece cada par de productos (a < b).
+
+    Returns:
+        Counter: {clave del par: órdenes}
+    """
+    pairs = Counter()
+    rows = (
+        OrderItem.objects.exclude(order__status='cancelled')
+        .order_by('order_id')
+        .values_list('order_id', 'product_id')
+        .iterator(chunk_size=10000)
+    )
+
+    orders = 0
+    current_order = None
+    basket = set()
+
+    def flush():
+        if 1 < len(basket) <= MAX_BASKET:
+            pairs.update(_pair_key(a, b) for a, b in combinations(sorted(basket), 2))
+
+    for order_id, product_id in rows:
+        if order_id != current_order:
+            flush()
+            basket = set()
+            current_order = order_id
+            orders += 1
+            if orders % 100000 == 0:
+                log(f'  {orders:,} órdenes leídas...')
+        basket.add(product_id)
+    flush()
+
+    return pairs, orders
+
+
+def rebuild_cooccurrence(top_k=TOP_K, min_count=1, batch_size=5000, log=print):
+    """
+    Recalcula la tabla completa desde OrderItem.
+
+    Args:
+        top_k: Vecinos guardados por producto
+        min_count: Órdenes en común mínimas para guardar un par
+
+    Returns:
+        dict: {'orders', 'pairs', 'rows'}
+    """
+    pairs, orders = _count_pairs(log)
+    mask = (1 << _PAIR_SHIFT) - 1
+
+    neighbours = defaultdict(list)
+    for key, count in pairs.items():
+        if count < min_count:
+            continue
+        a, b = key >> _PAIR_SHIFT, key & mask
+        neighbours[a].append((count, b))
+        neighbours[b].append((count, a))
+    distinct_pairs = len(pairs)
+    del pairs
+
+    rows = [
+        ProductCooccurrence(product_id=product_id, related_id=related_id, count=count)
+        for product_id, candidates in neighbours.items()
+        for count, related_id in heapq.nlargest(top_k, candidates)
+    ]
+
+    with transaction.atomic():
+        ProductCooccurrence.objects.all().delete()
+        ProductCooccurrence.objects.bulk_create(rows, batch_size=batch_size)
+
+    return {'orders': orders, 'pairs': distinct_pairs, 'rows': len(rows)}
+
+
+def record_order_cooccurrence(product_ids):
+    """
+    Suma una orden nueva a la tabla.
+
+    Tres consultas para cualquier cantidad de productos: leer los pares
+    existentes, incrementarlos con un UPDATE y crear los que faltan.
+    """
+    product_ids = set(product_ids)
+    if not 1 < len(product_ids) <= MAX_BASKET:
+        return
+
+    with transaction.atomic():
+        existing = ProductCooccurrence.objects.filter(
+            product_id__in=product_ids,
+            related_id__in=product_ids
+        )
+        known = set(existing.values_list('product_id', 'related_id'))
+        if known:
+            existing.update(count=F('count') + 1)
+
+        ProductCooccurrence.objects.bulk_create(
+            [
+                ProductCooccurrence(product_id=a, related_id=b, count=1)
+                for a in product_ids
+                for b in product_ids
+                if a != b and (a, b) not in known
+            ],
+            # Otra orden simultánea pudo crear el par: se pierde un +1
+            # hasta la próxima reconstrucción
+            ignore_conflicts=True,
+        )
+
+
+def frequently_bought_together(product, limit=4):
+    """Productos activos comprados con más frecuencia junto a `product`."""
+    return list(
+        Product.objects.filter(
+            bought_with__product_id=product.pk,
+            is_active=True
+        ).select_related('category').order_by('-bought_with__count')[:limit]
+    )
+
+
+def recommended_for_cart(product_ids, limit=4):
+    """
+    Productos comprados junto a los del carrito, sumando las coincidencias
+    con cada uno; excluye los que ya están en el carrito y los agotados.
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return []
+    return list(
+        Product.objects.filter(
+            bought_with__product_id__in=product_ids,
+            is_active=True,
+            stock__gt=0
+        ).exclude(
+            pk__in=product_ids
+        ).annotate(
+            together=Sum('bought_with__count')
+        ).select_related('category').order_by('-together')[:limit]
+    )
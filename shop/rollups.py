@@ -0,0 +1,202 @@
+"""
+Resúmenes diarios de ventas para el dashboard.
+
+Cada orden aporta a cuatro tablas, bajo la fecha local de su creación y
+su estado actual:
+
+- `DailySalesRollup`: órdenes e ingresos (total de la orden)
+- `DailyCategorySalesRollup`: unidades e ingresos por categoría
+- `DailyProductSalesRollup`: unidades e ingresos por producto
+- `DailyPaymentSalesRollup`: órdenes e ingresos por método de pago
+
+Los aportes se aplican con UPDATE de expresiones F (o INSERT si la fila
+del día aún no existe), así que el dashboard lee unos cientos de filas
+sin importar el tamaño del historial de órdenes.
+
+- `record_new_order` se llama en el checkout, después de crear los items
+  (bulk_create no dispara señales).
+- Los cambios de estado y los borrados se aplican desde shop/signals.py:
+  el aporte se resta del estado anterior y se suma al nuevo.
+- `rebuild_sales_rollups` recalcula todo desde Order/OrderItem; lo usa
+  `manage.py rebuild_sales_rollups` para el backfill inicial o si los
+  datos se modificaron con `queryset.update()`.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    Order, OrderItem, DailySalesRollup, DailyCategorySalesRollup,
+    DailyProductSalesRollup, DailyPaymentSalesRollup,
+)
+
+# Estados que cuentan como venta efectiva en el dashboard
+PAID_STATUSES = ['confirmed', 'preparing', 'in_transit', 'delivered']
+
+ROLLUP_MODELS = (
+    DailySalesRollup,
+    DailyCategorySalesRollup,
+    DailyProductSalesRollup,
+    DailyPaymentSalesRollup,
+)
+
+
+def _bump(model, keys, deltas):
+    """Suma `deltas` a la fila identificada por `keys`, creándola si falta."""
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**keys).update(**updates):
+        return
+
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **deltas)
+    except IntegrityError:
+        # Otra transacción creó la fila entre el UPDATE y el INSERT
+        model.objects.filter(**keys).update(**updates)
+
+
+def _order_lines(order):
+    """Unidades e ingresos de la orden por producto (una consulta)."""
+    return list(
+        OrderItem.objects.filter(order=order).values(
+            'product_id', 'product__category_id'
+        ).annotate(
+            units=Sum('quantity'),
+            amount=Sum(F('quantity') * F('price'))
+        ).order_by()
+    )
+
+
+def _apply(order, status, sign, lines=None):
+    """Suma (sign=1) o resta (sign=-1) el aporte de la orden bajo `status`."""
+    if lines is None:
+        lines = _order_lines(order)
+
+    day = timezone.localdate(order.created_at)
+
+    _bump(
+        DailySalesRollup,
+        {'date': day, 'status': status},
+        {'orders_count': sign, 'revenue': sign * order.total},
+    )
+    _bump(
+        DailyPaymentSalesRollup,
+        {'date': day, 'status': status, 'payment_method': order.payment_method},
+        {'orders_count': sign, 'revenue': sign * order.total},
+    )
+
+    categories = {}
+    for line in lines:
+        _bump(
+            DailyProductSalesRollup,
+            {'date': day, 'status': status, 'product_id': line['product_id']},
+            {'quantity': sign * line['units'], 'revenue': sign * line['amount']},
+        )
+        quantity, revenue = categories.get(line['product__category_id'], (0, 0))
+        categories[line['product__category_id']] = (
+            quantity + line['units'],
+            revenue + line['amount'],
+        )
+
+    for category_id, (quantity, revenue) in categories.items():
+        _bump(
+            DailyCategorySalesRollup,
+            {'date': day, 'status': status, 'category_id': category_id},
+            {'quantity': sign * quantity, 'revenue': sign * revenue},
+        )
+
+
+def record_new_order(order):
+    """
+    Suma una orden recién creada (con sus items ya guardados).
+
+    Llamar dentro de la transacción que crea la orden.
+    """
+    _apply(order, order.status, 1)
+    order._loaded_status = order.status
+
+
+def record_status_change(order, old_status, new_status):
+    """Mueve el aporte de la orden de `old_status` a `new_status`."""
+    if old_status == new_status:
+        return
+    lines = _order_lines(order)
+    _apply(order, old_status, -1, lines)
+    _apply(order, new_status, 1, lines)
+
+
+def discard_order(order, status):
+    """Resta el aporte de una orden que se va a eliminar."""
+    _apply(order, status, -1)
+
+
+def rebuild_sales_rollups():
+    """
+    Recalcula todos los resúmenes desde Order/OrderItem.
+
+    Returns:
+        dict: Filas creadas por tabla
+    """
+    orders = Order.objects.annotate(
+        date=TruncDate('created_at')
+    ).order_by()
+    items = OrderItem.objects.annotate(
+        date=TruncDate('order__created_at')
+    ).order_by()
+
+    daily = [
+        DailySalesRollup(
+            date=row['date'], status=row['status'],
+            orders_count=row['orders_count'], revenue=row['revenue'],
+        )
+        for row in orders.values('date', 'status').annotate(
+            orders_count=Count('id'), revenue=Sum('total')
+        )
+    ]
+    payments = [
+        DailyPaymentSalesRollup(
+            date=row['date'], status=row['status'],
+            payment_method=row['payment_method'],
+            orders_count=row['orders_count'], revenue=row['revenue'],
+        )
+        for row in orders.values('date', 'status', 'payment_method').annotate(
+            orders_count=Count('id'), revenue=Sum('total')
+        )
+    ]
+    products = [
+        DailyProductSalesRollup(
+            date=row['date'], status=row['order__status'],
+            product_id=row['product_id'],
+            quantity=row['units'], revenue=row['amount'],
+        )
+        for row in items.values('date', 'order__status', 'product_id').annotate(
+            units=Sum('quantity'), amount=Sum(F('quantity') * F('price'))
+        )
+    ]
+    categories = [
+        DailyCategorySalesRollup(
+            date=row['date'], status=row['order__status'],
+            category_id=row['product__category_id'],
+            quantity=row['units'], revenue=row['amount'],
+        )
+        for row in items.values('date', 'order__status', 'product__category_id').annotate(
+            units=Sum('quantity'), amount=Sum(F('quantity') * F('price'))
+        )
+    ]
+
+    with transaction.atomic():
+        for model in ROLLUP_MODELS:
+            model.objects.all().delete()
+        DailySalesRollup.objects.bulk_create(daily, batch_size=500)
+        DailyPaymentSalesRollup.objects.bulk_create(payments, batch_size=500)
+        DailyProductSalesRollup.objects.bulk_create(products, batch_size=500)
+        DailyCategorySalesRollup.objects.bulk_create(categories, batch_size=500)
+
+    return {
+        'daily': len(daily),
+        'payments': len(payments),
+        'products': len(products),
+        'categories': len(categories),
+    }
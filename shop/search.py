@@ -0,0 +1,219 @@
+"""
+Motor de búsqueda de productos sobre SQLite FTS5.
+
+La tabla virtual `shop_product_fts` indexa nombre, SKU, marca y descripción
+de cada producto. Se mantiene sincronizada con `shop_product` mediante
+triggers, por lo que también cubre `queryset.update()` y `bulk_create`,
+que no disparan señales.
+
+En SQLite, algunas migraciones reconstruyen `shop_product` (crear tabla
+nueva, copiar, borrar la vieja) y los triggers se pierden con la tabla
+vieja; `install_search_index` se vuelve a ejecutar en `post_migrate`
+para recrearlos.
+
+El tokenizer `unicode61 remove_diacritics 2` pliega acentos tanto al
+indexar como al consultar: "tuberia" encuentra "tubería".
+
+Si la base de datos no es SQLite (o no tiene FTS5) se usa el filtro
+`icontains` de siempre.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'shop_product_fts'
+
+# Pesos BM25 por columna, en el mismo orden que la tabla virtual:
+# name, sku, marca, description
+BM25_WEIGHTS = (10.0, 8.0, 4.0, 1.0)
+
+# Caracteres con significado especial en la sintaxis de consulta de FTS5
+_FTS_SPECIAL_CHARS = re.compile(r'["*^:(){}\[\]+\-]')
+
+_fts_available = None
+
+# Tabla FTS5 de contenido externo: el texto vive en shop_product y la
+# tabla virtual sólo guarda el índice.
+_CREATE_TABLE_SQL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, sku, marca, description,
+        content='shop_product',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+_TRIGGERS_SQL = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON shop_product BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, name, sku, marca, description)
+            VALUES (new.id, new.name, new.sku, new.marca, new.description);
+        END
+    """,
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON shop_product BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, sku, marca, description)
+            VALUES ('delete', old.id, old.name, old.sku, old.marca, old.description);
+        END
+    """,
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+        AFTER UPDATE OF name, sku, marca, description ON shop_product BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, sku, marca, description)
+            VALUES ('delete', old.id, old.name, old.sku, old.marca, old.description);
+            INSERT INTO {FTS_TABLE}(rowid, name, sku, marca, description)
+            VALUES (new.id, new.name, new.sku, new.marca, new.description);
+        END
+    """,
+}
+
+
+def fts_available():
+    """
+    Indica si la tabla FTS5 existe en la base de datos actual.
+
+    El resultado se cachea por proceso; la tabla la crea una migración,
+    así que no cambia mientras el servidor está corriendo.
+    """
+    global _fts_available
+    if _fts_available is None:
+        if connection.vendor != 'sqlite':
+            _fts_available = False
+        else:
+            with connection.cursor() as cursor:
+                _fts_available = FTS_TABLE in connection.introspection.table_names(cursor)
+    return _fts_available
+
+
+def build_match_expression(query, match_any=False):
+    """
+    Convierte el texto del usuario en una expresión MATCH de FTS5.
+
+    Cada palabra se busca como prefijo y todas deben aparecer (AND
+    implícito), lo que da resultados útiles mientras se escribe:
+    "taladro perc" -> "taladro"* "perc"*
+
+    Con `match_any` basta con que aparezca una de las palabras:
+    "taladro perc" -> "taladro"* OR "perc"*
+
+    Returns:
+        str | None: Expresión MATCH, o None si no quedan términos
+    """
+    terms = []
+    for word in query.split():
+        word = _FTS_SPECIAL_CHARS.sub(' ', word).strip()
+        if word:
+            terms.append(f'"{word}"*')
+    return (' OR ' if match_any else ' ').join(terms) or None
+
+
+def search_products(queryset, query, match_any=False):
+    """
+    Filtra un queryset de productos por texto libre.
+
+    Con FTS5 disponible, el queryset se une a la tabla del índice, se
+    filtra con MATCH y se anota con `relevance` (BM25: menor es más
+    relevante), para poder ordenar con `order_by('relevance')`.
+
+    Args:
+        queryset: QuerySet de Product
+        query: Texto introducido por el usuario
+        match_any: Aceptar productos con cualquiera de las palabras
+
+    Returns:
+        QuerySet: Productos que coinciden
+    """
+    query = (query or '').strip()
+    if not query:
+        return queryset
+
+    if not fts_available():
+        words = query.split() if match_any else [query]
+        conditions = Q()
+        for word in words:
+            conditions |= (
+                Q(name__icontains=word) |
+                Q(description__icontains=word) |
+                Q(sku__icontains=word)
+            )
+        return queryset.filter(conditions)
+
+    match = build_match_expression(query, match_any)
+    if match is None:
+        return queryset.none()
+
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+
+    # Un solo JOIN con la tabla FTS (modelo ProductSearchIndex): SQLite
+    # recorre primero las coincidencias de MATCH y bm25() se calcula en
+    # esa misma pasada, sin subconsultas por fila
+    return queryset.filter(
+        search_index__isnull=False
+    ).filter(
+        RawSQL(f'"{FTS_TABLE}" MATCH %s', (match,), output_field=BooleanField())
+    ).annotate(
+        relevance=RawSQL(f'bm25("{FTS_TABLE}", {weights})', (), output_field=FloatField())
+    )
+
+
+def install_search_index(conn=None):
+    """
+    Crea la tabla FTS5 y sus triggers si no existen.
+
+    Si faltaba algún trigger, el índice pudo quedar desfasado y se
+    reconstruye completo.
+
+    Args:
+        conn: Conexión de base de datos (por defecto la conexión 'default')
+
+    Returns:
+        bool: True si se creó o reparó algo
+    """
+    global _fts_available
+    conn = conn or connection
+    if conn.vendor != 'sqlite':
+        return False
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+            (f'{FTS_TABLE}%',)
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [name for name in _TRIGGERS_SQL if name not in existing]
+
+        if FTS_TABLE in existing and not missing:
+            return False
+
+        cursor.execute(_CREATE_TABLE_SQL)
+        for name in missing:
+            cursor.execute(_TRIGGERS_SQL[name])
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
+
+    _fts_available = None
+    return True
+
+
+def uninstall_search_index(conn=None):
+    """Elimina la tabla FTS5 y sus triggers."""
+    global _fts_available
+    conn = conn or connection
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        for name in _TRIGGERS_SQL:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    _fts_available = None
+
+
+def rebuild_search_index():
+    """Reconstruye el índice FTS5 completo a partir de `shop_product`."""
+    if not fts_available():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
+    return True
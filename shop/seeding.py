@@ -0,0 +1,418 @@
+"""
+Generador de datos sintéticos a escala de producción.
+
+`seed_scale()` crea categorías, productos, usuarios, órdenes, reviews,
+wishlists y carritos con `bulk_create` por lotes, sin pasar por los
+signals. Los datos son deterministas: la misma semilla y la misma fecha
+base (`epoch`, por defecto SEED_EPOCH) producen la misma base, fechas
+incluidas, así los benchmarks son comparables entre commits. Todas las
+fechas se cuentan hacia atrás desde `epoch`, nunca desde la hora actual.
+
+Distribuciones:
+
+- Popularidad de productos tipo Zipf: pocos productos concentran la
+  mayoría de las ventas, reviews y favoritos.
+- Precios log-normales; ~8% de productos sin stock y ~4% inactivos.
+- Órdenes repartidas en los `days` días previos a `epoch`; las viejas
+  están casi todas entregadas o canceladas y las recientes, pendientes o
+  en curso.
+- Calificaciones sesgadas hacia 4-5 estrellas, solo de compras entregadas.
+
+Al terminar se recalculan los agregados desnormalizados (ratings y
+resúmenes de ventas) y se invalida la caché del catálogo.
+
+Todo lo generado usa el prefijo `seed-` (SKU, slug, usuario, número de
+orden) para poder borrarlo con `clear_seed_data()`.
+"""
+
+import random
+from contextlib import contextmanager
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import pre_delete
+
+from .cache import invalidate_catalog
+from .models import (
+    Cart, CartItem, Category, Order, OrderItem, Product, Review,
+    UserProfile, Wishlist, WishlistItem,
+)
+from .ratings import rebuild_product_ratings
+from .rollups import rebuild_sales_rollups
+from .specs import apply_spec_columns
+
+SEED_PREFIX = 'seed-'
+SEED_PASSWORD = 'seed-password'
+
+# Fecha base de los datos generados (ver docstring)
+SEED_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+CATEGORY_NAMES = [
+    'Herramientas Eléctricas', 'Herramientas Manuales', 'Pinturas', 'Electricidad',
+    'Plomería', 'Tornillería', 'Jardinería', 'Construcción', 'Iluminación',
+    'Seguridad Industrial', 'Adhesivos', 'Cerrajería', 'Ferretería', 'Miscelánea',
+    'Baño', 'Cocina', 'Climatización', 'Medición', 'Soldadura', 'Abrasivos',
+]
+PRODUCT_NOUNS = [
+    'Taladro', 'Martillo', 'Destornillador', 'Llave', 'Sierra', 'Pintura', 'Cable',
+    'Tornillo', 'Brocha', 'Alicate', 'Cinta', 'Bombillo', 'Candado', 'Manguera',
+    'Lija', 'Nivel', 'Pegamento', 'Tubo', 'Grifo', 'Esmeriladora',
+]
+PRODUCT_ADJECTIVES = [
+    'Profesional', 'Compacto', 'Industrial', 'Reforzado', 'Inalámbrico', 'Clásico',
+    'Ajustable', 'Resistente', 'Ligero', 'Premium',
+]
+BRANDS = ['DeWalt', 'Stanley', 'Truper', 'Bosch', 'Makita', 'Black+Decker', 'Pretul', '3M']
+MATERIALS = ['Acero', 'Aluminio', 'Plástico ABS', 'Madera', 'Cobre', 'Goma']
+VOLTAGES = ['', '', '110V', '220V', '12V']
+COLORS = ['Negro', 'Amarillo', 'Azul', 'Rojo', 'Gris', 'Verde']
+CITIES = [
+    ('Plaza', 'La Habana'), ('Centro Habana', 'La Habana'), ('Playa', 'La Habana'),
+    ('Santiago de Cuba', 'Santiago de Cuba'), ('Santa Clara', 'Villa Clara'),
+    ('Matanzas', 'Matanzas'), ('Holguín', 'Holguín'), ('Camagüey', 'Camagüey'),
+]
+
+# (estado, peso) para órdenes viejas y recientes (últimos 14 días)
+OLD_STATUS_WEIGHTS = [('delivered', 88), ('cancelled', 10), ('in_transit', 2)]
+RECENT_STATUS_WEIGHTS = [
+    ('pending', 30), ('confirmed', 20), ('preparing', 15),
+    ('in_transit', 15), ('delivered', 15), ('cancelled', 5),
+]
+RATING_WEIGHTS = [(5, 45), (4, 30), (3, 12), (2, 6), (1, 7)]
+
+DELIVERY_FEE = Decimal('5.00')
+REVIEW_RATE = 0.15
+WISHLIST_USER_RATE = 0.4
+CART_USER_RATE = 0.25
+
+
+@lru_cache(maxsize=None)
+def _auto_fields(model):
+    """
+    Campos con `auto_now` / `auto_now_add`. Se cachea la primera lectura,
+    hecha por `explicit_timestamps` antes de desactivarlos.
+    """
+    return tuple(
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    )
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Desactiva `auto_now` / `auto_now_add` de los modelos para sembrar
+    fechas derivadas de `epoch` (ver `_stamps`).
+    """
+    previous = [
+        (field, field.auto_now, field.auto_now_add)
+        for model in models
+        for field in _auto_fields(model)
+    ]
+    for field, _, _ in previous:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in previous:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _stamps(model, when):
+    """{campo: when} para los campos de fecha automáticos del modelo."""
+    return {field.name: when for field in _auto_fields(model)}
+
+
+class _Weighted:
+    """Elección ponderada con pesos acumulados precalculados."""
+
+    def __init__(self, rng, items, weights):
+        self.rng = rng
+        self.items = items
+        self.cum_weights = list(accumulate(weights))
+
+    def pick(self, k=1):
+        return self.rng.choices(self.items, cum_weights=self.cum_weights, k=k)
+
+
+def _chunks(total, size):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+def _create_catalog(rng, products, epoch, batch_size, log):
+    categories = Category.objects.bulk_create([
+        Category(
+            name=name,
+            slug=f'{SEED_PREFIX}cat-{i}',
+            description=f'{name} para el hogar y la industria',
+            **_stamps(Category, epoch - timedelta(days=730)),
+        )
+        for i, name in enumerate(CATEGORY_NAMES)
+    ])
+
+    created = 0
+    for start, count in _chunks(products, batch_size):
+        batch = []
+        for i in range(start, start + count):
+            noun = rng.choice(PRODUCT_NOUNS)
+            brand = rng.choice(BRANDS)
+            price = Decimal(str(round(min(rng.lognormvariate(3.0, 0.9), 2500), 2))) + Decimal('0.99')
+            batch.append(Product(
+                category=categories[rng.randrange(len(categories))],
+                name=f'{noun} {rng.choice(PRODUCT_ADJECTIVES)} {brand} {i:06d}',
+                description=(
+                    f'{noun} de la marca {brand}, ideal para trabajos de '
+                    f'{rng.choice(["hogar", "taller", "obra", "jardín"])}.'
+                ),
+                price=price,
+                stock=0 if rng.random() < 0.08 else rng.randint(1, 500),
+                is_active=rng.random() >= 0.04,
+                featured=rng.random() < 0.02,
+                sku=f'{SEED_PREFIX}{i:08d}',
+                marca=brand,
+                material=rng.choice(MATERIALS),
+                voltaje=rng.choice(VOLTAGES),
+                color=rng.choice(COLORS),
+                peso=Decimal(str(round(rng.uniform(0.05, 25), 2))),
+                # Uno por minuto hasta `epoch`: el orden por fecha sigue al de pk
+                **_stamps(Product, epoch - timedelta(minutes=products - i)),
+            ))
+        # bulk_create no pasa por Product.save
+        for product in batch:
+            apply_spec_columns(product)
+        with transaction.atomic():
+            Product.objects.bulk_create(batch)
+        created += count
+        log(f'  Productos: {created}/{products}')
+
+    rows = list(
+        Product.objects.filter(sku__startswith=SEED_PREFIX).order_by('pk').values_list('pk', 'price')
+    )
+    return [pk for pk, _ in rows], [price for _, price in rows]
+
+
+def _create_users(rng, users, epoch, batch_size, log):
+    password = make_password(SEED_PASSWORD)
+    created = 0
+    for start, count in _chunks(users, batch_size):
+        with transaction.atomic():
+            batch = User.objects.bulk_create([
+                User(
+                    username=f'{SEED_PREFIX}user{i:07d}',
+                    email=f'{SEED_PREFIX}user{i:07d}@example.com',
+                    first_name=f'Cliente {i}',
+                    password=password,
+                    date_joined=epoch - timedelta(days=rng.randint(0, 730)),
+                )
+                for i in range(start, start + count)
+            ])
+            # bulk_create no dispara los signals que crean perfil, carrito y wishlist
+            UserProfile.objects.bulk_create([
+                UserProfile(user=user, email_verified=True, **_stamps(UserProfile, user.date_joined))
+                for user in batch
+            ])
+            Cart.objects.bulk_create([Cart(user=user, **_stamps(Cart, epoch)) for user in batch])
+            Wishlist.objects.bulk_create([Wishlist(user=user, **_stamps(Wishlist, epoch)) for user in batch])
+        created += count
+        log(f'  Usuarios: {created}/{users}')
+
+    return list(
+        User.objects.filter(username__startswith=SEED_PREFIX).order_by('pk').values_list('pk', flat=True)
+    )
+
+
+def _create_orders(rng, orders, user_ids, product_ids, prices, popularity, epoch, days, batch_size, log):
+    old_status = _Weighted(rng, *zip(*OLD_STATUS_WEIGHTS))
+    recent_status = _Weighted(rng, *zip(*RECENT_STATUS_WEIGHTS))
+    rating = _Weighted(rng, *zip(*RATING_WEIGHTS))
+    reviewed = set()
+    reviews = 0
+
+    created = 0
+    for start, count in _chunks(orders, batch_size):
+        batch = []
+        lines = []
+        for i in range(start, start + count):
+            created_at = epoch - timedelta(seconds=rng.randint(0, days * 86400))
+            age_days = (epoch - created_at).days
+            status = (recent_status if age_days < 14 else old_status).pick()[0]
+            city, province = rng.choice(CITIES)
+
+            # Entre 1 y 6 líneas, la mayoría cortas
+            indexes = set(popularity.pick(min(6, 1 + int(rng.expovariate(0.8)))))
+            order_lines = [(index, rng.choice((1, 1, 1, 2, 2, 3, 5))) for index in indexes]
+            subtotal = sum(prices[index] * quantity for index, quantity in order_lines)
+
+            batch.append(Order(
+                user_id=user_ids[rng.randrange(len(user_ids))],
+                order_number=f'{SEED_PREFIX}{i:09d}',
+                delivery_address=f'Calle {rng.randint(1, 300)} #{rng.randint(1, 999)}',
+                delivery_city=city,
+                delivery_province=province,
+                contact_phone=f'+53 5{rng.randint(1000000, 9999999)}',
+                delivery_date=(created_at + timedelta(days=rng.randint(1, 5))).date(),
+                delivery_time=rng.choice(('morning', 'afternoon', 'evening')),
+                payment_method='cash' if rng.random() < 0.6 else 'transfer',
+                status=status,
+                subtotal=subtotal,
+                delivery_fee=DELIVERY_FEE,
+                total=subtotal + DELIVERY_FEE,
+                **_stamps(Order, created_at),
+            ))
+            lines.append(order_lines)
+
+        with transaction.atomic():
+            batch = Order.objects.bulk_create(batch)
+            items = []
+            review_batch = []
+            for order, order_lines in zip(batch, lines):
+                for index, quantity in order_lines:
+                    product_id = product_ids[index]
+                    items.append(OrderItem(
+                        order=order, product_id=product_id,
+                        quantity=quantity, price=prices[index],
+                    ))
+                    key = (product_id, order.user_id)
+                    if order.status == 'delivered' and key not in reviewed and rng.random() < REVIEW_RATE:
+                        reviewed.add(key)
+                        stars = rating.pick()[0]
+                        review_batch.append(Review(
+                            product_id=product_id,
+                            user_id=order.user_id,
+                            rating=stars,
+                            title=('Excelente' if stars >= 4 else 'Regular' if stars == 3 else 'No lo recomiendo'),
+                            comment='Reseña generada para pruebas de carga.',
+                            is_verified_purchase=True,
+                            helpful_count=int(rng.expovariate(0.5)),
+                            **_stamps(Review, min(epoch, order.created_at + timedelta(days=rng.randint(3, 20)))),
+                        ))
+            OrderItem.objects.bulk_create(items, batch_size=batch_size)
+            Review.objects.bulk_create(review_batch, batch_size=batch_size)
+            reviews += len(review_batch)
+
+        created += count
+        log(f'  Órdenes: {created}/{orders} ({reviews} reviews)')
+
+    return reviews
+
+
+def _create_wishlists_and_carts(rng, user_ids, product_ids, prices, popularity, epoch, batch_size, log):
+    wishlists = dict(Wishlist.objects.filter(user_id__in=user_ids).values_list('user_id', 'pk'))
+    carts = dict(Cart.objects.filter(user_id__in=user_ids).values_list('user_id', 'pk'))
+    wishlist_items = []
+    cart_items = []
+
+    for user_id in user_ids:
+        if rng.random() < WISHLIST_USER_RATE:
+            for index in set(popularity.pick(rng.randint(1, 15))):
+                # Parte de los favoritos se agregó con un precio mayor al actual
+                markup = Decimal('1.15') if rng.random() < 0.2 else Decimal('1')
+                wishlist_items.append(WishlistItem(
+                    wishlist_id=wishlists[user_id], product_id=product_ids[index],
+                    original_price=(prices[index] * markup).quantize(Decimal('0.01')),
+                    **_stamps(WishlistItem, epoch),
+                ))
+        if rng.random() < CART_USER_RATE:
+            for index in set(popularity.pick(rng.randint(1, 6))):
+                cart_items.append(CartItem(
+                    cart_id=carts[user_id], product_id=product_ids[index],
+                    quantity=rng.choice((1, 1, 2, 3)),
+                    **_stamps(CartItem, epoch),
+                ))
+
+    with transaction.atomic():
+        WishlistItem.objects.bulk_create(wishlist_items, batch_size=batch_size)
+        CartItem.objects.bulk_create(cart_items, batch_size=batch_size)
+    log(f'  Favoritos: {len(wishlist_items)}, items en carritos: {len(cart_items)}')
+    return len(wishlist_items), len(cart_items)
+
+
+def clear_seed_data():
+    """
+    Elimina todo lo generado por `seed_scale` (prefijo `seed-`).
+
+    Los resúmenes de ventas se recalculan al final, así que se desconecta
+    el signal que los descuenta orden por orden.
+    """
+    from .signals import discard_order_sales_rollup
+
+    pre_delete.disconnect(discard_order_sales_rollup, sender=Order)
+    try:
+        with transaction.atomic():
+            OrderItem.objects.filter(order__order_number__startswith=SEED_PREFIX).delete()
+            Order.objects.filter(order_number__startswith=SEED_PREFIX).delete()
+    finally:
+        pre_delete.connect(discard_order_sales_rollup, sender=Order)
+
+    with transaction.atomic():
+        User.objects.filter(username__startswith=SEED_PREFIX).delete()
+        Product.objects.filter(sku__startswith=SEED_PREFIX).delete()
+        Category.objects.filter(slug__startswith=SEED_PREFIX).delete()
+    rebuild_product_ratings()
+    rebuild_sales_rollups()
+    invalidate_catalog()
+
+
+def seed_scale(products, users, orders, seed=42, days=365, epoch=SEED_EPOCH, batch_size=5000, log=print):
+    """
+    Genera datos sintéticos deterministas.
+
+    Args:
+        products: Cantidad de productos
+        users: Cantidad de usuarios (clientes)
+        orders: Cantidad de órdenes
+        seed: Semilla del generador (misma semilla = mismos datos)
+        days: Rango de fechas de las órdenes hacia atrás
+        epoch: Fecha base de todas las fechas generadas
+        batch_size: Filas por bulk_create / transacción
+        log: Función para reportar el progreso
+
+    Returns:
+        dict: Filas creadas por tipo
+    """
+    rng = random.Random(seed)
+
+    with explicit_timestamps(
+        Category, Product, UserProfile, Cart, Wishlist, Order, Review, WishlistItem, CartItem,
+    ):
+        log('Catálogo...')
+        product_ids, prices = _create_catalog(rng, products, epoch, batch_size, log)
+
+        # Popularidad tipo Zipf sobre un orden aleatorio de productos
+        ranking = list(range(len(product_ids)))
+        rng.shuffle(ranking)
+        popularity = _Weighted(rng, ranking, [1 / (rank + 1) ** 1.1 for rank in range(len(ranking))])
+
+        log('Usuarios...')
+        user_ids = _create_users(rng, users, epoch, batch_size, log)
+
+        log('Órdenes y reviews...')
+        reviews = _create_orders(
+            rng, orders, user_ids, product_ids, prices, popularity, epoch, days, batch_size, log
+        )
+
+        log('Favoritos y carritos...')
+        wishlist_items, cart_items = _create_wishlists_and_carts(
+            rng, user_ids, product_ids, prices, popularity, epoch, batch_size, log
+        )
+
+    log('Recalculando agregados...')
+    rebuild_product_ratings()
+    rebuild_sales_rollups()
+    invalidate_catalog()
+
+    return {
+        'categories': len(CATEGORY_NAMES),
+        'products': len(product_ids),
+        'users': len(user_ids),
+        'orders': orders,
+        'reviews': reviews,
+        'wishlist_items': wishlist_items,
+        'cart_items': cart_items,
+    }
@@ -1,7 +1,18 @@
-from django.db.models.signals import post_save
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete, pre_delete, post_migrate
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile, Cart, Wishlist
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from .models import UserProfile, Cart, Wishlist, Product, Category, Review, Order
+from .search import FTS_TABLE, install_search_index
+from .cache import invalidate_catalog, invalidate_prices, invalidate_products
+from .ratings import apply_rating_change, rebuild_product_ratings
+from .rollups import record_status_change, discard_order
+from .presence import record_login, record_logout
+from .images import delete_derivatives, variant_names
+from .sqlite import configure_connection
+from .wishlist_notifications import record_product_changes
 
 
 @receiver(post_save, sender=User)
@@ -28,4 +39,116 @@ def save_user_profile(sender, instance, **kwargs):
 def create_user_wishlist(sender, instance, created, **kwargs):
     """Crear wishlist automáticamente al registrarse"""
     if created:
-        Wishlist.objects.get_or_create(user=instance)
\ No newline at end of file
+        Wishlist.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    """Nueva generación de la caché del catálogo al cambiar su estructura"""
+    invalidate_catalog()
+    if sender is not Product or kwargs.get('created'):
+        return
+    deleted = 'created' not in kwargs
+    if deleted or getattr(instance, '_loaded_price', None) != instance.price:
+        # Cambian los totales de los carritos que lo tienen
+        invalidate_prices()
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_reviewed_product_cache(sender, instance, **kwargs):
+    """Un review solo cambia los datos cacheados de su producto"""
+    invalidate_products([instance.product_id])
+
+
+@receiver(post_save, sender=Product)
+def record_wishlist_product_changes(sender, instance, created, raw=False, **kwargs):
+    """Registrar bajadas de precio y reposiciones para los avisos de la wishlist"""
+    if not created and not raw:
+        record_product_changes(instance)
+
+
+@receiver(post_delete, sender=Product)
+def delete_product_image_variants(sender, instance, **kwargs):
+    """Eliminar las miniaturas del producto borrado"""
+    delete_derivatives(variant_names(instance.image_variants))
+
+
+@receiver(post_save, sender=Review)
+def update_product_rating_on_save(sender, instance, created, **kwargs):
+    """Aplicar al producto el delta de calificación del review guardado"""
+    old_state = None if created else getattr(instance, '_rating_state', None)
+    
+    if not created and old_state is None:
+        # Estado previo desconocido (instancia no cargada de la BD)
+        rebuild_product_ratings([instance.product_id])
+    else:
+        apply_rating_change(instance.product_id, old_state, instance.rating_state)
+    
+    instance._rating_state = instance.rating_state
+
+
+@receiver(post_delete, sender=Review)
+def update_product_rating_on_delete(sender, instance, **kwargs):
+    """Descontar del producto la calificación del review eliminado"""
+    old_state = getattr(instance, '_rating_state', None) or instance.rating_state
+    apply_rating_change(instance.product_id, old_state, None)
+
+
+@receiver(post_save, sender=Order)
+def move_order_sales_rollup(sender, instance, created, **kwargs):
+    """
+    Mover la orden entre resúmenes de ventas si cambió su estado.
+
+    Las órdenes nuevas se suman en el checkout (rollups.record_new_order),
+    cuando sus items ya existen.
+    """
+    old_status = getattr(instance, '_loaded_status', None)
+    if not created and old_status is not None:
+        record_status_change(instance, old_status, instance.status)
+    instance._loaded_status = instance.status
+
+
+@receiver(pre_delete, sender=Order)
+def discard_order_sales_rollup(sender, instance, **kwargs):
+    """Restar la orden de los resúmenes antes de borrar sus items"""
+    discard_order(instance, getattr(instance, '_loaded_status', None) or instance.status)
+
+
+@receiver(user_logged_in)
+def track_login_session(sender, request, user, **kwargs):
+    """Agregar la sesión al índice de sesiones del usuario"""
+    if request is not None and hasattr(request, 'session'):
+        record_login(user, request.session)
+
+
+@receiver(user_logged_out)
+def untrack_logout_session(sender, request, user, **kwargs):
+    """Quitar la sesión del índice antes de que se vacíe"""
+    if request is not None and hasattr(request, 'session'):
+        record_logout(request.session)
+
+
+@receiver(post_migrate)
+def repair_product_search_index(sender, using, **kwargs):
+    """
+    Recrear los triggers FTS5 si una migración reconstruyó shop_product.
+
+    Solo actúa si el índice ya fue instalado por la migración 0010.
+    """
+    if sender.name != 'shop':
+        return
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    if FTS_TABLE in connection.introspection.table_names():
+        install_search_index(connection)
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Aplica los PRAGMAs de producción a cada conexión SQLite"""
+    configure_connection(sender, connection, **kwargs)
@@ -0,0 +1,322 @@
+"""
+Productos similares por contenido: TF-IDF del texto más especificaciones.
+
+Cada producto activo se representa con un vector disperso de norma 1:
+
+- Texto: nombre (con doble peso), descripción y uso recomendado, en
+  minúsculas, sin acentos, sin stopwords ni números. Peso
+  (1 + log tf) · idf; solo se guardan los MAX_TERMS términos de más peso.
+- Especificaciones: categoría, marca, material, potencia y voltaje como
+  rasgos "campo=valor", con peso idf (un valor común dice poco).
+
+Las dos partes se normalizan por separado y se combinan con TEXT_WEIGHT
+y SPEC_WEIGHT (0.8² + 0.6² = 1), así el producto punto de dos vectores
+es su similitud coseno. Los términos que aparecen en un solo producto no
+pueden acercarlo a otro y se descartan.
+
+`rebuild_similarity` (`manage.py rebuild_similarity`) no compara todos
+contra todos: con 100k productos serían 5·10⁹ pares. Recorre un índice
+invertido término → productos, con cada lista ordenada de mayor a menor
+peso, y acumula productos punto solo con los productos que comparten
+algún término. Por producto se visitan a lo sumo MAX_VISITS entradas:
+las de mayor aporte (peso en el producto × peso en el otro), eligiendo
+un umbral de aporte común a todos sus términos. Si el recorrido se
+cortó, los RESCORE mejores candidatos se vuelven a puntuar con el
+vector completo. Los resultados se escriben por bloques de BLOCK_SIZE
+productos, cada uno en su propia transacción corta: la tabla sigue
+disponible mientras se reconstruye.
+
+El resultado es aproximado: un vecino cuyo parecido viene de muchos
+aportes pequeños puede quedar fuera. En el catálogo sembrado (20k
+productos) el recall@12 contra la fuerza bruta es ~0,97, contando
+empates con el 12.º; shop/tests/test_similarity.py lo acota en un
+catálogo sintético pequeño. Subir MAX_VISITS o RESCORE mejora el recall
+a cambio de tiempo.
+
+Los productos nuevos no tienen vecinos hasta la siguiente reconstrucción
+(conviene programarla a diario); mientras tanto se recurre a la categoría.
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from operator import itemgetter, neg
+
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import Product, ProductSimilarity
+from .search import search_products
+
+# Vecinos guardados por producto
+TOP_N = 12
+# Similitud mínima para guardar un vecino
+MIN_SCORE = 0.05
+# Términos de texto que se conservan por producto
+MAX_TERMS = 24
+# Entradas del índice invertido visitadas por producto
+MAX_VISITS = 8000
+# Candidatos que se vuelven a puntuar cuando se cortó el recorrido
+RESCORE = 100
+# Pasos de la búsqueda binaria del umbral de aporte
+THRESHOLD_STEPS = 20
+# Productos por transacción al escribir
+BLOCK_SIZE = 1000
+
+TEXT_WEIGHT = 0.8
+SPEC_WEIGHT = 0.6
+
+SPEC_FIELDS = ('marca', 'material', 'potencia', 'voltaje')
+
+# Productos de la búsqueda relajada que abren las sugerencias
+FALLBACK_ANCHORS = 2
+
+STOPWORDS = frozenset("""
+    a al algo ante como con de del desde durante el en entre es esta este
+    la las lo los mas muy o para pero por que se sin sobre su sus tambien
+    un una uno unos unas y ideal marca tipo
+""".split())
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize(text):
+    """Minúsculas y sin acentos."""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text):
+    """Palabras útiles del texto (3+ letras, sin stopwords ni números)."""
+    return [
+        word for word in _WORD_RE.findall(normalize(text))
+        if len(word) > 2 and not word.isdigit() and word not in STOPWORDS
+    ]
+
+
+def _features(row):
+    """
+    Términos de texto y rasgos de especificaciones de una fila.
+
+    Returns:
+        (Counter de palabras, set de rasgos "campo=valor")
+    """
+    _, category_id, name, description, uso_recomendado, *specs = row
+    name_words = tokenize(name)
+    words = Counter(name_words + name_words)
+    words.update(tokenize(description))
+    words.update(tokenize(uso_recomendado))
+
+    traits = {f'categoria={category_id}'}
+    for field, value in zip(SPEC_FIELDS, specs):
+        value = ' '.join(normalize(value).split())
+        if value:
+            traits.add(f'{field}={value}')
+    return words, traits
+
+
+def _unit(weights):
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    return {term: w / norm for term, w in weights.items()} if norm else {}
+
+
+def build_vectors(log=print):
+    """
+    Vectores de todos los productos activos.
+
+    Returns:
+        (lista de pks, lista de vectores (array de términos, array de
+        pesos), df de cada término)
+    """
+    rows = (
+        Product.objects.filter(is_active=True)
+        .order_by('pk')
+        .values_list('pk', 'category_id', 'name', 'description', 'uso_recomendado', *SPEC_FIELDS)
+        .iterator(chunk_size=2000)
+    )
+
+    vocabulary = {}
+    df = Counter()
+    pks = []
+    documents = []
+    for row in rows:
+        words, traits = _features(row)
+        words = {vocabulary.setdefault(w, len(vocabulary)): tf for w, tf in words.items()}
+        traits = [vocabulary.setdefault(t, len(vocabulary)) for t in traits]
+        df.update(words)
+        df.update(traits)
+        pks.append(row[0])
+        documents.append((tuple(words.items()), tuple(traits)))
+    log(f'  {len(pks):,} productos, {len(vocabulary):,} términos.')
+
+    total = len(pks)
+    idf = {
+        term: math.log((1 + total) / (1 + count)) + 1
+        for term, count in df.items()
+        if count > 1
+    }
+
+    vectors = []
+    for words, traits in documents:
+        text = {t: (1 + math.log(tf)) * idf[t] for t, tf in words if t in idf}
+        if len(text) > MAX_TERMS:
+            text = dict(heapq.nlargest(MAX_TERMS, text.items(), key=itemgetter(1)))
+        specs = {t: idf[t] for t in traits if t in idf}
+
+        vector = {t: w * TEXT_WEIGHT for t, w in _unit(text).items()}
+        vector.update((t, w * SPEC_WEIGHT) for t, w in _unit(specs).items())
+        vector = _unit(vector)   # si falta una de las partes
+        vectors.append((array('i', vector), array('d', vector.values())))
+
+    return pks, vectors, df
+
+
+def _build_index(vectors):
+    """Índice invertido: término → (posiciones, pesos), de mayor a menor peso."""
+    postings = {}
+    for position, (terms, weights) in enumerate(vectors):
+        for term, weight in zip(terms, weights):
+            postings.setdefault(term, []).append((weight, position))
+
+    index = {}
+    for term, entries in postings.items():
+        entries.sort(reverse=True)
+        index[term] = (array('i', (p for _, p in entries)), array('d', (w for w, _ in entries)))
+    return index
+
+
+def _count_at_least(weights, limit):
+    """Entradas con peso >= limit en una lista de pesos descendente."""
+    return bisect_right(weights, -limit, key=neg)
+
+
+def _neighbours(position, vectors, index, top_n):
+    """Los `top_n` vecinos más cercanos de un producto: [(score, posición)]."""
+    terms, weights = vectors[position]
+    postings = [index[term] for term in terms]
+    counts = [len(positions) for positions, _ in postings]
+    truncated = sum(counts) > MAX_VISITS
+
+    if truncated:
+        # Umbral de aporte (peso × peso) que deja a lo sumo MAX_VISITS entradas
+        low, high = 0.0, max(weights) * max(term_weights[0] for _, term_weights in postings)
+        for _ in range(THRESHOLD_STEPS):
+            threshold = (low + high) / 2
+            visits = sum(
+                _count_at_least(term_weights, threshold / weight)
+                for (_, term_weights), weight in zip(postings, weights)
+            )
+            if visits > MAX_VISITS:
+                low = threshold
+            else:
+                high = threshold
+        counts = [
+            _count_at_least(term_weights, high / weight)
+            for (_, term_weights), weight in zip(postings, weights)
+        ]
+
+    scores = {}
+    for (positions, term_weights), weight, count in zip(postings, weights, counts):
+        for other, other_weight in zip(positions[:count], term_weights[:count]):
+            scores[other] = scores.get(other, 0.0) + weight * other_weight
+
+    scores.pop(position, None)
+    if not scores:
+        return []
+
+    if truncated:
+        query = dict(zip(terms, weights))
+        candidates = heapq.nlargest(RESCORE, scores, key=scores.__getitem__)
+        scores = {
+            other: sum(query.get(t, 0.0) * w for t, w in zip(*vectors[other]))
+            for other in candidates
+        }
+
+    return [
+        (score, other)
+        for other, score in heapq.nlargest(top_n, scores.items(), key=itemgetter(1))
+        if score >= MIN_SCORE
+    ]
+
+
+def rebuild_similarity(top_n=TOP_N, batch_size=5000, log=print):
+    """
+    Recalcula los vecinos de todos los productos activos.
+
+    Returns:
+        dict: {'products', 'terms', 'rows'}
+    """
+    pks, vectors, _ = build_vectors(log)
+    index = _build_index(vectors)
+
+    rows = 0
+    for start in range(0, len(pks), BLOCK_SIZE):
+        block = []
+        for position in range(start, min(start + BLOCK_SIZE, len(pks))):
+            block.extend(
+                ProductSimilarity(product_id=pks[position], similar_id=pks[other], score=round(score, 4))
+                for score, other in _neighbours(position, vectors, index, top_n)
+            )
+
+        with transaction.atomic():
+            ProductSimilarity.objects.filter(product_id__in=pks[start:start + BLOCK_SIZE]).delete()
+            ProductSimilarity.objects.bulk_create(block, batch_size=batch_size)
+        rows += len(block)
+        log(f'  {min(start + BLOCK_SIZE, len(pks)):,} productos procesados...')
+
+    # Productos desactivados desde la reconstrucción anterior
+    ProductSimilarity.objects.filter(product__is_active=False).delete()
+
+    return {'products': len(pks), 'terms': len(index), 'rows': rows}
+
+
+def similar_products(product, limit=4, exclude=()):
+    """Productos activos más parecidos a `product`."""
+    return list(
+        Product.objects.filter(
+            similar_to__product_id=product.pk,
+            is_active=True
+        ).exclude(
+            pk__in=exclude
+        ).select_related('category').order_by('-similar_to__score')[:limit]
+    )
+
+
+def similar_to_many(product_ids, limit=4):
+    """
+    Productos parecidos a un grupo (p. ej. los del comparador), sumando
+    la similitud con cada uno; excluye los del grupo.
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return []
+    return list(
+        Product.objects.filter(
+            similar_to__product_id__in=product_ids,
+            is_active=True
+        ).exclude(
+            pk__in=product_ids
+        ).annotate(
+            similarity=Sum('similar_to__score')
+        ).select_related('category').order_by('-similarity')[:limit]
+    )
+
+
+def search_fallback(query, limit=6):
+    """
+    Sugerencias para una búsqueda sin resultados.
+
+    Busca productos con cualquiera de las palabras (en lugar de todas) y
+    completa con los más parecidos a los mejores resultados.
+    """
+    anchors = search_products(Product.objects.filter(is_active=True), query, match_any=True)
+    if 'relevance' in anchors.query.annotations:
+        anchors = anchors.order_by('relevance')
+    anchors = list(anchors.select_related('category')[:FALLBACK_ANCHORS])
+    if not anchors:
+        return []
+    return anchors + similar_to_many([p.pk for p in anchors], limit - len(anchors))
@@ -0,0 +1,223 @@
+"""
+Especificaciones numéricas derivadas de los campos de texto del producto.
+
+`potencia`, `voltaje` y `dimensiones` se cargan como texto libre ("2HP",
+"110-220V", "10cm x 5cm x 2cm"). Aquí se convierten a columnas numéricas
+en unidades fijas, para filtrar y ordenar por rango en SQL:
+
+- potencia_w: vatios (W, kW, HP, CV)
+- voltaje_v: voltios; con varios valores ("110/220V") el mayor
+- largo_mm, ancho_mm, alto_mm: milímetros (mm, cm, m, pulgadas); las
+  medidas sin etiqueta se asignan en ese orden y las que no tienen
+  unidad usan la última unidad escrita (o cm): '120x60x75cm' son
+  tres medidas en cm
+
+La potencia y las medidas aceptan fracciones ("1/2 HP", "1 1/2 pulgada");
+el voltaje no, porque "110/220V" son dos valores.
+
+Lo que no se entiende queda en NULL. `Product.save` llama a
+`apply_spec_columns`; los productos creados con `bulk_create` o editados
+con `update()` se corrigen con `manage.py backfill_specs`. Las
+migraciones solo crean las columnas: el comando también se corre al
+desplegar la migración 0021 y cada vez que cambia este parser.
+
+El peso ya es un campo numérico en kilogramos y no necesita conversión.
+"""
+
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.db import transaction
+
+# Columnas calculadas y los campos de texto de los que salen
+SPEC_COLUMNS = ('potencia_w', 'voltaje_v', 'largo_mm', 'ancho_mm', 'alto_mm')
+SPEC_SOURCES = frozenset({'potencia', 'voltaje', 'dimensiones'})
+
+POWER_UNITS = {
+    'kw': 1000.0,
+    'w': 1.0,
+    'vatio': 1.0,
+    'watt': 1.0,
+    'hp': 745.7,
+    'cv': 735.5,
+}
+LENGTH_UNITS = {
+    'mm': 1.0,
+    'milimetro': 1.0,
+    'cm': 10.0,
+    'centimetro': 10.0,
+    'm': 1000.0,
+    'metro': 1000.0,
+    'in': 25.4,
+    'pulg': 25.4,
+    'pulgada': 25.4,
+    '"': 25.4,
+}
+DIMENSION_LABELS = {
+    'largo': 'largo_mm',
+    'longitud': 'largo_mm',
+    'ancho': 'ancho_mm',
+    'fondo': 'ancho_mm',
+    'profundidad': 'ancho_mm',
+    'alto': 'alto_mm',
+    'altura': 'alto_mm',
+}
+DIMENSION_COLUMNS = ('largo_mm', 'ancho_mm', 'alto_mm')
+
+_NUMBER = r'(\d+(?:[.,]\d+)?)'
+# Número con fracción opcional: '1 1/2', '3/4', '1,5'
+# (siempre completo: en '1/0 HP' no se lee '0 HP' ni en '20x30' '2')
+_QUANTITY = (
+    r'(?<![\d/.,])(\d+\s+\d+/[1-9]\d*|\d+/[1-9]\d*|\d+(?:[.,]\d+)?)'
+    r'(?!\d|[.,/]\d)'
+)
+_POWER_RE = re.compile(_QUANTITY + r'\s*(kw|w|vatios?|watts?|hp|cv)(?![a-z])')
+_VOLTAGE_RE = re.compile(_NUMBER + r'(?:\s*(?:-|/|a)\s*' + _NUMBER + r')?\s*(?:v|volts?|voltios?)(?![a-z])')
+_MEASURE_RE = re.compile(
+    r'(?:(' + '|'.join(DIMENSION_LABELS) + r')\s*:?\s*)?' + _QUANTITY +
+    r'\s*(milimetros?|mm|centimetros?|cm|metros?|m|pulgadas?|pulg|in|")?'
+    r'(?=\s*[x×]|(?![a-z]))'   # 'x' separa medidas: '20x30cm'
+)
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def _number(text):
+    """'1,5' -> 1.5, '3/4' -> 0.75, '1 1/2' -> 1.5"""
+    value = 0.0
+    for part in text.split():
+        numerator, _, denominator = part.partition('/')
+        if denominator:
+            value += int(numerator) / int(denominator)
+        else:
+            value += float(part.replace(',', '.'))
+    return value
+
+
+def _unit_factor(units, unit):
+    """Factor de una unidad escrita en singular o plural."""
+    return units.get(unit) or units.get(unit.rstrip('s'))
+
+
+def parse_power(text):
+    """'1500W' -> 1500.0, '2HP' -> 1491.4, '1/2 HP' -> 372.85; si no, None."""
+    text = _normalize(text)
+    match = _POWER_RE.search(text)
+    if match:
+        return round(_number(match.group(1)) * _unit_factor(POWER_UNITS, match.group(2)), 2)
+    if re.fullmatch(r'\s*' + _NUMBER + r'\s*', text):
+        return _number(text.strip())   # Solo el número: se asume W
+    return None
+
+
+def parse_voltage(text):
+    """'220V' -> 220.0, '110-220V' -> 220.0, '12V DC' -> 12.0; si no, None."""
+    values = []
+    for match in _VOLTAGE_RE.finditer(_normalize(text)):
+        values.extend(_number(group) for group in match.groups() if group)
+    return max(values) if values else None
+
+
+def parse_dimensions(text):
+    """
+    Largo, ancho y alto en milímetros.
+
+    '10cm x 5cm x 2cm' -> (100.0, 50.0, 20.0)
+    '100 x 50 mm'      -> (100.0, 50.0, None)
+    'Alto 1.2m'        -> (None, None, 1200.0)
+    """
+    measures = [
+        (label, _number(value), unit)
+        for label, value, unit in _MEASURE_RE.findall(_normalize(text))
+    ]
+    units = [unit for _, _, unit in measures if unit]
+    default_factor = _unit_factor(LENGTH_UNITS, units[-1]) if units else LENGTH_UNITS['cm']
+
+    result = dict.fromkeys(DIMENSION_COLUMNS)
+    unlabeled = []
+    for label, value, unit in measures:
+        factor = _unit_factor(LENGTH_UNITS, unit) if unit else default_factor
+        value = round(value * factor, 2)
+        if label:
+            result[DIMENSION_LABELS[label]] = value
+        else:
+            unlabeled.append(value)
+
+    free = [column for column in DIMENSION_COLUMNS if result[column] is None]
+    for column, value in zip(free, unlabeled):
+        result[column] = value
+    return tuple(result[column] for column in DIMENSION_COLUMNS)
+
+
+def spec_values(product):
+    """{columna: valor} calculados desde los campos de texto del producto."""
+    values = dict(zip(DIMENSION_COLUMNS, parse_dimensions(product.dimensiones)))
+    values['potencia_w'] = parse_power(product.potencia)
+    values['voltaje_v'] = parse_voltage(product.voltaje)
+    return values
+
+
+def apply_spec_columns(product):
+    """
+    Actualiza las columnas numéricas del producto (sin guardar).
+
+    Returns:
+        bool: True si alguna cambió
+    """
+    changed = False
+    for column, value in spec_values(product).items():
+        if getattr(product, column) != value:
+            setattr(product, column, value)
+            changed = True
+    return changed
+
+
+def backfill_spec_columns(model=None, batch_size=2000, log=print):
+    """
+    Recalcula las columnas de todos los productos, por lotes de pk.
+
+    Solo escribe los productos que cambian, así que volver a correrlo
+    cuesta una lectura de la tabla.
+
+    Args:
+        model: Modelo Product (el histórico, desde una migración)
+
+    Returns:
+        dict: {'products', 'updated'}
+    """
+    if model is None:
+        from .models import Product as model
+
+    stats = {'products': 0, 'updated': 0}
+    last_pk = 0
+    while True:
+        batch = list(
+            model.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .only('pk', *SPEC_SOURCES, *SPEC_COLUMNS)[:batch_size]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        # Un UPDATE por combinación de valores: los productos de un lote
+        # suelen repetirlas, y es mucho más rápido que `bulk_update`
+        changed = defaultdict(list)
+        for product in batch:
+            if apply_spec_columns(product):
+                values = tuple(getattr(product, column) for column in SPEC_COLUMNS)
+                changed[values].append(product.pk)
+        if changed:
+            with transaction.atomic():
+                for values, pks in changed.items():
+                    model.objects.filter(pk__in=pks).update(**dict(zip(SPEC_COLUMNS, values)))
+
+        stats['products'] += len(batch)
+        stats['updated'] += sum(len(pks) for pks in changed.values())
+        log(f"  {stats['products']:,} productos revisados, {stats['updated']:,} actualizados...")
+
+    return stats
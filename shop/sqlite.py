@@ -0,0 +1,121 @@
+"""
+Ajustes de SQLite para producción.
+
+Con la configuración por defecto de SQLite (journal `DELETE`, sin espera
+por bloqueos y transacciones diferidas) un checkout concurrente con una
+escritura del admin termina en "database is locked" y los lectores
+esperan detrás de los escritores. Al abrir cada conexión se aplican los
+PRAGMAs de `settings.SQLITE_PRAGMAS` (configurables desde `.env`):
+
+- journal_mode=WAL: los lectores no bloquean a los escritores ni al revés
+- busy_timeout: espera (ms) por el bloqueo en lugar de fallar enseguida
+- synchronous=NORMAL: seguro con WAL y mucho más rápido que FULL
+- mmap_size / cache_size: lecturas desde memoria
+- temp_store=MEMORY: tablas temporales (ORDER BY, GROUP BY) en memoria
+
+Las conexiones son persistentes (`CONN_MAX_AGE`), así que estos PRAGMAs
+se aplican una vez por conexión y no en cada petición.
+
+Para mantener las estadísticas del planificador al día, cada proceso
+ejecuta `PRAGMA optimize=0x10002` como mucho una vez cada
+`SQLITE_OPTIMIZE_INTERVAL` segundos al abrir una conexión. Un
+`PRAGMA optimize` simple solo mira las consultas que ya hizo la
+conexión, así que al abrirla no hace nada; 0x10002 revisa todas las
+tablas y analiza las que lo necesitan, como recomienda SQLite para
+conexiones de larga duración. Como corre dentro de una petición, antes
+se fija `PRAGMA analysis_limit` (SQLite lo aplica solo a partir de
+3.46): cada tabla se analiza leyendo unas cientos de filas, nunca
+entera. `manage.py sqlite_maintenance` hace el `ANALYZE` completo y el
+checkpoint del WAL (para cron).
+
+`manage.py benchmark_sqlite` compara el rendimiento con escritores en
+paralelo con y sin estos ajustes.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_optimize_lock = threading.Lock()
+_last_optimize = 0.0
+
+
+def pragma_statements(pragmas=None):
+    """
+    Sentencias PRAGMA a ejecutar en cada conexión.
+
+    Los valores vacíos se omiten (permite desactivar un PRAGMA desde .env).
+    """
+    if pragmas is None:
+        pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    return [
+        f'PRAGMA {name}={value}'
+        for name, value in pragmas.items()
+        if str(value).strip() != ''
+    ]
+
+
+def apply_pragmas(raw_connection, pragmas=None):
+    """Aplica los PRAGMAs a una conexión sqlite3."""
+    for statement in pragma_statements(pragmas):
+        raw_connection.execute(statement)
+
+
+# 0x10000: revisar todas las tablas, no solo las usadas por la conexión
+# 0x00002: analizar las que lo necesiten
+OPTIMIZE_STATEMENT = 'PRAGMA optimize=0x10002'
+
+# Filas leídas por índice al analizar desde una petición (el valor que
+# usa SQLite >= 3.46 para optimize); 0 restaura el ANALYZE completo
+OPTIMIZE_ANALYSIS_LIMIT = 400
+
+
+def maybe_optimize(raw_connection):
+    """
+    Ejecuta `PRAGMA optimize=0x10002` si pasó el intervalo configurado.
+
+    `optimize` solo analiza las tablas cuyas estadísticas lo necesitan, y
+    con OPTIMIZE_ANALYSIS_LIMIT cada análisis lee unas cientos de filas,
+    así que no alarga la petición que abrió la conexión. El límite se
+    quita al terminar para no recortar un `ANALYZE` posterior.
+    """
+    global _last_optimize
+
+    interval = getattr(settings, 'SQLITE_OPTIMIZE_INTERVAL', 0)
+    if not interval:
+        return
+
+    now = time.time()
+    with _optimize_lock:
+        if now - _last_optimize < interval:
+            return
+        _last_optimize = now
+
+    try:
+        raw_connection.execute(f'PRAGMA analysis_limit={OPTIMIZE_ANALYSIS_LIMIT}')
+        try:
+            raw_connection.execute(OPTIMIZE_STATEMENT)
+        finally:
+            raw_connection.execute('PRAGMA analysis_limit=0')
+    except sqlite3.Error as e:
+        logger.warning(f"PRAGMA optimize failed: {e}")
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Receptor de `connection_created`: ajusta las conexiones SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+
+    raw_connection = connection.connection
+    try:
+        apply_pragmas(raw_connection)
+    except sqlite3.Error as e:
+        logger.error(f"Could not apply SQLite PRAGMAs: {e}")
+        return
+
+    maybe_optimize(raw_connection)
@@ -0,0 +1,98 @@
+"""
+Etiquetas para imágenes de producto con `srcset` (ver shop/images.py).
+
+Uso:
+    {% load product_images %}
+    {% product_picture product sizes="(max-width: 768px) 100vw, 33vw" class="card-img-top product-image" %}
+    <img src="{% product_image_url product 160 %}" ...>
+
+Si el producto aún no tiene variantes, o son de una imagen anterior
+(las genera `manage.py generate_product_images`), se usa la original.
+"""
+
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+register = template.Library()
+
+DEFAULT_SIZES = '(max-width: 576px) 100vw, (max-width: 992px) 50vw, 33vw'
+
+
+def _variants(product, fmt):
+    variants = getattr(product, 'image_variants', None) or {}
+    if not product.image or variants.get('source') != product.image.name:
+        return []   # Imagen cambiada y variantes aún sin regenerar
+    return sorted(
+        ((int(width), name) for width, name in variants.get(fmt, {}).items()),
+        key=lambda item: item[0]
+    )
+
+
+def _srcset(entries):
+    return ', '.join(
+        f'{default_storage.url(name)} {width}w' for width, name in entries
+    )
+
+
+@register.simple_tag
+def product_image_url(product, width=320):
+    """URL de la variante JPEG más chica que cubre `width` (o la original)."""
+    entries = _variants(product, 'jpeg')
+    for entry_width, name in entries:
+        if entry_width >= int(width):
+            return default_storage.url(name)
+    if entries:
+        return default_storage.url(entries[-1][1])
+    return product.image.url if product.image else ''
+
+
+@register.simple_tag
+def product_picture(product, sizes=DEFAULT_SIZES, alt=None, loading='lazy', **attrs):
+    """
+    `<picture>` con fuentes WebP y JPEG en `srcset`.
+
+    Args:
+        product: Producto con `image` / `image_variants`
+        sizes: Atributo `sizes` (ancho que ocupa la imagen en la página)
+        alt: Texto alternativo (por defecto el nombre del producto)
+        loading: 'lazy' o 'eager'
+        **attrs: Atributos extra del `<img>` (class, style...)
+    """
+    alt = product.name if alt is None else alt
+    extra = format_html(
+        ''.join(f' {key}="{{}}"' for key in attrs),
+        *attrs.values()
+    )
+
+    jpeg = _variants(product, 'jpeg')
+    if not jpeg:
+        return format_html(
+            '<img src="{}" alt="{}" loading="{}"{}>',
+            product.image.url if product.image else '', alt, loading, extra
+        )
+
+    variants = product.image_variants
+    fallback_width, fallback_name = next(
+        (entry for entry in jpeg if entry[0] >= 320), jpeg[-1]
+    )
+    height = round(variants['height'] * fallback_width / variants['width'])
+
+    webp = _variants(product, 'webp')
+    webp_source = format_html(
+        '<source type="image/webp" srcset="{}" sizes="{}">', _srcset(webp), sizes
+    ) if webp else ''
+
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" '
+        'alt="{}" loading="{}" decoding="async"{}></picture>',
+        webp_source,
+        default_storage.url(fallback_name),
+        _srcset(jpeg),
+        sizes,
+        fallback_width,
+        height,
+        alt,
+        loading,
+        extra,
+    )
@@ -0,0 +1,93 @@
+"""
+Confirmación del checkout (paso 3) y su clave de idempotencia.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from shop.models import CartItem, Category, CheckoutIdempotencyKey, Order, Product
+
+CONFIRM_URL = reverse('shop:checkout') + '?step=3'
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class CheckoutReplayTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Herramientas', slug='herramientas')
+        cls.product = Product.objects.create(
+            category=category, name='Taladro', description='Descripción',
+            price=Decimal('20.00'), stock=10, sku='SKU-1',
+        )
+        # Los signals crean perfil y carrito
+        cls.user = User.objects.create(username='ana', email='ana@example.com')
+
+    def setUp(self):
+        CartItem.objects.create(cart=self.user.cart, product=self.product, quantity=3)
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['checkout_data'] = {
+            'step1': {
+                'delivery_address': 'Calle 1 #23',
+                'delivery_city': 'Centro',
+                'delivery_province': 'La Habana',
+                'contact_phone': '+5355555555',
+            },
+            'step2': {
+                'delivery_date': (date.today() + timedelta(days=2)).isoformat(),
+                'delivery_time': 'morning',
+                'payment_method': 'cash',
+            },
+        }
+        session.save()
+
+    def confirm(self, key):
+        return self.client.post(CONFIRM_URL, {'notes': '', 'idempotency_key': key})
+
+    def test_step_3_renders_a_fresh_key(self):
+        first = self.client.get(CONFIRM_URL).context['idempotency_key']
+        second = self.client.get(CONFIRM_URL).context['idempotency_key']
+        self.assertTrue(first)
+        self.assertNotEqual(first, second)
+
+    def test_replay_redirects_to_the_same_order(self):
+        response = self.confirm('clave-1')
+        order = Order.objects.get()
+        self.assertRedirects(
+            response, reverse('shop:order_detail', args=[order.pk]), fetch_redirect_response=False
+        )
+
+        with self.assertNumQueries(3):   # sesión, usuario y la clave
+            replay = self.confirm('clave-1')
+        self.assertRedirects(
+            replay, reverse('shop:order_detail', args=[order.pk]), fetch_redirect_response=False
+        )
+
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(CheckoutIdempotencyKey.objects.get().order, order)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 7)
+
+    def test_new_key_is_a_new_checkout(self):
+        self.confirm('clave-1')
+        # El carrito quedó vacío: un envío con otra clave no crea otra orden
+        response = self.confirm('clave-2')
+        self.assertRedirects(response, reverse('shop:cart'), fetch_redirect_response=False)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_of_another_user_is_not_replayed(self):
+        self.confirm('clave-1')
+        other = User.objects.create(username='luis')
+        self.client.force_login(other)
+
+        response = self.confirm('clave-1')
+        self.assertRedirects(response, reverse('shop:cart'), fetch_redirect_response=False)
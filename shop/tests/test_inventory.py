@@ -0,0 +1,210 @@
+"""
+Descuento de stock y reservas del checkout (shop/inventory.py).
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from shop.inventory import (
+    InsufficientStock, available_stock, convert_reservations, decrement_stock,
+    ensure_reservation, expire_reservations, reserve_stock, trim_reservation,
+)
+from shop.models import CartItem, Category, Product, StockReservation
+
+
+def _product(category, sku, stock):
+    return Product.objects.create(
+        category=category, name=f'Producto {sku}', description='Descripción',
+        price=Decimal('10.00'), stock=stock, sku=sku,
+    )
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    STOCK_RESERVATION_MINUTES=15,
+    STOCK_RESERVATION_REFRESH_MINUTES=5,
+)
+class InventoryTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Herramientas', slug='herramientas')
+        cls.drill = _product(category, 'SKU-1', stock=5)
+        cls.hammer = _product(category, 'SKU-2', stock=1)
+        cls.ana = User.objects.create(username='ana')
+        cls.luis = User.objects.create(username='luis')
+
+    def stock(self, product):
+        return Product.objects.values_list('stock', flat=True).get(pk=product.pk)
+
+
+class DecrementStockOutsideTransactionTests(SimpleTestCase):
+    # TestCase envuelve cada prueba en una transacción
+
+    def test_requires_transaction(self):
+        with self.assertRaises(RuntimeError):
+            decrement_stock([(1, 1)])
+
+
+class DecrementStockTests(InventoryTestCase):
+
+    def test_groups_repeated_lines(self):
+        with transaction.atomic():
+            decrement_stock([(self.drill.pk, 2), (self.drill.pk, 3)])
+        self.assertEqual(self.stock(self.drill), 0)
+
+    def test_last_unit_goes_to_one_checkout(self):
+        # Los dos checkouts leyeron stock=1; solo el primer UPDATE condicional
+        # encuentra la fila con stock suficiente
+        with transaction.atomic():
+            decrement_stock([(self.hammer.pk, 1)])
+
+        with self.assertRaises(InsufficientStock) as raised:
+            with transaction.atomic():
+                decrement_stock([(self.hammer.pk, 1)])
+
+        self.assertEqual(self.stock(self.hammer), 0)
+        [(product, quantity)] = raised.exception.shortages
+        self.assertEqual((product.pk, product.stock, quantity), (self.hammer.pk, 0, 1))
+
+    def test_all_lines_or_none(self):
+        with self.assertRaises(InsufficientStock):
+            with transaction.atomic():
+                decrement_stock([(self.drill.pk, 2), (self.hammer.pk, 2)])
+
+        self.assertEqual(self.stock(self.drill), 5)
+        self.assertEqual(self.stock(self.hammer), 1)
+
+
+class ReservationTests(InventoryTestCase):
+
+    def test_reservation_holds_stock_from_others(self):
+        reserve_stock(self.ana, [(self.drill.pk, 3)])
+
+        self.assertEqual(available_stock([self.drill.pk], self.luis), {self.drill.pk: 2})
+        self.assertEqual(available_stock([self.drill.pk], self.ana), {self.drill.pk: 5})
+        with self.assertRaises(InsufficientStock) as raised:
+            reserve_stock(self.luis, [(self.drill.pk, 3)])
+        self.assertEqual(raised.exception.shortages[0][0].stock, 2)
+        self.assertFalse(StockReservation.objects.filter(user=self.luis).exists())
+
+    def test_reserving_again_replaces_previous_reservation(self):
+        reserve_stock(self.ana, [(self.drill.pk, 3), (self.hammer.pk, 1)])
+        reserve_stock(self.ana, [(self.drill.pk, 1)])
+
+        self.assertEqual(
+            list(StockReservation.objects.filter(user=self.ana).values_list('product_id', 'quantity')),
+            [(self.drill.pk, 1)],
+        )
+
+    def test_expired_reservation_does_not_hold_stock(self):
+        reserve_stock(self.ana, [(self.drill.pk, 5)])
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(available_stock([self.drill.pk], self.luis), {self.drill.pk: 5})
+        reserve_stock(self.luis, [(self.drill.pk, 5)])
+
+    def test_expire_reservations_deletes_only_expired(self):
+        reserve_stock(self.ana, [(self.drill.pk, 1)])
+        reserve_stock(self.luis, [(self.drill.pk, 1)])
+        StockReservation.objects.filter(user=self.ana).update(expires_at=timezone.now())
+
+        self.assertEqual(expire_reservations(), 1)
+        self.assertEqual(list(StockReservation.objects.values_list('user', flat=True)), [self.luis.pk])
+
+    def test_convert_decrements_and_releases(self):
+        reserve_stock(self.ana, [(self.drill.pk, 2)])
+        with transaction.atomic():
+            convert_reservations(self.ana, [(self.drill.pk, 2)])
+
+        self.assertEqual(self.stock(self.drill), 3)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_convert_with_expired_reservation_checks_others(self):
+        reserve_stock(self.ana, [(self.drill.pk, 4)])
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        reserve_stock(self.luis, [(self.drill.pk, 3)])
+
+        with self.assertRaises(InsufficientStock):
+            with transaction.atomic():
+                convert_reservations(self.ana, [(self.drill.pk, 4)])
+        self.assertEqual(self.stock(self.drill), 5)
+
+
+class EnsureReservationTests(InventoryTestCase):
+
+    def test_reuses_fresh_reservation_with_one_read(self):
+        expires_at = ensure_reservation(self.ana, [(self.drill.pk, 2)])
+        with self.assertNumQueries(1):
+            self.assertEqual(ensure_reservation(self.ana, [(self.drill.pk, 2)]), expires_at)
+
+    def test_changed_cart_reserves_again(self):
+        ensure_reservation(self.ana, [(self.drill.pk, 2)])
+        ensure_reservation(self.ana, [(self.drill.pk, 2), (self.hammer.pk, 1)])
+
+        self.assertEqual(
+            dict(StockReservation.objects.filter(user=self.ana).values_list('product_id', 'quantity')),
+            {self.drill.pk: 2, self.hammer.pk: 1},
+        )
+
+    def test_refreshes_reservation_about_to_expire(self):
+        ensure_reservation(self.ana, [(self.drill.pk, 2)])
+        soon = timezone.now() + timedelta(minutes=1)
+        StockReservation.objects.update(expires_at=soon)
+
+        self.assertGreater(ensure_reservation(self.ana, [(self.drill.pk, 2)]), soon)
+
+
+class TrimReservationTests(InventoryTestCase):
+
+    def test_only_shrinks(self):
+        reserve_stock(self.ana, [(self.drill.pk, 3)])
+        trim_reservation(self.ana, self.drill.pk, 5)
+        self.assertEqual(StockReservation.objects.get().quantity, 3)
+        trim_reservation(self.ana, self.drill.pk, 1)
+        self.assertEqual(StockReservation.objects.get().quantity, 1)
+        trim_reservation(self.ana, self.drill.pk, 0)
+        self.assertFalse(StockReservation.objects.exists())
+
+
+class CartAvailabilityTests(InventoryTestCase):
+
+    def test_add_to_cart_excludes_units_held_by_others(self):
+        reserve_stock(self.ana, [(self.drill.pk, 4)])
+        self.client.force_login(self.luis)
+        url = reverse('shop:add_to_cart', args=[self.drill.pk])
+
+        response = self.client.post(url, {'quantity': 2}).json()
+        self.assertFalse(response['success'])
+        self.assertIn('Solo hay 1', response['message'])
+        self.assertTrue(self.client.post(url, {'quantity': 1}).json()['success'])
+
+    def test_cart_shows_available_stock(self):
+        reserve_stock(self.ana, [(self.drill.pk, 4)])
+        CartItem.objects.create(cart=self.luis.cart, product=self.drill, quantity=1)
+        self.client.force_login(self.luis)
+
+        [item] = self.client.get(reverse('shop:cart')).context['cart'].items.all()
+        self.assertEqual(item.product.stock, 1)
+
+    def test_cart_changes_release_the_hold(self):
+        item = CartItem.objects.create(cart=self.ana.cart, product=self.drill, quantity=3)
+        CartItem.objects.create(cart=self.ana.cart, product=self.hammer, quantity=1)
+        ensure_reservation(self.ana, [(self.drill.pk, 3), (self.hammer.pk, 1)])
+        self.client.force_login(self.ana)
+
+        self.client.post(reverse('shop:update_cart_item', args=[item.pk]), {'quantity': 1})
+        self.assertEqual(StockReservation.objects.get(product=self.drill).quantity, 1)
+
+        self.client.post(reverse('shop:remove_from_cart', args=[item.pk]))
+        self.assertFalse(StockReservation.objects.filter(product=self.drill).exists())
+
+        self.client.post(reverse('shop:clear_cart'))
+        self.assertFalse(StockReservation.objects.exists())
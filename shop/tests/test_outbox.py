@@ -0,0 +1,110 @@
+"""
+Envío de la bandeja de salida: reintentos, backoff y mensajes `dead`
+(shop/outbox.py).
+"""
+
+from datetime import timedelta
+from smtplib import SMTPException
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from shop.models import EmailOutbox
+from shop.outbox import CLAIM_LEASE, _retry_delay, deliver_pending, queue_email
+
+
+class FailingBackend(BaseEmailBackend):
+    """Servidor SMTP que rechaza todos los mensajes."""
+
+    def send_messages(self, email_messages):
+        raise SMTPException('550 buzón no disponible')
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS=60,
+    EMAIL_OUTBOX_RETRY_MAX_SECONDS=300,
+)
+class DeliverPendingTests(TestCase):
+
+    def setUp(self):
+        self.message = queue_email('Asunto', 'Texto', ['ana@example.com'])
+
+    def make_due(self):
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        self.assertEqual(
+            [_retry_delay(attempts).total_seconds() for attempts in range(1, 6)],
+            [60, 120, 240, 300, 300],
+        )
+
+    def test_sends_and_counts_the_attempt(self):
+        self.assertEqual(deliver_pending(), {'sent': 1, 'retried': 0, 'dead': 0})
+
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, EmailOutbox.STATUS_SENT)
+        self.assertEqual(self.message.attempts, 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(deliver_pending(), {'sent': 0, 'retried': 0, 'dead': 0})
+
+    def test_failure_is_retried_with_backoff(self):
+        before = timezone.now()
+        stats = deliver_pending(connection=FailingBackend())
+
+        self.assertEqual(stats, {'sent': 0, 'retried': 1, 'dead': 0})
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, EmailOutbox.STATUS_PENDING)
+        self.assertEqual(self.message.attempts, 1)
+        self.assertIn('550', self.message.last_error)
+        self.assertGreaterEqual(self.message.next_attempt_at, before + timedelta(seconds=60))
+
+        # No vuelve a intentarse antes de que venza el backoff
+        self.assertEqual(deliver_pending(connection=FailingBackend())['retried'], 0)
+
+        self.make_due()
+        deliver_pending(connection=FailingBackend())
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.attempts, 2)
+        self.assertGreaterEqual(self.message.next_attempt_at, timezone.now() + timedelta(seconds=110))
+
+    def test_dead_after_max_attempts(self):
+        for _ in range(2):
+            deliver_pending(connection=FailingBackend())
+            self.make_due()
+
+        self.assertEqual(deliver_pending(connection=FailingBackend())['dead'], 1)
+        self.message.refresh_from_db()
+        self.assertEqual((self.message.status, self.message.attempts), (EmailOutbox.STATUS_DEAD, 3))
+
+        self.make_due()
+        self.assertEqual(deliver_pending(), {'sent': 0, 'retried': 0, 'dead': 0})
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_abandoned_claim_counts_as_an_attempt(self):
+        # Un worker reclamó el mensaje y murió: al vencer el lease, otro lo
+        # reclama con el intento anterior ya contado
+        EmailOutbox.objects.update(
+            status=EmailOutbox.STATUS_SENDING,
+            attempts=1,
+            next_attempt_at=timezone.now() - CLAIM_LEASE,
+        )
+        deliver_pending()
+
+        self.message.refresh_from_db()
+        self.assertEqual((self.message.status, self.message.attempts), (EmailOutbox.STATUS_SENT, 2))
+
+    def test_claim_abandoned_on_every_attempt_goes_dead_unsent(self):
+        EmailOutbox.objects.update(
+            status=EmailOutbox.STATUS_SENDING,
+            attempts=3,
+            next_attempt_at=timezone.now(),
+        )
+
+        self.assertEqual(deliver_pending(), {'sent': 0, 'retried': 0, 'dead': 1})
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, EmailOutbox.STATUS_DEAD)
+        self.assertEqual(len(mail.outbox), 0)
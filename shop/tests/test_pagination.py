@@ -0,0 +1,66 @@
+"""
+Paginación por cursor firmado (shop/pagination.py).
+"""
+
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from shop.models import Category, Product
+from shop.pagination import (
+    InvalidCursor, decode_cursor, encode_cursor, order_with_tiebreaker, paginate_keyset,
+)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Herramientas', slug='herramientas')
+        # Precios repetidos: el desempate por id decide el orden
+        for i in range(23):
+            Product.objects.create(
+                category=category, name=f'Producto {i}', description='Descripción',
+                price=Decimal(10 + i % 4) + Decimal('0.50'), stock=5, sku=f'SKU-{i:02d}',
+            )
+
+    def walk(self, order_field, per_page=5):
+        """Recorre todas las páginas siguiendo los cursores."""
+        seen, cursor = [], None
+        while True:
+            page = paginate_keyset(Product.objects.all(), order_field, cursor, per_page)
+            seen.extend(product.pk for product in page)
+            if not page.has_next():
+                self.assertIsNone(page.next_cursor)
+                return seen
+            cursor = page.next_cursor
+
+    def test_pages_cover_the_ordering_exactly_once(self):
+        for order_field in ('price', '-price', '-created_at', 'name'):
+            with self.subTest(order_field=order_field):
+                expected = list(
+                    order_with_tiebreaker(Product.objects.all(), order_field).values_list('pk', flat=True)
+                )
+                self.assertEqual(self.walk(order_field), expected)
+
+    def test_cursor_round_trip(self):
+        product = Product.objects.order_by('pk').last()
+        value, pk = decode_cursor(encode_cursor('-price', product), '-price', Product)
+        self.assertEqual((value, pk), (product.price, product.pk))
+
+    def test_tampered_cursor_is_rejected(self):
+        product = Product.objects.first()
+        cursor = encode_cursor('price', product)
+        tampered = cursor[:-1] + ('A' if cursor[-1] != 'A' else 'B')
+
+        for bad in (tampered, 'no-es-un-cursor', ''.join(reversed(cursor))):
+            with self.subTest(cursor=bad), self.assertRaises(InvalidCursor):
+                paginate_keyset(Product.objects.all(), 'price', bad)
+
+    def test_cursor_of_another_ordering_is_rejected(self):
+        cursor = encode_cursor('price', Product.objects.first())
+        with self.assertRaises(InvalidCursor):
+            paginate_keyset(Product.objects.all(), '-price', cursor)
@@ -0,0 +1,448 @@
+"""
+Presupuestos de consultas SQL y tiempo por URL.
+
+Cada URL de shop/urls.py tiene al menos una fila en `BUDGETS` con la
+cantidad máxima de consultas y el tiempo máximo (ms) de la petición,
+medidos con la caché vacía (el peor caso). Si un cambio en una vista o
+template vuelve a introducir un N+1, la prueba falla mostrando las
+consultas repetidas.
+
+Los datos de prueba tienen volúmenes realistas (cientos de productos,
+órdenes y reviews) para que un N+1 se note en la cuenta de consultas.
+
+Para agregar una URL: sumar su fila a `BUDGETS`;
+`test_every_url_has_a_budget` falla mientras falte.
+"""
+
+import time
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Callable, NamedTuple, Optional
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from shop import urls as shop_urls
+from shop.instrumentation import fingerprint
+from shop.inventory import ensure_reservation
+from shop.models import (
+    Cart, CartItem, Category, CheckoutIdempotencyKey, Order, OrderItem, Product, Review,
+    UserProfile, Wishlist, WishlistItem,
+)
+from shop.ratings import rebuild_product_ratings
+from shop.rollups import rebuild_sales_rollups
+
+PASSWORD = 'presupuesto-123'
+
+# Volúmenes de los datos de prueba
+CATEGORIES = 6
+PRODUCTS = 240
+CUSTOMERS = 40
+ORDERS_PER_CUSTOMER = 5
+ITEMS_PER_ORDER = 4
+REVIEWS_PER_PRODUCT = 8
+WISHLIST_ITEMS = 12
+CART_ITEMS = 8
+
+
+class Budget(NamedTuple):
+    """Una fila de la tabla de presupuestos."""
+    url_name: str
+    max_queries: int
+    max_ms: int
+    user: Optional[str] = None           # None (anónimo), 'customer' o 'staff'
+    method: str = 'get'
+    kwargs: Optional[Callable] = None    # f(fixtures) -> kwargs de reverse()
+    data: Optional[Callable] = None      # f(fixtures) -> GET/POST data
+    setup: Optional[Callable] = None     # f(fixtures, client) antes de medir
+    query: str = ''                      # query string fija (p. ej. '?step=3')
+    ajax: bool = False
+    status: int = 200
+
+
+def _checkout_session(f, client):
+    session = client.session
+    session['checkout_data'] = {
+        'step1': {
+            'delivery_address': 'Calle 1 #23',
+            'delivery_city': 'Centro',
+            'delivery_province': 'La Habana',
+            'contact_phone': '+5355555555',
+        },
+        'step2': {
+            'delivery_date': (date.today() + timedelta(days=2)).isoformat(),
+            'delivery_time': 'morning',
+            'payment_method': 'cash',
+        },
+    }
+    session.save()
+
+
+def _reserved_cart(f, client):
+    ensure_reservation(
+        f.customer,
+        CartItem.objects.filter(cart__user=f.customer).values_list('product_id', 'quantity')
+    )
+
+
+def _compare_session(f, client):
+    session = client.session
+    session['compare_list'] = [p.pk for p in f.products[:3]]
+    session.save()
+
+
+def _processed_checkout_key(f, client):
+    CheckoutIdempotencyKey.objects.create(key='clave-procesada', user=f.customer, order=f.order)
+
+
+def _pending_verification(f, client):
+    profile = f.pending.profile
+    profile.verification_token = 'token-de-prueba'
+    profile.verification_token_created = timezone.now()
+    profile.save()
+
+
+# ==========================================
+# TABLA DE PRESUPUESTOS
+# ==========================================
+BUDGETS = [
+    # Catálogo (destacados, relacionados y vista rápida leen el stock
+    # actual: no se guarda en la caché del catálogo)
+    Budget('shop:home', 3, 500),
+    Budget('shop:product_list', 3, 500),
+    Budget('shop:product_list', 4, 500, data=lambda f: {'q': 'taladro'}),
+    Budget('shop:product_list', 3, 500, data=lambda f: {'category': f.category.slug, 'sort': 'price'}),
+    Budget('shop:product_list', 3, 500, data=lambda f: {'potencia_min': '800', 'voltaje_max': '230', 'sort': 'power_desc'}),
+    # Sin resultados: búsqueda con cualquiera de las palabras + similares
+    Budget('shop:product_list', 5, 500, data=lambda f: {'q': 'taladro inexistente'}),
+    Budget('shop:product_list', 7, 500, user='customer'),
+    # Relacionados: comprados juntos, similares y, si no alcanzan, de la misma categoría;
+    # el stock mostrado descuenta las reservas de otros compradores
+    Budget('shop:product_detail', 7, 500, kwargs=lambda f: {'pk': f.product.pk}),
+    Budget('shop:product_detail', 11, 500, user='customer', kwargs=lambda f: {'pk': f.product.pk}),
+    Budget('shop:product_quick_view', 2, 300, kwargs=lambda f: {'product_id': f.product.pk}, ajax=True),
+    # Paginado: producto, conteo y una página de reviews con su usuario
+    Budget('shop:product_reviews', 3, 500, kwargs=lambda f: {'product_id': f.product.pk}),
+    Budget('shop:product_reviews', 8, 500, user='customer', kwargs=lambda f: {'product_id': f.product.pk}),
+
+    # Autenticación
+    Budget('shop:register', 0, 500),
+    Budget('shop:login', 0, 300),
+    Budget('shop:login', 20, 500, method='post',
+           data=lambda f: {'username': f.customer.username, 'password': PASSWORD}, status=302),
+    Budget('shop:logout', 5, 300, user='customer', status=302),
+    Budget('shop:verify_email', 6, 500, kwargs=lambda f: {'token': 'token-de-prueba'},
+           setup=_pending_verification),
+    Budget('shop:resend_verification', 0, 300),
+
+    # Carrito: el stock se valida contra las reservas de otros compradores
+    # y achicar el carrito libera lo que sobra de la reserva propia
+    Budget('shop:cart', 8, 500, user='customer'),
+    Budget('shop:add_to_cart', 13, 300, user='customer', method='post',
+           kwargs=lambda f: {'product_id': f.products[-1].pk}, data=lambda f: {'quantity': 1}, ajax=True),
+    Budget('shop:update_cart_item', 10, 300, user='customer', method='post',
+           kwargs=lambda f: {'item_id': f.cart_item.pk}, data=lambda f: {'quantity': 2}, ajax=True),
+    Budget('shop:remove_from_cart', 7, 300, user='customer', method='post',
+           kwargs=lambda f: {'item_id': f.cart_item.pk}, ajax=True),
+    Budget('shop:clear_cart', 7, 300, user='customer', method='post', ajax=True),
+
+    # Checkout y órdenes
+    # Incluye la reserva de stock (lectura, BEGIN, bloqueo, reservas, DELETE, INSERT, COMMIT)
+    Budget('shop:checkout', 14, 500, user='customer'),
+    # Con la reserva vigente solo se lee (sin transacción de escritura)
+    Budget('shop:checkout', 7, 500, user='customer', query='?step=2',
+           setup=lambda f, client: (_checkout_session(f, client), _reserved_cart(f, client))),
+    # Confirmación: crece con las líneas del carrito (CART_ITEMS): un
+    # UPDATE de stock y los resúmenes de ventas por producto y categoría.
+    # Sin reserva previa se verifica el stock contra las reservas de otros
+    Budget('shop:checkout', 64, 1000, user='customer', method='post', query='?step=3',
+           data=lambda f: {'notes': ''}, setup=_checkout_session, status=302),
+    # Reenvío de una confirmación ya procesada: solo busca la clave
+    Budget('shop:checkout', 4, 300, user='customer', method='post', query='?step=3',
+           data=lambda f: {'notes': '', 'idempotency_key': 'clave-procesada'},
+           setup=_processed_checkout_key, status=302),
+    Budget('shop:order_detail', 6, 500, user='customer', kwargs=lambda f: {'order_id': f.order.pk}),
+    Budget('shop:order_history', 6, 500, user='customer'),
+
+    # Perfil
+    Budget('shop:profile', 6, 500, user='customer'),
+    Budget('shop:change_password', 4, 500, user='customer'),
+
+    # Panel de administración
+    Budget('shop:admin_dashboard', 18, 1000, user='staff'),
+    Budget('shop:admin_orders', 5, 800, user='staff'),
+    Budget('shop:admin_orders', 5, 800, user='staff', data=lambda f: {'status': 'pending'}),
+    Budget('shop:admin_order_detail', 5, 500, user='staff', kwargs=lambda f: {'order_id': f.order.pk}),
+    Budget('shop:admin_products', 5, 1000, user='staff'),
+    Budget('shop:admin_users', 4, 800, user='staff'),
+    Budget('shop:admin_user_detail', 12, 800, user='staff', kwargs=lambda f: {'user_id': f.customer.pk}),
+    Budget('shop:admin_user_online_status', 6, 300, user='staff', kwargs=lambda f: {'user_id': f.customer.pk}),
+    Budget('shop:admin_users_online_status', 4, 300, user='staff',
+           data=lambda f: {'ids': ','.join(str(u.pk) for u in f.customers[:20])}),
+    Budget('shop:admin_user_logout_all', 5, 300, user='staff', method='post',
+           kwargs=lambda f: {'user_id': f.customer.pk}, status=302),
+    Budget('shop:admin_request_metrics', 3, 300, user='staff'),
+    Budget('shop:admin_toggle_product_status', 5, 300, user='staff', method='post',
+           kwargs=lambda f: {'product_id': f.product.pk}, ajax=True),
+    Budget('shop:admin_update_stock', 5, 300, user='staff', method='post',
+           kwargs=lambda f: {'product_id': f.product.pk}, data=lambda f: {'action': 'add', 'quantity': 5},
+           ajax=True),
+    Budget('shop:admin_product_create', 4, 500, user='staff'),
+    Budget('shop:admin_product_edit', 5, 500, user='staff', kwargs=lambda f: {'product_id': f.product.pk}),
+    Budget('shop:admin_product_detail', 7, 500, user='staff', kwargs=lambda f: {'product_id': f.product.pk}),
+    Budget('shop:admin_product_delete', 15, 500, user='staff', method='post',
+           kwargs=lambda f: {'product_id': f.unsold.pk}, ajax=True),
+
+    # Reviews
+    Budget('shop:add_review', 8, 500, user='customer', kwargs=lambda f: {'product_id': f.delivered_product.pk}),
+    Budget('shop:edit_review', 7, 500, user='customer', kwargs=lambda f: {'review_id': f.review.pk}),
+    Budget('shop:delete_review', 8, 300, user='customer', method='post',
+           kwargs=lambda f: {'review_id': f.review.pk}, status=302),
+    Budget('shop:mark_review_helpful', 10, 300, user='customer', method='post',
+           kwargs=lambda f: {'review_id': f.other_review.pk}, ajax=True),
+
+    # Wishlist
+    Budget('shop:wishlist', 6, 500, user='customer'),
+    Budget('shop:add_to_wishlist', 10, 300, user='customer', method='post',
+           kwargs=lambda f: {'product_id': f.products[-1].pk}, ajax=True),
+    Budget('shop:remove_from_wishlist', 7, 300, user='customer', method='post',
+           kwargs=lambda f: {'item_id': f.wishlist_item.pk}, ajax=True),
+    Budget('shop:toggle_wishlist', 8, 300, user='customer', method='post',
+           kwargs=lambda f: {'product_id': f.products[-1].pk}, ajax=True),
+    Budget('shop:move_to_cart', 14, 300, user='customer', method='post',
+           kwargs=lambda f: {'item_id': f.wishlist_item.pk}, ajax=True),
+    Budget('shop:clear_wishlist', 5, 300, user='customer', method='post', ajax=True),
+
+    # Páginas estáticas
+    Budget('shop:about_us', 0, 300),
+    Budget('shop:faq', 0, 300),
+    Budget('shop:contact', 0, 300),
+
+    # Comparador
+    Budget('shop:compare_products', 2, 500,
+           data=lambda f: {'ids': ','.join(str(p.pk) for p in f.products[:4])}),
+    # Con menos de 4 productos se sugieren similares
+    Budget('shop:compare_products', 3, 500,
+           data=lambda f: {'ids': ','.join(str(p.pk) for p in f.products[:2])}),
+    Budget('shop:add_to_compare', 5, 300, method='post', data=lambda f: {'product_id': f.product.pk}),
+    Budget('shop:remove_from_compare', 4, 300, method='post',
+           data=lambda f: {'product_id': f.products[0].pk}, setup=_compare_session),
+    Budget('shop:clear_compare', 4, 300, method='post', setup=_compare_session),
+    Budget('shop:get_compare_list', 1, 300, setup=_compare_session),
+
+    # Estado del visitante
+    Budget('shop:me_state', 0, 300),
+    Budget('shop:me_state', 5, 300, user='customer'),
+
+    # Páginas de error (desarrollo)
+    Budget('shop:test_404', 0, 300, status=404),
+    Budget('shop:test_500', 0, 300, status=500),
+    Budget('shop:test_429', 0, 300, status=429),
+]
+
+
+class Fixtures:
+    """Referencias a los objetos sembrados que usan las filas."""
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class QueryBudgetTests(TestCase):
+    """Consultas y tiempo máximos por URL (ver BUDGETS)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        f = cls.fixtures = Fixtures()
+        password = make_password(PASSWORD)
+
+        categories = Category.objects.bulk_create([
+            Category(name=f'Categoría {i}', slug=f'categoria-{i}', description='Descripción')
+            for i in range(CATEGORIES)
+        ])
+        names = ['Taladro', 'Martillo', 'Pintura', 'Cable', 'Tornillos', 'Llave']
+        Product.objects.bulk_create([
+            Product(
+                category=categories[i % CATEGORIES],
+                name=f'{names[i % len(names)]} modelo {i}',
+                description=f'Descripción del producto {i} para uso profesional',
+                price=Decimal(10 + i % 90) + Decimal('0.99'),
+                stock=1000,
+                sku=f'SKU-{i:05d}',
+                featured=i % 10 == 0,
+                marca=f'Marca {i % 7}',
+            )
+            for i in range(PRODUCTS)
+        ])
+        products = list(Product.objects.order_by('pk'))
+
+        # Los signals crean perfil, carrito y wishlist de cada usuario
+        f.staff = User.objects.create(username='staff', password=password, is_staff=True)
+        f.customers = [
+            User.objects.create(
+                username=f'cliente{i}', email=f'cliente{i}@example.com',
+                password=password, first_name=f'Cliente {i}'
+            )
+            for i in range(CUSTOMERS)
+        ]
+        f.pending = User.objects.create(username='pendiente', password=password, is_active=False)
+        customers = f.customers
+
+        orders = Order.objects.bulk_create([
+            Order(
+                user=user,
+                order_number=f'ORD-{u:03d}{n:02d}',
+                delivery_address='Calle 1 #23',
+                delivery_city='Centro',
+                delivery_province='La Habana',
+                contact_phone='+5355555555',
+                delivery_date=date.today(),
+                delivery_time='morning',
+                payment_method=('cash', 'transfer')[n % 2],
+                status=[choice for choice, _ in Order.STATUS_CHOICES][(u + n) % len(Order.STATUS_CHOICES)],
+                subtotal=Decimal('0'),
+                total=Decimal('0'),
+            )
+            for u, user in enumerate(customers)
+            for n in range(ORDERS_PER_CUSTOMER)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=products[(o * ITEMS_PER_ORDER + k) % PRODUCTS],
+                quantity=1 + k,
+                price=products[(o * ITEMS_PER_ORDER + k) % PRODUCTS].price,
+            )
+            for o, order in enumerate(orders)
+            for k in range(ITEMS_PER_ORDER)
+        ])
+
+        Review.objects.bulk_create([
+            Review(
+                product=product,
+                user=customers[(p + r) % CUSTOMERS],
+                rating=1 + (p + r) % 5,
+                title=f'Review {r}',
+                comment='Buen producto, llegó a tiempo.',
+                is_verified_purchase=r % 2 == 0,
+            )
+            for p, product in enumerate(products[:PRODUCTS // 2])
+            for r in range(REVIEWS_PER_PRODUCT)
+        ])
+
+        wishlists = {w.user_id: w for w in Wishlist.objects.all()}
+        carts = {c.user_id: c for c in Cart.objects.all()}
+        WishlistItem.objects.bulk_create([
+            WishlistItem(
+                wishlist=wishlists[user.pk],
+                product=products[(u * 3 + k) % PRODUCTS],
+                original_price=products[(u * 3 + k) % PRODUCTS].price,
+            )
+            for u, user in enumerate(customers)
+            for k in range(WISHLIST_ITEMS)
+        ])
+        CartItem.objects.bulk_create([
+            CartItem(cart=carts[user.pk], product=products[(u * 5 + k) % PRODUCTS], quantity=1 + k % 3)
+            for u, user in enumerate(customers)
+            for k in range(CART_ITEMS)
+        ])
+
+        # Producto sin ventas (el único que se puede eliminar)
+        f.unsold = Product.objects.create(
+            category=categories[0], name='Producto sin ventas', description='Sin órdenes',
+            price=Decimal('5.00'), stock=10, sku='SKU-SIN-VENTAS'
+        )
+
+        rebuild_product_ratings()
+        rebuild_sales_rollups()
+        UserProfile.objects.update(email_verified=True)
+
+        f.products = products
+        f.product = products[0]
+        f.category = categories[0]
+        f.customer = customers[0]
+        f.order = Order.objects.filter(user=f.customer).first()
+        f.cart_item = CartItem.objects.filter(cart__user=f.customer).first()
+        f.wishlist_item = WishlistItem.objects.filter(wishlist__user=f.customer).first()
+        # Producto de una orden entregada del cliente, sin review suyo
+        f.delivered_product = Product.objects.filter(
+            orderitem__order__user=f.customer, orderitem__order__status='delivered'
+        ).exclude(reviews__user=f.customer).first()
+        f.review = Review.objects.filter(user=f.customer).first()
+        f.other_review = Review.objects.exclude(user=f.customer).first()
+
+    def setUp(self):
+        # Siempre con la caché vacía: se mide el peor caso
+        cache.clear()
+
+    def _client_for(self, budget):
+        # Sin relanzar excepciones: los 500 se miden como respuesta
+        client = Client(raise_request_exception=False)
+        if budget.user == 'customer':
+            client.force_login(self.fixtures.customer)
+        elif budget.user == 'staff':
+            client.force_login(self.fixtures.staff)
+        return client
+
+    def _measure(self, budget):
+        f = self.fixtures
+        client = self._client_for(budget)
+        if budget.setup:
+            budget.setup(f, client)
+        cache.clear()
+
+        url = reverse(budget.url_name, kwargs=budget.kwargs(f) if budget.kwargs else None) + budget.query
+        data = budget.data(f) if budget.data else {}
+        headers = {'X-Requested-With': 'XMLHttpRequest'} if budget.ajax else {}
+        request = getattr(client, budget.method)
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = request(url, data, headers=headers)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+        return response, queries.captured_queries, elapsed_ms
+
+    def test_url_budgets(self):
+        for budget in BUDGETS:
+            label = f'{budget.method.upper()} {budget.url_name} ({budget.user or "anónimo"})'
+            with self.subTest(label):
+                # Cada fila en su propio savepoint: las vistas que
+                # modifican datos no afectan a las filas siguientes
+                with transaction.atomic():
+                    response, queries, elapsed_ms = self._measure(budget)
+                    transaction.set_rollback(True)
+
+                self.assertEqual(response.status_code, budget.status)
+
+                if len(queries) > budget.max_queries:
+                    repeated = Counter(fingerprint(q['sql']) for q in queries).most_common(3)
+                    details = '\n'.join(f'  x{count} {sql}' for sql, count in repeated)
+                    self.fail(
+                        f'{label}: {len(queries)} consultas (presupuesto {budget.max_queries}).\n'
+                        f'Más repetidas:\n{details}'
+                    )
+                self.assertLessEqual(
+                    elapsed_ms, budget.max_ms,
+                    f'{label}: {elapsed_ms:.0f} ms (presupuesto {budget.max_ms} ms)'
+                )
+
+    def test_every_url_has_a_budget(self):
+        url_names = {
+            f'shop:{pattern.name}'
+            for pattern in shop_urls.urlpatterns
+            if isinstance(pattern, URLPattern) and pattern.name
+        }
+        budgeted = {budget.url_name for budget in BUDGETS}
+        self.assertEqual(url_names - budgeted, set(), 'URLs sin presupuesto en BUDGETS')
+        self.assertEqual(budgeted - url_names, set(), 'Presupuestos de URLs que ya no existen')
@@ -0,0 +1,113 @@
+"""
+Agregados de calificaciones de Product mantenidos por deltas
+(shop/ratings.py).
+"""
+
+from decimal import Decimal
+
+from django.contrib.admin import site
+from django.contrib.auth.models import User
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from shop.admin import ProductAdmin
+from shop.models import Category, Product, Review
+from shop.ratings import rating_delta, rebuild_product_ratings
+
+
+class RatingDeltaTests(SimpleTestCase):
+
+    def test_new_review(self):
+        self.assertEqual(
+            rating_delta(None, (4, True)),
+            {'rating_count': 1, 'rating_sum': 4, 'rating_4': 1},
+        )
+
+    def test_deleted_review(self):
+        self.assertEqual(
+            rating_delta((2, True), None),
+            {'rating_count': -1, 'rating_sum': -2, 'rating_2': -1},
+        )
+
+    def test_rating_change_keeps_count(self):
+        self.assertEqual(
+            rating_delta((2, True), (5, True)),
+            {'rating_sum': 3, 'rating_2': -1, 'rating_5': 1},
+        )
+
+    def test_unapproved_reviews_do_not_count(self):
+        self.assertEqual(rating_delta(None, (5, False)), {})
+        self.assertEqual(rating_delta((5, False), (1, False)), {})
+        self.assertEqual(
+            rating_delta((3, True), (3, False)),
+            {'rating_count': -1, 'rating_sum': -3, 'rating_3': -1},
+        )
+
+    def test_no_change(self):
+        self.assertEqual(rating_delta((3, True), (3, True)), {})
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class RatingAggregateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Herramientas', slug='herramientas')
+        cls.product = Product.objects.create(
+            category=category, name='Taladro', description='Descripción',
+            price=Decimal('20.00'), stock=10, sku='SKU-1',
+        )
+        cls.users = [User.objects.create(username=f'cliente{i}') for i in range(3)]
+
+    def aggregates(self):
+        return Product.objects.values(*Product.RATING_FIELDS).get(pk=self.product.pk)
+
+    def assertMatchesRebuild(self):
+        incremental = self.aggregates()
+        rebuild_product_ratings([self.product.pk])
+        self.assertEqual(incremental, self.aggregates())
+
+    def review(self, user, rating, **kwargs):
+        return Review.objects.create(product=self.product, user=user, rating=rating, **kwargs)
+
+    def test_create_update_and_delete(self):
+        first = self.review(self.users[0], 5)
+        second = self.review(self.users[1], 2)
+        self.review(self.users[2], 1, is_approved=False)
+
+        aggregates = self.aggregates()
+        self.assertEqual(
+            (aggregates['rating_count'], aggregates['rating_sum'], aggregates['rating_avg']),
+            (2, 7, 3.5),
+        )
+        self.assertMatchesRebuild()
+
+        second.rating = 4
+        second.save()
+        self.assertEqual(self.aggregates()['rating_avg'], 4.5)
+        self.assertMatchesRebuild()
+
+        first.is_approved = False
+        first.save()
+        self.assertMatchesRebuild()
+
+        second.delete()
+        aggregates = self.aggregates()
+        self.assertEqual((aggregates['rating_count'], aggregates['rating_avg']), (0, 0.0))
+        self.assertMatchesRebuild()
+
+    def test_admin_save_keeps_ratings(self):
+        # Producto abierto en el admin antes del review: guardarlo no pisa
+        # los agregados
+        model_admin = ProductAdmin(Product, site)
+        request = RequestFactory().post('/')
+        product = model_admin.get_object(request, str(self.product.pk))
+        self.review(self.users[0], 5)
+
+        product.name = 'Taladro percutor'
+        model_admin.save_model(request, product, form=None, change=True)
+
+        aggregates = self.aggregates()
+        self.assertEqual((aggregates['rating_count'], aggregates['rating_5']), (1, 1))
+        self.assertEqual(Product.objects.get(pk=self.product.pk).name, 'Taladro percutor')
@@ -0,0 +1,126 @@
+"""
+Resúmenes diarios de ventas: cambios de estado y borrado de órdenes
+(shop/rollups.py y shop/signals.py).
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from shop.models import (
+    Category, DailyCategorySalesRollup, DailyPaymentSalesRollup, DailyProductSalesRollup,
+    DailySalesRollup, Order, OrderItem, Product,
+)
+from shop.rollups import ROLLUP_MODELS, rebuild_sales_rollups, record_new_order
+
+
+def _snapshot():
+    """Filas con valores distintos de cero de cada tabla de resúmenes."""
+    return {
+        DailySalesRollup: set(
+            DailySalesRollup.objects.exclude(orders_count=0)
+            .values_list('date', 'status', 'orders_count', 'revenue')
+        ),
+        DailyPaymentSalesRollup: set(
+            DailyPaymentSalesRollup.objects.exclude(orders_count=0)
+            .values_list('date', 'status', 'payment_method', 'orders_count', 'revenue')
+        ),
+        DailyProductSalesRollup: set(
+            DailyProductSalesRollup.objects.exclude(quantity=0)
+            .values_list('date', 'status', 'product_id', 'quantity', 'revenue')
+        ),
+        DailyCategorySalesRollup: set(
+            DailyCategorySalesRollup.objects.exclude(quantity=0)
+            .values_list('date', 'status', 'category_id', 'quantity', 'revenue')
+        ),
+    }
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class SalesRollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Herramientas', slug='herramientas')
+        cls.drill, cls.hammer = [
+            Product.objects.create(
+                category=cls.category, name=name, description='Descripción',
+                price=price, stock=10, sku=f'SKU-{i}',
+            )
+            for i, (name, price) in enumerate([('Taladro', Decimal('20.00')), ('Martillo', Decimal('5.00'))])
+        ]
+        cls.user = User.objects.create(username='ana')
+
+    def create_order(self, status='pending'):
+        # Como en el checkout: orden, items con bulk_create y luego el resumen
+        order = Order.objects.create(
+            user=self.user, order_number=f'ORD-{Order.objects.count()}',
+            delivery_address='Calle 1 #23', delivery_city='Centro',
+            delivery_province='La Habana', contact_phone='+5355555555',
+            delivery_date=date.today(), delivery_time='morning', payment_method='cash',
+            status=status, subtotal=Decimal('50.00'), total=Decimal('55.00'),
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=self.drill, quantity=2, price=Decimal('20.00')),
+            OrderItem(order=order, product=self.hammer, quantity=2, price=Decimal('5.00')),
+        ])
+        record_new_order(order)
+        return order
+
+    def assertMatchesRebuild(self):
+        incremental = _snapshot()
+        rebuild_sales_rollups()
+        self.assertEqual(incremental, _snapshot())
+
+    def test_new_order(self):
+        order = self.create_order()
+        day = DailySalesRollup.objects.get()
+        self.assertEqual((day.status, day.orders_count, day.revenue), ('pending', 1, Decimal('55.00')))
+        self.assertEqual(
+            DailyCategorySalesRollup.objects.values_list('quantity', 'revenue').get(category=self.category),
+            (4, Decimal('50.00')),
+        )
+        self.assertEqual(order._loaded_status, 'pending')
+        self.assertMatchesRebuild()
+
+    def test_status_change_moves_the_order(self):
+        self.create_order()
+        order = Order.objects.get()   # Instancia cargada, como en el admin
+        order.status = 'confirmed'
+        order.save()
+
+        self.assertEqual(
+            set(DailySalesRollup.objects.values_list('status', 'orders_count')),
+            {('pending', 0), ('confirmed', 1)},
+        )
+        self.assertEqual(
+            DailyProductSalesRollup.objects.get(status='confirmed', product=self.drill).quantity, 2
+        )
+        self.assertMatchesRebuild()
+
+        # Guardar sin cambiar el estado no mueve nada
+        order.notes = 'Llamar antes'
+        order.save()
+        self.assertMatchesRebuild()
+
+    def test_delete_discards_the_order(self):
+        self.create_order()
+        kept = self.create_order(status='delivered')
+        order = Order.objects.get(status='pending')
+        order.status = 'cancelled'
+        order.save()
+        order.delete()
+
+        self.assertEqual(
+            _snapshot()[DailySalesRollup],
+            {(timezone.localdate(kept.created_at), 'delivered', 1, Decimal('55.00'))},
+        )
+        self.assertMatchesRebuild()
+
+        kept.delete()
+        self.assertEqual(_snapshot(), {model: set() for model in ROLLUP_MODELS})
@@ -0,0 +1,69 @@
+"""
+Búsqueda de productos con FTS5 (shop/search.py).
+"""
+
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from shop.models import Category, Product
+from shop.search import build_match_expression, fts_available, search_products
+
+
+class MatchExpressionTests(SimpleTestCase):
+
+    def test_prefix_terms(self):
+        self.assertEqual(build_match_expression('taladro perc'), '"taladro"* "perc"*')
+        self.assertEqual(build_match_expression('taladro perc', match_any=True), '"taladro"* OR "perc"*')
+
+    def test_special_characters_are_dropped(self):
+        self.assertEqual(build_match_expression('"cable" -(3x2.5)*'), '"cable"* "3x2.5"*')
+        self.assertIsNone(build_match_expression('"" * -'))
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class SearchProductsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Plomería', slug='plomeria')
+        names = ['Tubería de cobre', 'Codo de PVC', 'Llave de paso para tubería', 'Camión de juguete']
+        cls.products = [
+            Product.objects.create(
+                category=category, name=name, description='Descripción',
+                price=Decimal('10.00'), stock=5, sku=f'SKU-{i}',
+            )
+            for i, name in enumerate(names)
+        ]
+
+    def search(self, query):
+        return set(search_products(Product.objects.all(), query).values_list('name', flat=True))
+
+    def test_uses_fts(self):
+        self.assertTrue(fts_available())
+
+    def test_accents_are_folded(self):
+        expected = {'Tubería de cobre', 'Llave de paso para tubería'}
+        self.assertEqual(self.search('tuberia'), expected)
+        self.assertEqual(self.search('TUBERÍA'), expected)
+        self.assertEqual(self.search('tubér'), expected)
+        self.assertEqual(self.search('camion'), {'Camión de juguete'})
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.search('tuberia cobre'), {'Tubería de cobre'})
+        self.assertEqual(
+            set(search_products(Product.objects.all(), 'cobre pvc', match_any=True)
+                .values_list('name', flat=True)),
+            {'Tubería de cobre', 'Codo de PVC'},
+        )
+
+    def test_index_follows_updates(self):
+        Product.objects.filter(pk=self.products[1].pk).update(name='Codo de cañería')
+        self.assertEqual(self.search('caneria'), {'Codo de cañería'})
+        self.assertEqual(self.search('pvc'), set())
+
+    def test_relevance_ranks_name_matches_first(self):
+        results = search_products(Product.objects.all(), 'tuberia').order_by('relevance')
+        self.assertEqual(results[0].name, 'Tubería de cobre')
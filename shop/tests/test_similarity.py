@@ -0,0 +1,96 @@
+"""
+Vecinos aproximados de shop/similarity.py contra la fuerza bruta.
+
+El catálogo sintético imita al real: pocos términos muy comunes
+(categoría, marca) y muchos raros, con vectores de norma 1.
+"""
+
+import heapq
+import math
+import random
+from array import array
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from shop import similarity
+from shop.similarity import MIN_SCORE, _build_index, _neighbours
+
+PRODUCTS = 600
+TERMS = 120
+TERMS_PER_PRODUCT = 8
+TOP_N = 12
+
+
+def _catalog(seed=7):
+    rng = random.Random(seed)
+    # Popularidad tipo Zipf: el término 0 aparece en casi todos
+    popularity = [1 / (rank + 1) for rank in range(TERMS)]
+    vectors = []
+    for _ in range(PRODUCTS):
+        terms = set()
+        while len(terms) < TERMS_PER_PRODUCT:
+            terms.add(rng.choices(range(TERMS), popularity)[0])
+        weights = {term: rng.uniform(0.2, 1.0) for term in terms}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        vectors.append((array('i', weights), array('d', (w / norm for w in weights.values()))))
+    return vectors
+
+
+def _exact(position, vectors, top_n):
+    query = dict(zip(*vectors[position]))
+    scores = []
+    for other, (terms, weights) in enumerate(vectors):
+        if other == position:
+            continue
+        score = sum(query.get(t, 0.0) * w for t, w in zip(terms, weights))
+        if score >= MIN_SCORE:
+            scores.append((score, other))
+    return heapq.nlargest(top_n, scores)
+
+
+def _recall(vectors, index):
+    """Vecinos aproximados con score >= el del último exacto (cuenta empates)."""
+    hits = total = 0
+    for position in range(len(vectors)):
+        exact = _exact(position, vectors, TOP_N)
+        if not exact:
+            continue
+        cutoff = exact[-1][0] - 1e-9
+        approx = _neighbours(position, vectors, index, TOP_N)
+        hits += sum(1 for score, _ in approx if score >= cutoff)
+        total += len(exact)
+    return hits / total
+
+
+class NeighboursTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.vectors = _catalog()
+        cls.index = _build_index(cls.vectors)
+
+    def test_exact_without_truncation(self):
+        with mock.patch.object(similarity, 'MAX_VISITS', PRODUCTS * TERMS_PER_PRODUCT):
+            for position in range(0, PRODUCTS, 50):
+                approx = _neighbours(position, self.vectors, self.index, TOP_N)
+                exact = _exact(position, self.vectors, TOP_N)
+                self.assertEqual(
+                    [round(score, 9) for score, _ in approx],
+                    [round(score, 9) for score, _ in exact],
+                )
+
+    def test_recall_with_truncation(self):
+        # La mitad de las entradas que visitaría la fuerza bruta (~1200)
+        with mock.patch.object(similarity, 'MAX_VISITS', 600), \
+                mock.patch.object(similarity, 'RESCORE', 60):
+            self.assertGreaterEqual(_recall(self.vectors, self.index), 0.9)
+
+    def test_scores_are_exact_cosines(self):
+        with mock.patch.object(similarity, 'MAX_VISITS', 600):
+            for position in range(0, PRODUCTS, 50):
+                query = dict(zip(*self.vectors[position]))
+                for score, other in _neighbours(position, self.vectors, self.index, TOP_N):
+                    expected = sum(query.get(t, 0.0) * w for t, w in zip(*self.vectors[other]))
+                    self.assertAlmostEqual(score, expected)
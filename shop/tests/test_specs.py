@@ -0,0 +1,85 @@
+"""
+Conversión de las especificaciones de texto a columnas numéricas
+(shop/specs.py).
+"""
+
+from django.test import SimpleTestCase
+
+from shop.specs import parse_dimensions, parse_power, parse_voltage
+
+
+class ParsePowerTests(SimpleTestCase):
+
+    def test_units(self):
+        self.assertEqual(parse_power('1500W'), 1500.0)
+        self.assertEqual(parse_power('1,5 kW'), 1500.0)
+        self.assertEqual(parse_power('2HP'), 1491.4)
+        self.assertEqual(parse_power('1 CV'), 735.5)
+        self.assertEqual(parse_power('800 vatios'), 800.0)
+
+    def test_fractions(self):
+        self.assertEqual(parse_power('1/2 HP'), 372.85)
+        self.assertEqual(parse_power('3/4HP'), 559.28)
+        self.assertEqual(parse_power('1 1/2 HP'), 1118.55)
+
+    def test_invalid_fraction_is_null(self):
+        self.assertIsNone(parse_power('1/0 HP'))
+
+    def test_range_uses_upper_bound(self):
+        self.assertEqual(parse_power('500-800W'), 800.0)
+
+    def test_bare_number_is_watts(self):
+        self.assertEqual(parse_power('1500'), 1500.0)
+        self.assertEqual(parse_power(' 750,5 '), 750.5)
+
+    def test_unparseable(self):
+        self.assertIsNone(parse_power(''))
+        self.assertIsNone(parse_power(None))
+        self.assertIsNone(parse_power('Alta potencia'))
+        self.assertIsNone(parse_power('1/2'))
+
+
+class ParseVoltageTests(SimpleTestCase):
+
+    def test_single_value(self):
+        self.assertEqual(parse_voltage('220V'), 220.0)
+        self.assertEqual(parse_voltage('12V DC'), 12.0)
+
+    def test_ranges_use_highest_value(self):
+        self.assertEqual(parse_voltage('110-220V'), 220.0)
+        self.assertEqual(parse_voltage('110/220V'), 220.0)
+        self.assertEqual(parse_voltage('110 a 240 voltios'), 240.0)
+
+    def test_unparseable(self):
+        self.assertIsNone(parse_voltage('Batería'))
+        self.assertIsNone(parse_voltage('220'))
+
+
+class ParseDimensionsTests(SimpleTestCase):
+
+    def test_units(self):
+        self.assertEqual(parse_dimensions('10cm x 5cm x 2cm'), (100.0, 50.0, 20.0))
+        self.assertEqual(parse_dimensions('100 x 50 mm'), (100.0, 50.0, None))
+        self.assertEqual(parse_dimensions('2 x 1 m'), (2000.0, 1000.0, None))
+
+    def test_labels(self):
+        self.assertEqual(parse_dimensions('Alto 1.2m'), (None, None, 1200.0))
+        self.assertEqual(parse_dimensions('Largo: 30 cm, ancho 20'), (300.0, 200.0, None))
+
+    def test_fractions(self):
+        self.assertEqual(parse_dimensions('1/2 pulgada'), (12.7, None, None))
+        self.assertEqual(parse_dimensions('1 1/2 x 3/4 pulg'), (38.1, 19.05, None))
+
+    def test_compact_formats_share_the_trailing_unit(self):
+        self.assertEqual(parse_dimensions('20x30cm'), (200.0, 300.0, None))
+        self.assertEqual(parse_dimensions('120x60x75cm'), (1200.0, 600.0, 750.0))
+        self.assertEqual(parse_dimensions('50X30 cm'), (500.0, 300.0, None))
+        self.assertEqual(parse_dimensions('20×30×5 mm'), (20.0, 30.0, 5.0))
+        self.assertEqual(parse_dimensions('1.5mx2m'), (1500.0, 2000.0, None))
+
+    def test_bare_numbers_default_to_centimetres(self):
+        self.assertEqual(parse_dimensions('30 x 20 x 10'), (300.0, 200.0, 100.0))
+
+    def test_unparseable(self):
+        self.assertEqual(parse_dimensions(''), (None, None, None))
+        self.assertEqual(parse_dimensions('Compacto'), (None, None, None))
@@ -0,0 +1,56 @@
+"""
+Avisos de la wishlist: una bajada de precio se avisa una sola vez
+(shop/wishlist_notifications.py).
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from shop.models import Category, EmailOutbox, Product, WishlistItem
+from shop.wishlist_notifications import send_wishlist_notifications
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class PriceDropNotificationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Herramientas', slug='herramientas')
+        cls.product = Product.objects.create(
+            category=category, name='Taladro', description='Descripción',
+            price=Decimal('100.00'), stock=10, sku='SKU-1',
+        )
+        # Los signals crean la wishlist
+        cls.user = User.objects.create(username='ana', email='ana@example.com')
+        WishlistItem.objects.create(wishlist=cls.user.wishlist, product=cls.product)
+
+    def set_price(self, price):
+        # Instancia cargada, como en el admin: el signal compara con la BD
+        product = Product.objects.get(pk=self.product.pk)
+        product.price = Decimal(price)
+        product.save()
+
+    def test_repeated_drops_notify_once(self):
+        self.set_price('90.00')
+        self.assertEqual(send_wishlist_notifications()['emails'], 1)
+        self.assertEqual(WishlistItem.objects.get().notified_price, Decimal('90.00'))
+
+        # Sube y vuelve a bajar sin pasar del precio ya avisado
+        self.set_price('95.00')
+        self.set_price('90.00')
+        stats = send_wishlist_notifications()
+        self.assertEqual((stats['events'], stats['emails']), (1, 0))
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+
+    def test_lower_price_notifies_again(self):
+        self.set_price('90.00')
+        send_wishlist_notifications()
+
+        self.set_price('80.00')
+        self.assertEqual(send_wishlist_notifications()['emails'], 1)
+        self.assertEqual(WishlistItem.objects.get().notified_price, Decimal('80.00'))
+        self.assertEqual(EmailOutbox.objects.count(), 2)
@@ -51,6 +51,9 @@ urlpatterns = [
     path('admin-panel/usuario/<int:user_id>/', views.admin_user_detail, name='admin_user_detail'),
     # path('admin-panel/usuario/<int:user_id>/toggle-active/', views.admin_user_toggle_active, name='admin_user_toggle_active'),
     path('admin-panel/usuario/<int:user_id>/online-status/', views.admin_user_online_status, name='admin_user_online_status'),
+    path('admin-panel/usuarios/online-status/', views.admin_users_online_status, name='admin_users_online_status'),
+    path('admin-panel/usuario/<int:user_id>/cerrar-sesiones/', views.admin_user_logout_all, name='admin_user_logout_all'),
+    path('admin-panel/metricas/', views.admin_request_metrics, name='admin_request_metrics'),
     path('admin-panel/producto/<int:product_id>/toggle/', views.admin_toggle_product_status, name='admin_toggle_product_status'),
     path('admin-panel/producto/<int:product_id>/stock/', views.admin_update_stock, name='admin_update_stock'),
 
@@ -86,4 +89,7 @@ urlpatterns = [
     path('comparar/remover/', views.remove_from_compare, name='remove_from_compare'),
     path('comparar/limpiar/', views.clear_compare, name='clear_compare'),
     path('comparar/obtener/', views.get_compare_list, name='get_compare_list'),
+
+    # Estado del visitante (hidratación de páginas cacheadas)
+    path('me/state/', views.me_state, name='me_state'),
 ]
@@ -59,7 +59,10 @@ from .admin.users import (
     admin_users,
     admin_user_detail,
     admin_user_online_status,
+    admin_users_online_status,
+    admin_user_logout_all,
 )
+from .admin.metrics import admin_request_metrics
 
 # ==========================================
 # VISTAS DE REVIEWS Y WISHLIST
@@ -101,6 +104,11 @@ from .compare import (
     get_compare_list,
 )
 
+# ==========================================
+# ESTADO DEL VISITANTE (HIDRATACIÓN)
+# ==========================================
+from .state import me_state
+
 # ==========================================
 # ALL exports (para facilitar imports)
 # ==========================================
@@ -139,6 +147,9 @@ __all__ = [
     'admin_users',
     'admin_user_detail',
     'admin_user_online_status',
+    'admin_users_online_status',
+    'admin_user_logout_all',
+    'admin_request_metrics',
     # Reviews
     'add_review',
     'edit_review',
@@ -162,4 +173,6 @@ __all__ = [
     'remove_from_compare',
     'clear_compare',
     'get_compare_list',
+    # Estado del visitante
+    'me_state',
 ]
@@ -6,6 +6,7 @@ Organiza las vistas del panel de administración en submódulos:
 - orders: Gestión de órdenes
 - products: Gestión de productos
 - users: Gestión de usuarios
+- metrics: Métricas de rendimiento por URL
 """
 
 from .dashboard import admin_dashboard
@@ -23,7 +24,10 @@ from .users import (
     admin_users,
     admin_user_detail,
     admin_user_online_status,
+    admin_users_online_status,
+    admin_user_logout_all,
 )
+from .metrics import admin_request_metrics
 
 __all__ = [
     'admin_dashboard',
@@ -39,4 +43,7 @@ __all__ = [
     'admin_users',
     'admin_user_detail',
     'admin_user_online_status',
+    'admin_users_online_status',
+    'admin_user_logout_all',
+    'admin_request_metrics',
 ]
\ No newline at end of file
@@ -1,12 +1,16 @@
 from django.shortcuts import render
 from django.contrib.admin.views.decorators import staff_member_required
-from django.db.models import Sum, Count, F, Q, Avg
-from django.db.models.functions import TruncDate, TruncMonth
+from django.db.models import Sum, Count
+from django.db.models.functions import TruncMonth
 from django.utils import timezone
 from datetime import timedelta
 import json
 
-from ...models import Product, Order, OrderItem, User
+from ...models import (
+    Product, Order, User, DailySalesRollup, DailyCategorySalesRollup,
+    DailyProductSalesRollup, DailyPaymentSalesRollup,
+)
+from ...rollups import PAID_STATUSES
 
 
 @staff_member_required
@@ -14,25 +18,36 @@ def admin_dashboard(request):
     """
     Dashboard principal con estadísticas avanzadas y múltiples gráficos.
     
-    ✅ OPTIMIZADO: Consultas eficientes para todos los gráficos
+    ✅ OPTIMIZADO: Las ventas se leen de los resúmenes diarios
+    (shop/rollups.py), no de Order/OrderItem: el costo no crece con el
+    historial de órdenes.
     """
     
+    # Totales por estado (una consulta sobre los resúmenes)
+    status_totals = {
+        row['status']: row
+        for row in DailySalesRollup.objects.values('status').annotate(
+            count=Sum('orders_count'),
+            total=Sum('revenue')
+        ).order_by()
+    }
+    paid_count = sum(status_totals[s]['count'] for s in PAID_STATUSES if s in status_totals)
+    paid_revenue = sum(status_totals[s]['total'] for s in PAID_STATUSES if s in status_totals)
+    
     # ==========================================
     # ESTADÍSTICAS GENERALES
     # ==========================================
     total_products = Product.objects.filter(is_active=True).count()
-    total_orders = Order.objects.count()
+    total_orders = sum(row['count'] for row in status_totals.values())
     total_users = User.objects.filter(is_active=True).count()
     
     # Ingresos totales
-    total_revenue = Order.objects.filter(
-        status__in=['confirmed', 'preparing', 'in_transit', 'delivered']
-    ).aggregate(total=Sum('total'))['total'] or 0
+    total_revenue = paid_revenue
     
     # ==========================================
     # ALERTAS Y ESTADOS
     # ==========================================
-    pending_orders = Order.objects.filter(status='pending').count()
+    pending_orders = status_totals['pending']['count'] if 'pending' in status_totals else 0
     low_stock_products = Product.objects.filter(
         is_active=True,
         stock__lte=10,
@@ -45,12 +60,13 @@ def admin_dashboard(request):
     # ==========================================
     today = timezone.now()
     last_month = today - timedelta(days=30)
+    thirty_days_ago = timezone.localdate() - timedelta(days=30)
     
     # Órdenes del último mes
-    orders_last_month = Order.objects.filter(
-        created_at__gte=last_month,
-        status__in=['confirmed', 'preparing', 'in_transit', 'delivered']
-    ).count()
+    orders_last_month = DailySalesRollup.objects.filter(
+        date__gte=thirty_days_ago,
+        status__in=PAID_STATUSES
+    ).aggregate(count=Sum('orders_count'))['count'] or 0
     
     # Nuevos usuarios del último mes
     new_users_last_month = User.objects.filter(
@@ -58,9 +74,7 @@ def admin_dashboard(request):
     ).count()
     
     # Ticket promedio
-    avg_order_value = Order.objects.filter(
-        status__in=['confirmed', 'preparing', 'in_transit', 'delivered']
-    ).aggregate(avg=Avg('total'))['avg'] or 0
+    avg_order_value = paid_revenue / paid_count if paid_count else 0
     
     # ==========================================
     # ÓRDENES RECIENTES
@@ -73,15 +87,12 @@ def admin_dashboard(request):
     # ==========================================
     # GRÁFICO 1: VENTAS DIARIAS (Últimos 30 días)
     # ==========================================
-    thirty_days_ago = today - timedelta(days=30)
-    daily_sales = Order.objects.filter(
-        created_at__gte=thirty_days_ago,
-        status__in=['confirmed', 'preparing', 'in_transit', 'delivered']
-    ).annotate(
-        date=TruncDate('created_at')
+    daily_sales = DailySalesRollup.objects.filter(
+        date__gte=thirty_days_ago,
+        status__in=PAID_STATUSES
     ).values('date').annotate(
-        total=Sum('total'),
-        count=Count('id')
+        total=Sum('revenue'),
+        count=Sum('orders_count')
     ).order_by('date')
     
     # Preparar datos para Chart.js
@@ -97,32 +108,46 @@ def admin_dashboard(request):
     # ==========================================
     # GRÁFICO 2: VENTAS POR CATEGORÍA (Pastel)
     # ==========================================
-    category_sales = OrderItem.objects.select_related(
-        'product__category'
-    ).values(
-        'product__category__name'
-    ).annotate(
-        total=Sum(F('quantity') * F('price'))
-    ).order_by('-total')[:6]  # Top 6 categorías
+    # Se calcula una vez y se reutiliza para la tabla de abajo
+    sales_by_category = [
+        {
+            'product__category__name': row['category__name'],
+            'total_sold': row['units'],
+            'revenue': row['amount'],
+        }
+        for row in DailyCategorySalesRollup.objects.values(
+            'category__name'
+        ).annotate(
+            units=Sum('quantity'),
+            amount=Sum('revenue')
+        ).filter(units__gt=0).order_by('-amount')
+    ]
     
     category_labels = []
     category_data = []
     
-    for cat in category_sales:
-        if cat['product__category__name']:
-            category_labels.append(cat['product__category__name'])
-            category_data.append(float(cat['total']))
+    for cat in sales_by_category[:6]:  # Top 6 categorías
+        category_labels.append(cat['product__category__name'])
+        category_data.append(float(cat['revenue']))
     
     # ==========================================
     # GRÁFICO 3: TOP 10 PRODUCTOS (Barras)
     # ==========================================
-    top_products = OrderItem.objects.values(
-        'product__name', 
-        'product__id'
-    ).annotate(
-        total_sold=Sum('quantity'),
-        revenue=Sum(F('quantity') * F('price'))
-    ).order_by('-revenue')[:10]
+    top_products = [
+        {
+            'product__name': row['product__name'],
+            'product__id': row['product__id'],
+            'total_sold': row['units'],
+            'revenue': row['amount'],
+        }
+        for row in DailyProductSalesRollup.objects.values(
+            'product__name', 
+            'product__id'
+        ).annotate(
+            units=Sum('quantity'),
+            amount=Sum('revenue')
+        ).filter(units__gt=0).order_by('-amount')[:10]
+    ]
     
     products_labels = []
     products_revenue = []
@@ -140,9 +165,10 @@ def admin_dashboard(request):
     # ==========================================
     # GRÁFICO 4: ÓRDENES POR ESTADO (Donut)
     # ==========================================
-    orders_by_status = Order.objects.values('status').annotate(
-        count=Count('id')
-    ).order_by('-count')
+    orders_by_status = sorted(
+        (row for row in status_totals.values() if row['count']),
+        key=lambda row: -row['count']
+    )
     
     status_labels = []
     status_data = []
@@ -182,12 +208,12 @@ def admin_dashboard(request):
     # ==========================================
     # GRÁFICO 6: MÉTODOS DE PAGO (Barras horizontales)
     # ==========================================
-    payment_methods = Order.objects.filter(
-        status__in=['confirmed', 'preparing', 'in_transit', 'delivered']
+    payment_methods = DailyPaymentSalesRollup.objects.filter(
+        status__in=PAID_STATUSES
     ).values('payment_method').annotate(
-        count=Count('id'),
-        total=Sum('total')
-    ).order_by('-total')
+        count=Sum('orders_count'),
+        total=Sum('revenue')
+    ).filter(count__gt=0).order_by('-total')
     
     payment_labels = []
     payment_data = []
@@ -196,18 +222,6 @@ def admin_dashboard(request):
         payment_labels.append(dict(Order.PAYMENT_CHOICES).get(item['payment_method'], item['payment_method']))
         payment_data.append(float(item['total']))
     
-    # ==========================================
-    # TABLA: VENTAS POR CATEGORÍA
-    # ==========================================
-    sales_by_category = OrderItem.objects.select_related(
-        'product__category'
-    ).values(
-        'product__category__name'
-    ).annotate(
-        total_sold=Sum('quantity'),
-        revenue=Sum(F('quantity') * F('price'))
-    ).order_by('-revenue')
-    
     # ==========================================
     # CONTEXTO PARA EL TEMPLATE
     # ==========================================
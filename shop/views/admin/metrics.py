@@ -0,0 +1,34 @@
+"""
+Métricas de rendimiento por URL para administradores.
+
+Expone el histograma en memoria de shop/instrumentation.py.
+"""
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+
+from ...instrumentation import get_stats
+
+
+@never_cache
+@staff_member_required
+def admin_request_metrics(request):
+    """
+    API con latencia y consultas por nombre de URL (proceso actual).
+
+    Ordenado por p95 descendente: las rutas más lentas primero.
+    """
+    stats = get_stats()
+    routes = sorted(stats.items(), key=lambda item: item[1]['p95_ms'], reverse=True)
+
+    return JsonResponse({
+        'success': True,
+        'window': settings.REQUEST_METRICS_WINDOW,
+        'budget': {
+            'ms': settings.SLOW_REQUEST_MS,
+            'queries': settings.SLOW_REQUEST_QUERIES,
+        },
+        'routes': [{'url_name': route, **values} for route, values in routes],
+    })
@@ -11,31 +11,49 @@ Maneja:
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from django.db.models import Q, Prefetch
+from django.db import transaction
+from django.db.models import (
+    Q, Prefetch, Count, Sum, F, OuterRef, Subquery, IntegerField, DecimalField
+)
 from django.http import JsonResponse
+from django.utils.http import urlencode
 
 from ...models import Order, OrderItem
+from ...pagination import InvalidCursor, paginate_keyset
 from ...email_utils import send_order_status_update_email
 
 
+# Órdenes por página en el listado del panel
+ORDERS_PER_PAGE = 25
+
+
 @staff_member_required
 def admin_orders(request):
     """
     Listado de órdenes con filtros.
     
-    ✅ OPTIMIZADO: Elimina N+1 en user y items
+    ✅ OPTIMIZADO: Paginación por cursor (ordenado por -created_at, id):
+    cada página lee ORDERS_PER_PAGE + 1 filas sin importar cuántas
+    órdenes haya. La cantidad y el total de items se calculan con
+    subconsultas correlacionadas, solo para las órdenes de la página,
+    en lugar de precargar todos los items con sus productos.
     """
     status_filter = request.GET.get('status', '')
     search_query = request.GET.get('q', '')
+    cursor = request.GET.get('cursor', '')
+    
+    items = OrderItem.objects.filter(
+        order=OuterRef('pk')
+    ).order_by().values('order')
     
-    # ✅ OPTIMIZACIÓN CLAVE: select_related para user, prefetch_related para items
-    orders = Order.objects.select_related(
-        'user',
-        'user__profile'
-    ).prefetch_related(
-        Prefetch(
-            'items',
-            queryset=OrderItem.objects.select_related('product', 'product__category')
+    orders = Order.objects.select_related('user').annotate(
+        item_count=Subquery(
+            items.annotate(count=Count('id')).values('count'),
+            output_field=IntegerField()
+        ),
+        items_total=Subquery(
+            items.annotate(total=Sum(F('quantity') * F('price'))).values('total'),
+            output_field=DecimalField(max_digits=12, decimal_places=2)
         )
     )
     
@@ -52,13 +70,38 @@ def admin_orders(request):
             Q(user__last_name__icontains=search_query)
         )
     
-    orders = orders.order_by('-created_at')
+    try:
+        page = paginate_keyset(orders, '-created_at', cursor or None, ORDERS_PER_PAGE)
+    except InvalidCursor:
+        # Cursor manipulado o vencido: volver a la primera página
+        page = paginate_keyset(orders, '-created_at', None, ORDERS_PER_PAGE)
+        cursor = ''
+    
+    # Conteo por estado: solo lee el índice (status, -created_at)
+    status_counts = dict(
+        Order.objects.order_by().values_list('status').annotate(count=Count('id'))
+    )
+    status_choices = [
+        (value, label, status_counts.get(value, 0))
+        for value, label in Order.STATUS_CHOICES
+    ]
+    
+    # Filtros actuales para los enlaces de paginación
+    filters = urlencode({
+        key: value
+        for key, value in (('status', status_filter), ('q', search_query))
+        if value
+    })
     
     context = {
-        'orders': orders,
+        'orders': page,
         'status_filter': status_filter,
         'search_query': search_query,
-        'status_choices': Order.STATUS_CHOICES,
+        'status_choices': status_choices,
+        'total_orders': sum(status_counts.values()),
+        'is_first_page': not cursor,
+        'next_cursor': page.next_cursor,
+        'filters': filters,
     }
     
     return render(request, 'shop/admin/orders.html', context)
@@ -118,12 +161,13 @@ def admin_order_detail(request, order_id):
                         messages.error(request, error_msg)
                         return redirect('shop:admin_order_detail', order_id=order.id)
                 
-                order.save()
-                
-                # Enviar email si cambió el estado
+                # Guardar y encolar el email en la misma transacción
                 email_sent = False
-                if old_status != new_status:
-                    email_sent = send_order_status_update_email(order)
+                with transaction.atomic():
+                    order.save()
+                    
+                    if old_status != new_status:
+                        email_sent = send_order_status_update_email(order)
                 
                 # Respuesta AJAX
                 if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -138,11 +182,8 @@ def admin_order_detail(request, order_id):
                 # Respuesta normal
                 messages.success(request, f'Estado actualizado a {order.get_status_display()}')
                 
-                if old_status != new_status:
-                    if email_sent:
-                        messages.success(request, 'Email de actualización enviado al cliente.')
-                    else:
-                        messages.warning(request, 'No se pudo enviar el email de actualización.')
+                if old_status != new_status and email_sent:
+                    messages.success(request, 'Email de actualización encolado para el cliente.')
         
         # ==========================================
         # ACCIÓN: Actualizar notas
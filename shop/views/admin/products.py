@@ -15,12 +15,22 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.admin.views.decorators import staff_member_required
 from django.views.decorators.http import require_POST
 from django.contrib import messages
-from django.db.models import Q, Sum, F, ExpressionWrapper, DecimalField
+from django.db.models import Sum, F, ExpressionWrapper, DecimalField
 from django.http import JsonResponse
 import uuid
 
 from ...models import Product, Category, OrderItem
 from ...forms import ProductForm
+from ...search import search_products
+
+
+def _product_for_update(product_id):
+    """
+    Producto a editar, sin los agregados de calificaciones: `save()`
+    escribe solo los campos cargados y no pisa los que shop/ratings.py
+    actualiza mientras tanto.
+    """
+    return get_object_or_404(Product.objects.defer(*Product.RATING_FIELDS), pk=product_id)
 
 
 @staff_member_required
@@ -47,13 +57,12 @@ def admin_products(request):
         products = products.filter(stock=0)
     
     if search_query:
-        products = products.filter(
-            Q(name__icontains=search_query) |
-            Q(sku__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
+        products = search_products(products, search_query)
     
-    products = products.order_by('-created_at')
+    if 'relevance' in products.query.annotations:
+        products = products.order_by('relevance', '-created_at')
+    else:
+        products = products.order_by('-created_at')
     
     categories = Category.objects.all()
     
@@ -161,7 +170,7 @@ def admin_product_create(request):
 @staff_member_required
 def admin_product_edit(request, product_id):
     """Editar producto existente"""
-    product = get_object_or_404(Product, pk=product_id)
+    product = _product_for_update(product_id)
     
     if request.method == 'POST':
         form = ProductForm(request.POST, request.FILES, instance=product)
@@ -220,7 +229,7 @@ def admin_product_delete(request, product_id):
 @require_POST
 def admin_toggle_product_status(request, product_id):
     """Activar/Desactivar producto (toggle)"""
-    product = get_object_or_404(Product, pk=product_id)
+    product = _product_for_update(product_id)
     product.is_active = not product.is_active
     product.save()
     
@@ -241,7 +250,7 @@ def admin_update_stock(request, product_id):
     - 'add': Incrementar stock
     - 'set': Establecer cantidad exacta
     """
-    product = get_object_or_404(Product, pk=product_id)
+    product = _product_for_update(product_id)
     action = request.POST.get('action')
     
     try:
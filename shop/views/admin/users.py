@@ -5,17 +5,22 @@ Maneja:
 - Listado de usuarios con estadísticas
 - Detalle de usuario con análisis completo
 - Estado online/offline
+- Cierre de todas las sesiones de un usuario
 """
 
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.models import User
+from django.contrib import messages
 from django.db.models import Q, Sum, Count, Avg, F, ExpressionWrapper, DecimalField, Prefetch
-from django.contrib.sessions.models import Session
-from django.utils import timezone
 from django.http import JsonResponse
+from django.views.decorators.http import require_POST
 
 from ...models import Order, OrderItem, CartItem, Cart
+from ...presence import online_user_ids, last_seen, logout_all_devices
+
+# Máximo de ids aceptados por la consulta de estado en lote
+MAX_ONLINE_STATUS_IDS = 200
 
 
 @staff_member_required
@@ -168,27 +173,84 @@ def admin_user_online_status(request, user_id):
     """
     Verificar si un usuario está online actualmente.
     
-    Un usuario está online si tiene una sesión activa.
+    Un usuario está online si alguna de sus sesiones tuvo actividad
+    en los últimos PRESENCE_ONLINE_WINDOW segundos.
+    
+    ✅ OPTIMIZADO: Consulta el índice UserSession (shop/presence.py)
+    en lugar de decodificar todas las sesiones activas.
     
     Retorna JSON con:
     - is_online: boolean
     - is_active: boolean (cuenta activa)
     - last_login: timestamp del último login
+    - last_seen: timestamp de la última actividad registrada
     """
     user = get_object_or_404(User, pk=user_id)
-    
-    # Verificar si tiene sesiones activas
-    is_online = False
-    for session in Session.objects.filter(expire_date__gt=timezone.now()):
-        data = session.get_decoded()
-        uid = data.get('_auth_user_id')
-        if str(uid) == str(user.id):
-            is_online = True
-            break
+    seen = last_seen(user.id)
     
     return JsonResponse({
         'success': True,
-        'is_online': is_online,
+        'is_online': user.id in online_user_ids([user.id]),
         'is_active': user.is_active,
         'last_login': user.last_login.isoformat() if user.last_login else None,
-    })
\ No newline at end of file
+        'last_seen': seen.isoformat() if seen else None,
+    })
+
+
+@staff_member_required
+def admin_users_online_status(request):
+    """
+    Estado online de varios usuarios en una sola consulta.
+    
+    Parámetros GET:
+    - ids: Lista de ids separados por coma (?ids=1,2,3)
+    
+    Retorna JSON con:
+    - online: {id: boolean} para cada id pedido
+    """
+    try:
+        user_ids = [
+            int(value) for value in request.GET.get('ids', '').split(',')
+            if value.strip()
+        ]
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Lista de ids inválida'
+        }, status=400)
+    
+    if len(user_ids) > MAX_ONLINE_STATUS_IDS:
+        return JsonResponse({
+            'success': False,
+            'error': f'Máximo {MAX_ONLINE_STATUS_IDS} usuarios por consulta'
+        }, status=400)
+    
+    online = online_user_ids(user_ids) if user_ids else set()
+    
+    return JsonResponse({
+        'success': True,
+        'online': {str(user_id): user_id in online for user_id in user_ids},
+    })
+
+
+@staff_member_required
+@require_POST
+def admin_user_logout_all(request, user_id):
+    """Cerrar todas las sesiones del usuario (en todos sus dispositivos)"""
+    user = get_object_or_404(User, pk=user_id)
+    
+    # Si el admin se cierra a sí mismo, conservar la sesión actual
+    keep = request.session.session_key if user.pk == request.user.pk else None
+    closed = logout_all_devices(user, keep_session_key=keep)
+    
+    message = f'Se cerraron {closed} {"sesión" if closed == 1 else "sesiones"} de {user.username}'
+    
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return JsonResponse({
+            'success': True,
+            'closed': closed,
+            'message': message
+        })
+    
+    messages.success(request, message)
+    return redirect('shop:admin_user_detail', user_id=user.id)
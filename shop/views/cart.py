@@ -12,6 +12,9 @@ from django.db import transaction
 from django.db.models import Prefetch
 
 from ..models import Product, Cart, CartItem
+from ..cart_summary import refresh_cart_summary
+from ..inventory import available_stock, release_reservations, trim_reservation
+from ..recommendations import recommended_for_cart
 
 
 @login_required
@@ -20,6 +23,9 @@ def cart_view(request):
     Ver carrito de compras
     
     ✅ OPTIMIZADO: Prefetch de items con productos
+    
+    El stock mostrado es el disponible (sin lo reservado por otros
+    compradores en su checkout).
     """
     # ✅ OPTIMIZACIÓN: Cargar cart con items y productos en un query
     cart, created = Cart.objects.prefetch_related(
@@ -32,8 +38,24 @@ def cart_view(request):
         )
     ).get_or_create(user=request.user)
     
+    items = cart.items.all()
+    if items:
+        available = available_stock(
+            [item.product_id for item in items],
+            request.user,
+            stock={item.product_id: item.product.stock for item in items}
+        )
+        for item in items:
+            item.product.stock = available[item.product_id]
+    
+    # Sugerencias "comprados juntos" para los productos del carrito
+    recommended_products = recommended_for_cart(
+        item.product_id for item in cart.items.all()
+    )
+    
     context = {
         'cart': cart,
+        'recommended_products': recommended_products,
     }
     return render(request, 'shop/cart.html', context)
 
@@ -88,11 +110,15 @@ def add_to_cart(request, product_id):
                 'message': 'Producto no disponible'
             })
         
-        # PASO 2: Verificar stock (ahora es thread-safe)
-        if quantity > product.stock:
+        # PASO 2: Verificar stock (ahora es thread-safe), descontando lo
+        # reservado por otros compradores en su checkout
+        available = available_stock(
+            [product.pk], request.user, stock={product.pk: product.stock}
+        )[product.pk]
+        if quantity > available:
             return JsonResponse({
                 'success': False,
-                'message': f'Solo hay {product.stock} unidades disponibles'
+                'message': f'Solo hay {available} unidades disponibles'
             })
         
         # PASO 3: Obtener o crear carrito
@@ -109,10 +135,10 @@ def add_to_cart(request, product_id):
             # Item ya existe, verificar que podemos agregar más
             new_quantity = cart_item.quantity + quantity
             
-            if new_quantity > product.stock:
+            if new_quantity > available:
                 return JsonResponse({
                     'success': False,
-                    'message': f'Solo hay {product.stock} unidades disponibles. '
+                    'message': f'Solo hay {available} unidades disponibles. '
                             f'Ya tienes {cart_item.quantity} en tu carrito.'
                 })
             
@@ -123,10 +149,14 @@ def add_to_cart(request, product_id):
     # FIN DE TRANSACCIÓN ATÓMICA
     # ==========================================
     
+    # ✅ OPTIMIZADO: Resumen en una consulta agrupada, y queda cacheado
+    # para el contador de base.html
+    summary = refresh_cart_summary(request.user.id)
+    
     return JsonResponse({
         'success': True,
         'message': 'Producto agregado al carrito',
-        'cart_count': cart.items_count
+        'cart_count': summary['count']
     })
 
 
@@ -151,12 +181,13 @@ def update_cart_item(request, item_id):
     if quantity <= 0:
         cart_item = get_object_or_404(CartItem, pk=item_id, cart__user=request.user)
         cart_item.delete()
-        cart = Cart.objects.get(user=request.user)
+        trim_reservation(request.user, cart_item.product_id, 0)
+        summary = refresh_cart_summary(request.user.id)
         return JsonResponse({
             'success': True,
             'subtotal': 0,
-            'cart_total': float(cart.total),
-            'cart_count': cart.items_count
+            'cart_total': float(summary['total']),
+            'cart_count': summary['count']
         })
     
     # ==========================================
@@ -169,24 +200,29 @@ def update_cart_item(request, item_id):
             cart__user=request.user
         )
         
-        # Verificar stock disponible
-        if quantity > cart_item.product.stock:
+        # Verificar stock disponible (sin lo reservado por otros)
+        product = cart_item.product
+        available = available_stock(
+            [product.pk], request.user, stock={product.pk: product.stock}
+        )[product.pk]
+        if quantity > available:
             return JsonResponse({
                 'success': False,
-                'message': f'Solo hay {cart_item.product.stock} unidades disponibles'
+                'message': f'Solo hay {available} unidades disponibles'
             })
         
-        # Actualizar cantidad
+        # Actualizar cantidad; si bajó, liberar lo que sobra de la reserva
         cart_item.quantity = quantity
         cart_item.save()
+        trim_reservation(request.user, cart_item.product_id, quantity)
     
     # Calcular nuevos totales
-    cart = cart_item.cart
+    summary = refresh_cart_summary(request.user.id)
     return JsonResponse({
         'success': True,
         'subtotal': float(cart_item.subtotal),
-        'cart_total': float(cart.total),
-        'cart_count': cart.items_count
+        'cart_total': float(summary['total']),
+        'cart_count': summary['count']
     })
 
 
@@ -196,13 +232,14 @@ def remove_from_cart(request, item_id):
     """Eliminar producto del carrito"""
     cart_item = get_object_or_404(CartItem, pk=item_id, cart__user=request.user)
     cart_item.delete()
+    trim_reservation(request.user, cart_item.product_id, 0)
     
-    cart = Cart.objects.get(user=request.user)
+    summary = refresh_cart_summary(request.user.id)
     return JsonResponse({
         'success': True,
         'message': 'Producto eliminado del carrito',
-        'cart_total': float(cart.total),
-        'cart_count': cart.items_count
+        'cart_total': float(summary['total']),
+        'cart_count': summary['count']
     })
 
 
@@ -212,6 +249,8 @@ def clear_cart(request):
     """Vaciar todo el carrito del usuario"""
     cart, _ = Cart.objects.get_or_create(user=request.user)
     cart.items.all().delete()
+    release_reservations(request.user)
+    refresh_cart_summary(request.user.id)
 
     return JsonResponse({
         'success': True,
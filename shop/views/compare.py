@@ -11,6 +11,7 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 
 from ..models import Product
+from ..similarity import similar_to_many
 
 
 def compare_products(request):
@@ -66,11 +67,17 @@ def compare_products(request):
     # Preparar datos para comparación
     comparison_data = prepare_comparison_data(products)
     
+    # Productos parecidos para sumar a la comparación (shop/similarity.py)
+    suggested_products = []
+    if len(products) < 4:
+        suggested_products = similar_to_many([p.id for p in products], limit=4)
+    
     context = {
         'products': products,
         'product_ids': ','.join(str(p.id) for p in products), 
         'comparison_data': comparison_data,
         'product_count': len(products),
+        'suggested_products': suggested_products,
     }
     
     return render(request, 'shop/compare/compare.html', context)
@@ -81,6 +88,8 @@ def prepare_comparison_data(products):
     Prepara los datos para la tabla de comparación.
     
     Agrupa las especificaciones por categorías y detecta diferencias.
+    Los campos con columnas numéricas (ver shop/specs.py) se comparan por
+    valor: "2HP" y "1491W", o "1m" y "100cm", no cuentan como diferentes.
     
     Args:
         products: QuerySet de productos
@@ -98,13 +107,14 @@ def prepare_comparison_data(products):
         ],
         'Especificaciones Físicas': [
             {'key': 'material', 'label': 'Material'},
-            {'key': 'dimensiones', 'label': 'Dimensiones'},
+            {'key': 'dimensiones', 'label': 'Dimensiones',
+             'numeric': ('largo_mm', 'ancho_mm', 'alto_mm')},
             {'key': 'peso', 'label': 'Peso', 'unit': 'kg'},
             {'key': 'color', 'label': 'Color'},
         ],
         'Especificaciones Técnicas': [
-            {'key': 'voltaje', 'label': 'Voltaje'},
-            {'key': 'potencia', 'label': 'Potencia'},
+            {'key': 'voltaje', 'label': 'Voltaje', 'numeric': ('voltaje_v',)},
+            {'key': 'potencia', 'label': 'Potencia', 'numeric': ('potencia_w',)},
         ],
         'Información Comercial': [
             {'key': 'price', 'label': 'Precio', 'format': 'currency'},
@@ -126,6 +136,7 @@ def prepare_comparison_data(products):
             
             # Obtener valores de todos los productos
             values = []
+            comparison_keys = []
             for product in products:
                 # Manejar campos anidados (ej: category__name)
                 if '__' in field_key:
@@ -146,9 +157,16 @@ def prepare_comparison_data(products):
                 )
                 
                 values.append(formatted_value)
+                
+                # Valor a comparar: el numérico si se pudo interpretar
+                numeric = tuple(getattr(product, column) for column in field_config.get('numeric', ()))
+                if any(number is not None for number in numeric):
+                    comparison_keys.append(numeric)
+                else:
+                    comparison_keys.append(formatted_value)
             
             # Detectar si hay diferencias
-            has_difference = len(set(values)) > 1
+            has_difference = len(set(comparison_keys)) > 1
             
             # Solo incluir si al menos un producto tiene valor
             if any(v and v != 'No especificado' for v in values):
@@ -12,21 +12,42 @@ Maneja:
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db import transaction
-from django.db.models import F, Prefetch
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
 from django.urls import reverse
 from decimal import Decimal
 from datetime import date
+from functools import partial
 import uuid
 import logging
 
-from ..models import Cart, Order, OrderItem, CartItem
+from ..models import Cart, CheckoutIdempotencyKey, Order, OrderItem, CartItem
 from ..forms import CheckoutStep1Form, CheckoutStep2Form, CheckoutStep3Form
 from ..email_utils import send_order_confirmation_email
+from ..inventory import InsufficientStock, convert_reservations, ensure_reservation
+from ..rollups import record_new_order
+from ..recommendations import record_order_cooccurrence
+from ..cart_summary import invalidate_cart_summary
 
 logger = logging.getLogger(__name__)
 
 
+def _posted_idempotency_key(request):
+    """Clave de idempotencia enviada con el paso 3 (None si falta o es inválida)."""
+    key = request.POST.get('idempotency_key', '')
+    return key if 0 < len(key) <= 64 else None
+
+
+def _order_for_key(user, key):
+    """Id de la orden ya creada con esta clave, o None."""
+    if not key:
+        return None
+    return CheckoutIdempotencyKey.objects.filter(
+        key=key,
+        user=user
+    ).values_list('order_id', flat=True).first()
+
+
 @login_required
 def checkout(request):
     """
@@ -36,8 +57,22 @@ def checkout(request):
     1. Información de entrega
     2. Fecha, hora y método de pago
     3. Revisión y confirmación
+    
+    Los GET reservan el stock del carrito por STOCK_RESERVATION_MINUTES
+    (ver `ensure_reservation` en shop/inventory.py); la confirmación
+    convierte la reserva en el descuento de stock.
+    
+    El paso 3 lleva una clave de idempotencia: un reenvío de la misma
+    confirmación redirige a la orden ya creada.
     """
     
+    # Reenvío de una confirmación ya procesada: redirigir a su orden sin
+    # cargar el carrito ni tocar stock
+    if request.method == 'POST' and request.GET.get('step') == '3':
+        existing_order_id = _order_for_key(request.user, _posted_idempotency_key(request))
+        if existing_order_id:
+            return redirect('shop:order_detail', order_id=existing_order_id)
+    
     # Cargar carrito optimizado
     cart = get_object_or_404(
         Cart.objects.select_related('user').prefetch_related(
@@ -138,23 +173,11 @@ def checkout(request):
             form = CheckoutStep3Form(request.POST)
             if form.is_valid():
                 try:
+                    # Items ya cargados con su producto (prefetch arriba)
+                    cart_items = list(cart.items.all())
+                    
                     # TRANSACCIÓN ATÓMICA
                     with transaction.atomic():
-                        # Validar stock con lock
-                        cart_items = cart.items.select_for_update(nowait=True).select_related('product')
-                        
-                        insufficient_stock = []
-                        for item in cart_items:
-                            if item.quantity > item.product.stock:
-                                insufficient_stock.append(
-                                    f"{item.product.name} (disponible: {item.product.stock})"
-                                )
-                        
-                        if insufficient_stock:
-                            raise ValueError(
-                                f"Stock insuficiente para: {', '.join(insufficient_stock)}"
-                            )
-                        
                         # Crear orden
                         order = Order()
                         order.user = request.user
@@ -181,39 +204,68 @@ def checkout(request):
                         order.notes = form.cleaned_data.get('notes', '')
                         
                         # Calcular totales
-                        order.subtotal = cart.total
+                        order.subtotal = sum(item.subtotal for item in cart_items)
                         order.delivery_fee = Decimal('5.00')
                         order.total = order.subtotal + order.delivery_fee
                         
                         order.save()
                         
+                        # Registrar la clave antes de descontar stock: un
+                        # envío simultáneo con la misma clave falla aquí
+                        # (IntegrityError) sin llegar al inventario
+                        idempotency_key = _posted_idempotency_key(request)
+                        if idempotency_key:
+                            CheckoutIdempotencyKey.objects.create(
+                                key=idempotency_key,
+                                user=request.user,
+                                order=order
+                            )
+                        
+                        # Convertir las reservas hechas al entrar al checkout
+                        # en descuento de stock (UPDATE condicionales); si
+                        # alguna línea no alcanza se lanza InsufficientStock
+                        # y la transacción revierte todo
+                        convert_reservations(
+                            request.user,
+                            ((item.product_id, item.quantity) for item in cart_items)
+                        )
+                        
                         logger.info(f"Order created: {order.order_number} for user {request.user.username}")
                         
                         # Crear items de orden
-                        order_items_to_create = []
-                        products_to_update = []
-                        
-                        for item in cart_items:
-                            order_items_to_create.append(
-                                OrderItem(
-                                    order=order,
-                                    product=item.product,
-                                    quantity=item.quantity,
-                                    price=item.product.price
-                                )
+                        OrderItem.objects.bulk_create([
+                            OrderItem(
+                                order=order,
+                                product=item.product,
+                                quantity=item.quantity,
+                                price=item.product.price
                             )
-                            
-                            item.product.stock = F('stock') - item.quantity
-                            products_to_update.append(item.product)
+                            for item in cart_items
+                        ])
                         
-                        OrderItem.objects.bulk_create(order_items_to_create)
+                        # Sumar la orden a los resúmenes diarios de ventas
+                        record_new_order(order)
                         
-                        # Actualizar stock
-                        for product in products_to_update:
-                            product.save(update_fields=['stock'])
+                        # Recomendaciones "comprados juntos": fuera de la
+                        # transacción de la orden (no alarga el bloqueo) y
+                        # sin afectar la respuesta si falla
+                        transaction.on_commit(
+                            partial(record_order_cooccurrence, [item.product_id for item in cart_items]),
+                            robust=True
+                        )
                         
                         # Limpiar carrito
                         cart.items.all().delete()
+                        invalidate_cart_summary(request.user.id)
+                        
+                        # Encolar el email de confirmación al confirmar: el
+                        # render no alarga la transacción que tiene tomado
+                        # el bloqueo de escritura (lo envía el worker
+                        # process_email_outbox, sin SMTP aquí)
+                        transaction.on_commit(
+                            partial(send_order_confirmation_email, order),
+                            robust=True
+                        )
                         
                         # Limpiar sesión
                         if 'checkout_data' in request.session:
@@ -221,33 +273,28 @@ def checkout(request):
                         
                         logger.info(f"Order {order.order_number} completed successfully")
                     
-                    # Enviar email
-                    email_sent = False
-                    try:
-                        email_sent = send_order_confirmation_email(order)
-                        if email_sent:
-                            logger.info(f"Confirmation email sent for order {order.order_number}")
-                    except Exception as e:
-                        logger.error(f"Exception sending email for order {order.order_number}: {e}")
-                    
                     # Mensajes de éxito
-                    if email_sent:
-                        messages.success(
-                            request,
-                            f'¡Orden {order.order_number} realizada exitosamente! '
-                            'Te hemos enviado un email de confirmación.'
-                        )
-                    else:
-                        messages.success(
-                            request,
-                            f'¡Orden {order.order_number} realizada exitosamente!'
-                        )
+                    messages.success(
+                        request,
+                        f'¡Orden {order.order_number} realizada exitosamente! '
+                        'Te enviaremos un email de confirmación.'
+                    )
                     
                     return redirect('shop:order_detail', order_id=order.id)
                     
                 except ValueError as e:
                     logger.warning(f"Checkout validation error: {e}")
                     messages.error(request, str(e))
+                except IntegrityError as e:
+                    # Otro envío con la misma clave ganó la carrera
+                    existing_order_id = _order_for_key(request.user, _posted_idempotency_key(request))
+                    if existing_order_id:
+                        return redirect('shop:order_detail', order_id=existing_order_id)
+                    logger.exception(f"Unexpected checkout error: {e}")
+                    messages.error(
+                        request,
+                        'Ocurrió un error procesando tu orden. Por favor intenta nuevamente.'
+                    )
                 except Exception as e:
                     logger.exception(f"Unexpected checkout error: {e}")
                     messages.error(
@@ -255,7 +302,7 @@ def checkout(request):
                         'Ocurrió un error procesando tu orden. Por favor intenta nuevamente.'
                     )
     
-    # GET: Mostrar formulario del paso actual
+    # Mostrar formulario del paso actual
     if current_step == 1:
         initial_data = checkout_data.get('step1', {})
         form = CheckoutStep1Form(initial=initial_data)
@@ -286,11 +333,26 @@ def checkout(request):
         form = CheckoutStep3Form(initial=initial_data)
         template = 'shop/checkout_step3.html'
     
+    # GET: Apartar el stock del carrito mientras dura el checkout, así el
+    # cliente sabe desde el paso 1 si puede comprar. Solo se escribe al
+    # empezar, si cambió el carrito o si la reserva está por vencer
+    if request.method == 'GET':
+        try:
+            ensure_reservation(
+                request.user,
+                ((item.product_id, item.quantity) for item in cart.items.all())
+            )
+        except InsufficientStock as e:
+            messages.error(request, str(e))
+            return redirect('shop:cart')
+    
     context = {
         'form': form,
         'cart': cart,
         'current_step': current_step,
         'checkout_data': checkout_data,
+        # Nueva clave por cada vez que se muestra la confirmación
+        'idempotency_key': uuid.uuid4().hex if current_step == 3 else '',
     }
     
     return render(request, template, context)
@@ -9,28 +9,51 @@ Maneja:
 
 from django.shortcuts import render, get_object_or_404
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q
 from django.http import JsonResponse
 from django.template.loader import render_to_string
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
+import hashlib
+import math
 
-from ..models import Product, Category
+from .. import cache as catalog_cache
+from ..inventory import available_stock
+from ..models import Product
+from ..page_cache import cache_anonymous_page
+from ..pagination import InvalidCursor, encode_cursor, order_with_tiebreaker, paginate_keyset
+from ..search import search_products
+from ..similarity import search_fallback
 
+# Segundos que se reutiliza el total de productos en modo cursor
+PRODUCT_COUNT_CACHE_TIMEOUT = 300
 
+# Filtros por rango del listado: <parámetro>_min / <parámetro>_max sobre
+# las columnas numéricas (ver shop/specs.py), cada una con su índice
+# (is_active, columna)
+RANGE_FILTERS = {
+    'potencia': ('potencia_w', 'Potencia (W)'),
+    'voltaje': ('voltaje_v', 'Voltaje (V)'),
+    'peso': ('peso', 'Peso (kg)'),
+    'largo': ('largo_mm', 'Largo (mm)'),
+    'ancho': ('ancho_mm', 'Ancho (mm)'),
+    'alto': ('alto_mm', 'Alto (mm)'),
+}
+# Los que se muestran en el panel de filtros
+SIDEBAR_RANGE_FILTERS = ('potencia', 'voltaje', 'peso')
+RANGE_PARAMS = tuple(
+    f'{param}_{bound}' for param in RANGE_FILTERS for bound in ('min', 'max')
+)
+
+
+@cache_anonymous_page()
 def home(request):
     """
     Vista principal de la tienda
     
-    ✅ OPTIMIZADO: select_related para featured products
+    ✅ OPTIMIZADO: destacados y categorías desde la caché del catálogo
     """
-    # ✅ OPTIMIZACIÓN: Cargar category con select_related
-    featured_products = Product.objects.filter(
-        is_active=True, 
-        featured=True
-    ).select_related('category')[:8]
-    
-    categories = Category.objects.all()
+    featured_products = catalog_cache.get_featured_products()
+    categories = catalog_cache.get_categories()
     
     context = {
         'featured_products': featured_products,
@@ -39,29 +62,38 @@ def home(request):
     return render(request, 'shop/home.html', context)
 
 
+@cache_anonymous_page(query_params=('sort', 'category', 'page', 'per_page', 'skeleton') + RANGE_PARAMS)
 def product_list(request):
     """
     Lista de productos con skeleton screens en AJAX
+    
+    Las peticiones AJAX con el parámetro `cursor` usan paginación por
+    cursor (ver shop/pagination.py): la respuesta incluye `next_cursor`
+    y el total sale de caché, así que cada página cuesta lo mismo. La
+    grilla de product_list.html navega siempre así; `page` queda para el
+    primer render y los enlaces directos.
     """
     products = Product.objects.filter(is_active=True).select_related('category')
-    categories = Category.objects.all()
+    categories = catalog_cache.get_categories()
     
     # Filtro por categoría
     category_slug = request.GET.get('category')
     if category_slug:
         products = products.filter(category__slug=category_slug)
     
-    # Búsqueda
+    # Búsqueda (FTS5 con ranking BM25, ver shop/search.py)
     query = request.GET.get('q')
     if query:
-        products = products.filter(
-            Q(name__icontains=query) | 
-            Q(description__icontains=query) |
-            Q(sku__icontains=query)
-        )
+        products = search_products(products, query)
+    
+    # Filtros por rango: comparaciones en SQL sobre columnas indexadas
+    range_filters = _parse_range_filters(request.GET)
+    has_range_filters = bool(range_filters)
+    if range_filters:
+        products = products.filter(**range_filters)
     
-    # Ordenamiento
-    sort_by = request.GET.get('sort', '-created_at')
+    # Ordenamiento: con búsqueda activa, por defecto se ordena por relevancia
+    sort_by = request.GET.get('sort', 'relevance' if query else '-created_at')
     valid_sorts = {
         'price_asc': 'price',
         'price_desc': '-price',
@@ -70,11 +102,20 @@ def product_list(request):
         'newest': '-created_at',
         'oldest': 'created_at',
         'popular': '-featured',
+        'rating': '-rating_avg',
+        'power_asc': 'potencia_w',
+        'power_desc': '-potencia_w',
     }
-    if sort_by in valid_sorts:
-        products = products.order_by(valid_sorts[sort_by])
-    else:
-        products = products.order_by('-created_at')
+    if 'relevance' in products.query.annotations:
+        valid_sorts['relevance'] = 'relevance'
+    order_field = valid_sorts.get(sort_by, '-created_at')
+    if order_field.lstrip('-') == 'potencia_w':
+        # Sin potencia conocida no hay posición en el orden (ni cursor);
+        # va en range_filters para que el total cacheado lo distinga
+        range_filters['potencia_w__isnull'] = False
+        products = products.filter(potencia_w__isnull=False)
+    # Desempate por id: orden total, necesario para paginar por cursor
+    products = order_with_tiebreaker(products, order_field)
     
     # Paginación
     try:
@@ -84,6 +125,46 @@ def product_list(request):
     except (ValueError, TypeError):
         items_per_page = 12
     
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    
+    # Modo cursor (lo usa la grilla: "Cargar más" y scroll infinito; con
+    # `cursor=` vacío devuelve la primera página): sin OFFSET ni COUNT(*)
+    # por petición
+    if is_ajax and 'cursor' in request.GET and request.GET.get('skeleton') != 'true':
+        cursor = request.GET.get('cursor') or None
+        try:
+            products_page = paginate_keyset(
+                products,
+                order_field,
+                cursor=cursor,
+                per_page=items_per_page,
+            )
+        except InvalidCursor as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+        
+        suggestions = []
+        if query and cursor is None and not len(products_page):
+            suggestions = search_fallback(query)
+        
+        products_html = render_to_string('shop/partials/product_grid.html', {
+            'products': products_page,
+            'user': request.user,
+            'query': query,
+            'suggestions': suggestions,
+        })
+        
+        return JsonResponse({
+            'success': True,
+            'html': products_html,
+            'has_next': products_page.has_next(),
+            'next_cursor': products_page.next_cursor,
+            'total_products': _cached_product_count(products, category_slug, query, range_filters),
+            'skeleton': False,
+        })
+    
     paginator = Paginator(products, items_per_page)
     
     try:
@@ -104,8 +185,14 @@ def product_list(request):
         else:
             products_page = paginator.page(1)
     
+    # Búsqueda sin resultados: sugerencias con cualquiera de las palabras
+    # y sus productos parecidos (ver shop/similarity.py)
+    suggestions = []
+    if query and not paginator.count:
+        suggestions = search_fallback(query)
+    
     # ✅ NUEVO: Para AJAX con skeleton screen
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+    if is_ajax:
         # Verificar si solicita skeleton
         if request.GET.get('skeleton') == 'true':
             # Retornar HTML con skeletons
@@ -123,6 +210,8 @@ def product_list(request):
         products_html = render_to_string('shop/partials/product_grid.html', {
             'products': products_page,
             'user': request.user,
+            'query': query,
+            'suggestions': suggestions,
         })
         
         return JsonResponse({
@@ -135,14 +224,35 @@ def product_list(request):
             'total_products': paginator.count,
             'start_index': products_page.start_index(),
             'end_index': products_page.end_index(),
+            # Permite continuar en modo cursor desde cualquier página
+            'next_cursor': (
+                encode_cursor(order_field, products_page[-1])
+                if products_page.has_next() else None
+            ),
             'skeleton': False,
         })
     
     context = {
         'products': products_page,
+        # La grilla sigue desde aquí con paginación por cursor
+        'next_cursor': (
+            encode_cursor(order_field, products_page[-1])
+            if products_page.has_next() else None
+        ),
         'categories': categories,
         'current_category': category_slug,
         'query': query,
+        'suggestions': suggestions,
+        'spec_filters': [
+            {
+                'param': param,
+                'label': RANGE_FILTERS[param][1],
+                'min': request.GET.get(f'{param}_min', ''),
+                'max': request.GET.get(f'{param}_max', ''),
+            }
+            for param in SIDEBAR_RANGE_FILTERS
+        ],
+        'has_range_filters': has_range_filters,
         'sort_by': sort_by,
         'items_per_page': items_per_page,
         'paginator': paginator,
@@ -151,6 +261,47 @@ def product_list(request):
     return render(request, 'shop/product_list.html', context)
 
 
+def _parse_range_filters(params):
+    """
+    Lookups `<columna>__gte` / `<columna>__lte` de los parámetros
+    `<filtro>_min` / `<filtro>_max` (ver RANGE_FILTERS).
+
+    Los valores vacíos o no numéricos se ignoran. Los productos sin el
+    dato (NULL) no cumplen ningún rango.
+    """
+    lookups = {}
+    for param, (column, _) in RANGE_FILTERS.items():
+        for bound, lookup in (('min', 'gte'), ('max', 'lte')):
+            try:
+                value = float(params.get(f'{param}_{bound}', ''))
+            except ValueError:
+                continue
+            if math.isfinite(value):
+                lookups[f'{column}__{lookup}'] = value
+    return lookups
+
+
+def _cached_product_count(products, category_slug, query, range_filters=None):
+    """
+    Total de productos del listado filtrado, cacheado unos minutos.
+
+    En modo cursor cada petición de scroll infinito traería el mismo
+    COUNT(*). Se guarda en la caché del catálogo, así que además se
+    invalida cuando cambia cualquier producto.
+    """
+    raw_key = (
+        f'{category_slug or ""}|{(query or "").strip().lower()}|'
+        f'{sorted((range_filters or {}).items())}'
+    )
+    return catalog_cache.get_or_build(
+        'product_count',
+        products.count,
+        hashlib.md5(raw_key.encode()).hexdigest(),
+        timeout=PRODUCT_COUNT_CACHE_TIMEOUT,
+    )
+
+
+@cache_anonymous_page(version=lambda request, pk: catalog_cache.get_product_version(pk))
 def product_detail(request, pk):
     """
     Detalle de producto con productos relacionados
@@ -164,20 +315,79 @@ def product_detail(request, pk):
         is_active=True
     )
     
-    # ✅ OPTIMIZACIÓN: Productos relacionados con category cargada
-    related_products = Product.objects.filter(
-        category=product.category,
-        is_active=True
-    ).exclude(
-        pk=pk
-    ).select_related('category')[:4]
+    # Stock disponible: sin lo reservado por otros compradores en su checkout
+    user = request.user if request.user.is_authenticated else None
+    product.stock = available_stock([product.pk], user, stock={product.pk: product.stock})[product.pk]
+    
+    # ✅ OPTIMIZACIÓN: Productos relacionados desde la caché del catálogo
+    related_products = catalog_cache.get_related_products(product)
+    
+    # Últimos reviews aprobados (los totales ya están en el producto)
+    recent_reviews = []
+    if product.rating_count:
+        recent_reviews = product.reviews.filter(
+            is_approved=True
+        ).select_related('user')[:3]
     
     context = {
         'product': product,
         'related_products': related_products,
+        'recent_reviews': recent_reviews,
     }
     return render(request, 'shop/product_detail.html', context)
 
+def _build_quick_view_payload(product_id):
+    """
+    Construye el JSON de la vista rápida de un producto.
+    
+    Raises:
+        Product.DoesNotExist: Si el producto no existe o está inactivo
+    """
+    product = Product.objects.select_related('category').get(pk=product_id, is_active=True)
+    
+    # Estadísticas de reviews (agregados desnormalizados en Product)
+    reviews_stats = {
+        'count': product.rating_count,
+        'average': round(float(product.rating_avg), 1),
+    }
+    
+    # Preparar especificaciones principales (top 5)
+    specs = []
+    if product.material:
+        specs.append({'label': 'Material', 'value': product.material})
+    if product.dimensiones:
+        specs.append({'label': 'Dimensiones', 'value': product.dimensiones})
+    if product.peso:
+        specs.append({'label': 'Peso', 'value': f'{product.peso} kg'})
+    if product.voltaje:
+        specs.append({'label': 'Voltaje', 'value': product.voltaje})
+    if product.potencia:
+        specs.append({'label': 'Potencia', 'value': product.potencia})
+    
+    # Limitar a 5 specs
+    specs = specs[:5]
+    
+    return {
+        'success': True,
+        'product': {
+            'id': product.id,
+            'name': product.name,
+            'sku': product.sku,
+            'price': float(product.price),
+            'description': product.description,
+            'category': product.category.name,
+            'image': product.image.url if product.image else None,
+            'stock': product.stock,
+            'in_stock': product.in_stock,
+            'featured': product.featured,
+            'marca': product.marca or 'No especificada',
+        },
+        'specifications': specs,
+        'reviews': reviews_stats,
+        'detail_url': f'/producto/{product.id}/',
+    }
+
+
 @require_http_methods(["GET"])
 def product_quick_view(request, product_id):
     """
@@ -190,62 +400,17 @@ def product_quick_view(request, product_id):
     - Precio y descuentos
     - Reviews resumidos
     
-    ✅ OPTIMIZADO: select_related para category
+    ✅ OPTIMIZADO: payload cacheado en la caché del catálogo (salvo el stock)
     """
     try:
-        # Cargar producto con relaciones optimizadas
-        product = Product.objects.select_related('category').prefetch_related(
-            'reviews'
-        ).get(pk=product_id, is_active=True)
-        
-        # Calcular estadísticas de reviews
-        reviews_stats = {
-            'count': product.reviews.filter(is_approved=True).count(),
-            'average': 0,
-        }
-        
-        if reviews_stats['count'] > 0:
-            from django.db.models import Avg
-            avg = product.reviews.filter(is_approved=True).aggregate(Avg('rating'))
-            reviews_stats['average'] = round(avg['rating__avg'] or 0, 1)
-        
-        # Preparar especificaciones principales (top 5)
-        specs = []
-        if product.material:
-            specs.append({'label': 'Material', 'value': product.material})
-        if product.dimensiones:
-            specs.append({'label': 'Dimensiones', 'value': product.dimensiones})
-        if product.peso:
-            specs.append({'label': 'Peso', 'value': f'{product.peso} kg'})
-        if product.voltaje:
-            specs.append({'label': 'Voltaje', 'value': product.voltaje})
-        if product.potencia:
-            specs.append({'label': 'Potencia', 'value': product.potencia})
-        
-        # Limitar a 5 specs
-        specs = specs[:5]
-        
-        # Preparar respuesta JSON
-        data = {
-            'success': True,
-            'product': {
-                'id': product.id,
-                'name': product.name,
-                'sku': product.sku,
-                'price': float(product.price),
-                'description': product.description,
-                'category': product.category.name,
-                'image': product.image.url if product.image else None,
-                'stock': product.stock,
-                'in_stock': product.in_stock,
-                'featured': product.featured,
-                'marca': product.marca or 'No especificada',
-            },
-            'specifications': specs,
-            'reviews': reviews_stats,
-            'detail_url': f'/producto/{product.id}/',
-        }
-        
+        data = catalog_cache.get_or_build(
+            'quick_view',
+            lambda: _build_quick_view_payload(product_id),
+            product_id=product_id
+        )
+        # El stock no se cachea: se lee en cada petición
+        stock = catalog_cache.current_stock([product_id]).get(product_id, 0)
+        data['product'].update(stock=stock, in_stock=stock > 0)
         return JsonResponse(data)
         
     except Product.DoesNotExist:
@@ -257,4 +422,4 @@ def product_quick_view(request, product_id):
         return JsonResponse({
             'success': False,
             'error': str(e)
-        }, status=500)
\ No newline at end of file
+        }, status=500)
@@ -3,15 +3,18 @@ Vistas para el sistema de reviews y calificaciones.
 """
 
 from django.shortcuts import render, redirect, get_object_or_404
+from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.contrib import messages
 from django.http import JsonResponse
-from django.db.models import Avg, Count, Q
 
 from ..models import Product, Review, ReviewHelpful, OrderItem
 from ..forms import ReviewForm
 
+# Reviews por página en la lista completa de un producto
+REVIEWS_PER_PAGE = 20
+
 
 @login_required
 def add_review(request, product_id):
@@ -144,7 +147,7 @@ def mark_review_helpful(request, review_id):
 def product_reviews(request, product_id):
     """
     Vista de todos los reviews de un producto.
-    Con filtros y ordenamiento.
+    Con filtros, ordenamiento y paginación (REVIEWS_PER_PAGE).
     """
     product = get_object_or_404(Product, pk=product_id, is_active=True)
     
@@ -176,43 +179,39 @@ def product_reviews(request, product_id):
         'lowest': 'rating',
         'helpful': '-helpful_count'
     }
-    reviews = reviews.order_by(valid_sorts.get(sort_by, '-created_at'))
-    
-    # Estadísticas
-    stats = Review.objects.filter(
-        product=product,
-        is_approved=True
-    ).aggregate(
-        avg_rating=Avg('rating'),
-        total_reviews=Count('id'),
-        five_star=Count('id', filter=Q(rating=5)),
-        four_star=Count('id', filter=Q(rating=4)),
-        three_star=Count('id', filter=Q(rating=3)),
-        two_star=Count('id', filter=Q(rating=2)),
-        one_star=Count('id', filter=Q(rating=1)),
-    )
+    reviews = reviews.order_by(valid_sorts.get(sort_by, '-created_at'), '-pk')
+    reviews_page = Paginator(reviews, REVIEWS_PER_PAGE).get_page(request.GET.get('page'))
+    
+    # Estadísticas (agregados desnormalizados en Product, sin queries)
+    stats = {
+        'avg_rating': product.rating_avg if product.rating_count else None,
+        'total_reviews': product.rating_count,
+        'five_star': product.rating_5,
+        'four_star': product.rating_4,
+        'three_star': product.rating_3,
+        'two_star': product.rating_2,
+        'one_star': product.rating_1,
+    }
     
     # Verificar si el usuario puede dejar review
+    # ✅ OPTIMIZADO: su review se lee una sola vez
     can_review = False
     user_review = None
     if request.user.is_authenticated:
-        can_review = OrderItem.objects.filter(
-            order__user=request.user,
-            product=product,
-            order__status='delivered'
-        ).exists() and not Review.objects.filter(
-            user=request.user,
-            product=product
-        ).exists()
-        
         user_review = Review.objects.filter(
             user=request.user,
             product=product
         ).first()
+        
+        can_review = user_review is None and OrderItem.objects.filter(
+            order__user=request.user,
+            product=product,
+            order__status='delivered'
+        ).exists()
     
     context = {
         'product': product,
-        'reviews': reviews,
+        'reviews': reviews_page,
         'stats': stats,
         'can_review': can_review,
         'user_review': user_review,
@@ -0,0 +1,60 @@
+"""
+Estado personal del visitante para hidratar páginas cacheadas.
+
+Las páginas del catálogo se sirven desde la caché de página (ver
+shop/page_cache.py) y no incluyen nada propio del visitante. El script
+`static/js/me-state.js` pide este endpoint una vez por página y aplica
+el estado: contador del carrito, favoritos, comparador y token CSRF.
+"""
+
+from django.http import JsonResponse
+from django.middleware.csrf import get_token
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+
+from ..cart_summary import get_cart_summary
+from ..models import WishlistItem
+
+
+@never_cache
+@require_GET
+def me_state(request):
+    """
+    API con el estado del visitante actual.
+
+    ✅ OPTIMIZADO: El carrito sale del resumen cacheado (cart_summary.py)
+    y los favoritos de una sola consulta `values_list`; para anónimos no
+    se consulta la base de datos salvo la sesión.
+
+    Returns:
+        JSON con flags de autenticación, carrito, favoritos, comparador y
+        token CSRF
+    """
+    user = request.user
+    compare_list = request.session.get('compare_list', [])
+
+    state = {
+        'success': True,
+        'is_authenticated': user.is_authenticated,
+        'is_staff': user.is_staff,
+        'username': user.get_username() if user.is_authenticated else '',
+        'display_name': (user.first_name or user.username) if user.is_authenticated else '',
+        'cart_count': 0,
+        'cart_product_ids': [],
+        'wishlist_product_ids': [],
+        'compare_list': compare_list,
+        'compare_count': len(compare_list),
+        'csrf_token': get_token(request),
+    }
+
+    if user.is_authenticated:
+        summary = get_cart_summary(user)
+        state['cart_count'] = summary['count']
+        state['cart_product_ids'] = sorted(summary['product_ids'])
+        state['wishlist_product_ids'] = list(
+            WishlistItem.objects.filter(
+                wishlist__user=user
+            ).order_by('product_id').values_list('product_id', flat=True)
+        )
+
+    return JsonResponse(state)
@@ -135,6 +135,7 @@ def move_to_cart(request, item_id):
     Mover producto de wishlist al carrito.
     """
     from ..models import Cart, CartItem
+    from ..cart_summary import refresh_cart_summary
     
     item = get_object_or_404(
         WishlistItem,
@@ -176,7 +177,7 @@ def move_to_cart(request, item_id):
     return JsonResponse({
         'success': True,
         'message': 'Producto movido al carrito',
-        'cart_count': cart.items_count,
+        'cart_count': refresh_cart_summary(request.user.id)['count'],
         'wishlist_count': item.wishlist.items_count
     })
 
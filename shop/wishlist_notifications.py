@@ -0,0 +1,203 @@
+"""
+Avisos de la wishlist: bajadas de precio y productos de nuevo disponibles.
+
+1. Al guardar un producto, `record_product_changes` (signal post_save)
+   compara con el precio y stock cargados de la BD y registra un
+   `ProductChangeEvent` si el precio bajó o el stock pasó de 0 a
+   positivo. Los UPDATE masivos (`QuerySet.update`) no pasan por aquí;
+   el único que toca stock es el descuento del checkout, que nunca
+   repone.
+2. `send_wishlist_notifications` (`manage.py send_wishlist_notifications`)
+   toma los eventos pendientes, los agrupa por producto y busca a los
+   suscriptores con una consulta por producto sobre el índice
+   `WishlistItem(product, -added_at)`: nunca recorre toda la tabla de
+   favoritos, solo las filas de los productos que cambiaron.
+3. Cada usuario recibe un único email con todos sus avisos del lote. Los
+   emails se encolan en EmailOutbox en la misma transacción que marca
+   los eventos como procesados: un evento no se avisa dos veces ni se
+   pierde si el proceso muere a mitad.
+
+Al procesar se usa el estado actual del producto: si el precio volvió a
+subir por encima del que tenía el usuario al agregarlo, o el stock
+volvió a 0, no se avisa. Cada favorito guarda el último precio avisado
+(`WishlistItem.notified_price`): una bajada solo se avisa si deja el
+precio por debajo del precio al agregar y del último avisado, así una
+serie de rebajas pequeñas no manda un email por cada una. Debe correr
+un solo notificador a la vez.
+"""
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .email_utils import render_wishlist_digest
+from .models import Product, ProductChangeEvent, WishlistItem
+from .outbox import queue_emails
+
+logger = logging.getLogger(__name__)
+
+PRICE_DROP = ProductChangeEvent.KIND_PRICE_DROP
+BACK_IN_STOCK = ProductChangeEvent.KIND_BACK_IN_STOCK
+
+# Filas de WishlistItem leídas por vuelta del cursor
+SUBSCRIBER_CHUNK = 2000
+# Usuarios cargados por consulta al armar los emails
+USER_CHUNK = 500
+
+
+def record_product_changes(product):
+    """
+    Registra los eventos de wishlist de un producto recién guardado.
+
+    Usa `_loaded_price` / `_loaded_stock` (ver `Product.from_db`); si el
+    producto no se cargó de la BD o no se leyeron esos campos, no hace nada.
+    """
+    old_price = getattr(product, '_loaded_price', None)
+    old_stock = getattr(product, '_loaded_stock', None)
+    price = Decimal(str(product.price)) if product.price is not None else None
+
+    events = []
+    if old_price is not None and price is not None and price < old_price:
+        events.append(ProductChangeEvent(
+            product=product, kind=PRICE_DROP, old_price=old_price, new_price=price
+        ))
+    if old_stock is not None and old_stock <= 0 < product.stock:
+        events.append(ProductChangeEvent(product=product, kind=BACK_IN_STOCK))
+
+    if events:
+        ProductChangeEvent.objects.bulk_create(events)
+
+    product._loaded_price = price
+    product._loaded_stock = product.stock
+
+
+def _price_drop_q(price):
+    """Favoritos a los que `price` les da una bajada todavía no avisada."""
+    return Q(notify_price_drop=True, original_price__gt=price) & (
+        Q(notified_price__isnull=True) | Q(notified_price__gt=price)
+    )
+
+
+def _subscribers(product, kinds):
+    """
+    Suscriptores con algo que avisar sobre `product`.
+
+    Una consulta por producto (índice product, -added_at), leída por
+    partes para no cargar en memoria productos con muchos favoritos.
+
+    Yields:
+        (user_id, línea del digest)
+    """
+    conditions = Q()
+    if PRICE_DROP in kinds:
+        conditions |= _price_drop_q(product.price)
+    if BACK_IN_STOCK in kinds:
+        conditions |= Q(notify_back_in_stock=True)
+
+    rows = (
+        WishlistItem.objects.filter(product_id=product.pk)
+        .filter(conditions)
+        .order_by()
+        .values_list(
+            'wishlist__user_id', 'original_price', 'notified_price',
+            'notify_price_drop', 'notify_back_in_stock',
+        )
+        .iterator(chunk_size=SUBSCRIBER_CHUNK)
+    )
+    for user_id, original_price, notified_price, notify_price_drop, notify_back_in_stock in rows:
+        price_drop = (
+            PRICE_DROP in kinds and notify_price_drop and original_price > product.price
+            and (notified_price is None or notified_price > product.price)
+        )
+        back_in_stock = BACK_IN_STOCK in kinds and notify_back_in_stock
+        if price_drop or back_in_stock:
+            yield user_id, {
+                'product': product,
+                'price_drop': price_drop,
+                'back_in_stock': back_in_stock,
+                'original_price': original_price,
+                'savings': original_price - product.price if price_drop else None,
+            }
+
+
+def _current_kinds(product, kinds):
+    """Descarta los avisos que ya no aplican al estado actual del producto."""
+    if not product.is_active:
+        return set()
+    if product.stock <= 0:
+        kinds = kinds - {BACK_IN_STOCK}
+    return kinds
+
+
+def send_wishlist_notifications(batch_size=1000):
+    """
+    Procesa hasta `batch_size` eventos pendientes.
+
+    Returns:
+        dict: {'events', 'products', 'users', 'emails'}
+    """
+    stats = {'events': 0, 'products': 0, 'users': 0, 'emails': 0}
+
+    events = list(
+        ProductChangeEvent.objects.filter(processed_at__isnull=True)
+        .order_by('id')
+        .values_list('id', 'product_id', 'kind')[:batch_size]
+    )
+    if not events:
+        return stats
+
+    kinds_by_product = defaultdict(set)
+    for _, product_id, kind in events:
+        kinds_by_product[product_id].add(kind)
+
+    products = Product.objects.in_bulk(kinds_by_product)
+
+    # Avisos por usuario: un solo email con todos
+    digests = defaultdict(list)
+    # Precio avisado por producto, para no repetir la misma bajada
+    notified_prices = {}
+    for product_id, kinds in kinds_by_product.items():
+        product = products.get(product_id)
+        kinds = _current_kinds(product, kinds) if product else set()
+        if not kinds:
+            continue
+        stats['products'] += 1
+        if PRICE_DROP in kinds:
+            notified_prices[product_id] = product.price
+        for user_id, line in _subscribers(product, kinds):
+            digests[user_id].append(line)
+
+    # Renderizar fuera de la transacción
+    messages = []
+    user_ids = list(digests)
+    for start in range(0, len(user_ids), USER_CHUNK):
+        users = User.objects.filter(
+            pk__in=user_ids[start:start + USER_CHUNK],
+            is_active=True
+        ).exclude(email='').only('username', 'first_name', 'email')
+        for user in users:
+            messages.append(render_wishlist_digest(user, digests[user.pk]))
+
+    with transaction.atomic():
+        queue_emails(messages)
+        for product_id, price in notified_prices.items():
+            WishlistItem.objects.filter(product_id=product_id).filter(
+                _price_drop_q(price)
+            ).update(notified_price=price)
+        # Los ids son crecientes: el lote es todo lo pendiente hasta el último
+        ProductChangeEvent.objects.filter(
+            processed_at__isnull=True,
+            pk__lte=events[-1][0]
+        ).update(processed_at=timezone.now())
+
+    stats.update(events=len(events), users=len(digests), emails=len(messages))
+    logger.info(
+        f"Wishlist notifications: {stats['events']} events, "
+        f"{stats['products']} products, {stats['emails']} emails"
+    )
+    return stats
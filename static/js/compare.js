@@ -62,7 +62,12 @@ const ProductCompare = (function() {
     // ============================================
     // CARGAR LISTA DESDE SERVIDOR (AJAX)
     // ============================================
-    function loadCompareListFromServer() {
+    function fetchCompareList() {
+        // ✅ Reutilizar la petición de /me/state/ si me-state.js está cargado
+        if (window.MeState) {
+            return MeState.load();
+        }
+        
         return fetch('/comparar/obtener/', {
             method: 'GET',
             headers: {
@@ -74,7 +79,11 @@ const ProductCompare = (function() {
                 throw new Error(`HTTP error ${response.status}`);
             }
             return response.json();
-        })
+        });
+    }
+    
+    function loadCompareListFromServer() {
+        return fetchCompareList()
         .then(data => {
             if (data.success) {
                 compareList = data.compare_list || [];
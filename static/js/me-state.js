@@ -0,0 +1,130 @@
+/**
+ * ================================================================
+ * HIDRATACIÓN DEL ESTADO DEL VISITANTE
+ * ================================================================
+ *
+ * Las páginas del catálogo pueden venir de la caché de página y no
+ * traen nada propio del visitante. Este script pide /me/state/ una
+ * sola vez y aplica el estado sobre el HTML:
+ *
+ * - Contador del carrito (.cart-badge)
+ * - Favoritos (.wishlist-btn[data-product-id] → .in-wishlist)
+ * - Comparador (lo consume compare.js vía MeState.load())
+ * - Token CSRF (inputs csrfmiddlewaretoken y header de jQuery)
+ *
+ * Solo los anónimos reciben páginas cacheadas (shop/page_cache.py); las
+ * de usuarios autenticados ya se renderizan con su menú y sus enlaces.
+ *
+ * Al terminar dispara el evento `me:state` en document.
+ */
+
+const MeState = (function() {
+    'use strict';
+
+    // ============================================
+    // CONFIGURACIÓN
+    // ============================================
+    const config = {
+        url: '/me/state/',
+    };
+
+    // ============================================
+    // ESTADO
+    // ============================================
+    let state = null;
+    let request = null;
+
+    // ============================================
+    // CARGAR ESTADO (UNA SOLA PETICIÓN POR PÁGINA)
+    // ============================================
+    function load() {
+        if (request) return request;
+
+        request = fetch(config.url, {
+            method: 'GET',
+            credentials: 'same-origin',
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest',
+            }
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP error ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            state = data;
+            return data;
+        });
+
+        return request;
+    }
+
+    // ============================================
+    // APLICAR ESTADO AL DOM
+    // ============================================
+    function applyCsrfToken(token) {
+        if (!token) return;
+
+        document.querySelectorAll('input[name="csrfmiddlewaretoken"]').forEach(input => {
+            input.value = token;
+        });
+
+        if (window.jQuery) {
+            jQuery.ajaxSetup({ headers: { 'X-CSRFToken': token } });
+        }
+    }
+
+    function applyCart(data) {
+        document.querySelectorAll('.cart-badge').forEach(badge => {
+            badge.textContent = data.cart_count;
+            badge.style.display = data.cart_count > 0 ? '' : 'none';
+        });
+    }
+
+    function applyWishlist(data) {
+        const ids = new Set(data.wishlist_product_ids);
+        document.querySelectorAll('.wishlist-btn[data-product-id]').forEach(btn => {
+            const productId = parseInt(btn.dataset.productId);
+            btn.classList.toggle('in-wishlist', ids.has(productId));
+        });
+    }
+
+    function apply(data) {
+        applyCsrfToken(data.csrf_token);
+        applyCart(data);
+        applyWishlist(data);
+
+        document.dispatchEvent(new CustomEvent('me:state', { detail: data }));
+    }
+
+    function init() {
+        load()
+            .then(apply)
+            .catch(error => {
+                console.error('❌ Error cargando estado del visitante:', error);
+            });
+    }
+
+    // ============================================
+    // API PÚBLICA
+    // ============================================
+    return {
+        init: init,
+        load: load,
+        get: function() { return state; },
+    };
+})();
+
+// ============================================
+// INICIALIZAR AL CARGAR LA PÁGINA
+// ============================================
+if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', MeState.init);
+} else {
+    MeState.init();
+}
+
+// Hacer disponible globalmente
+window.MeState = MeState;